@@ -0,0 +1,34 @@
+from typing import Optional
+from fastapi import Header, HTTPException
+from src.api.security import is_admin_token
+from src.domain.exceptions.admission_rejected_error import AdmissionRejectedError
+from src.infrastructure.container import Container
+
+def admission_slot(model: str, default_lane: str = "screening"):
+    """
+    Builds a dependency that holds an execution slot of the model while the request runs.
+    Saturated models answer 503 with Retry-After right away instead of piling up requests.
+    The priority lane is set by the route; X-Priority-Lane is only honoured from trusted
+    callers that also send a valid X-Admin-Token, so a client cannot promote itself.
+
+    Args:
+        model: Admission gate of the route (lesion, dental, cough, dermis, deepstroke)
+        default_lane: Priority lane of the route
+    """
+    async def dependency(
+        x_priority_lane: Optional[str] = Header(None, description="Priority lane: clinical or screening (trusted callers only)"),
+        x_admin_token: Optional[str] = Header(None, description="Administration token, required for X-Priority-Lane to apply")
+    ):
+        controller = Container.admission_controller()
+        lane = x_priority_lane if x_priority_lane and is_admin_token(x_admin_token) else default_lane
+        try:
+            async with controller.admit(model, lane):
+                yield
+        except AdmissionRejectedError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)}
+            )
+
+    return dependency
@@ -0,0 +1,51 @@
+import os
+import time
+from typing import Optional
+from fastapi import Header, Request
+
+class ArrivalTimeMiddleware:
+    """Stamps every HTTP request with its arrival time, the start of its latency budget"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope.setdefault("state", {})["received_at"] = time.monotonic()
+        await self.app(scope, receive, send)
+
+def budget_seconds(model: str) -> float:
+    """Latency budget of an evaluation type: ADVICE_<MODEL>_LATENCY_BUDGET_SECONDS, ADVICE_LATENCY_BUDGET_SECONDS or 8 (0 disables it)"""
+    return float(
+        os.getenv(f"ADVICE_{model.upper()}_LATENCY_BUDGET_SECONDS")
+        or os.getenv("ADVICE_LATENCY_BUDGET_SECONDS")
+        or 8
+    )
+
+def latency_budget(model: str):
+    """
+    Builds a dependency giving the deadline of an evaluation request, as a time.monotonic() value.
+
+    The budget is ADVICE_<MODEL>_LATENCY_BUDGET_SECONDS (or ADVICE_LATENCY_BUDGET_SECONDS,
+    default 8) counted from the arrival of the request, so uploads, admission queueing and
+    classification consume it too. A client may ask for a tighter budget with X-Latency-Budget-Ms.
+    A budget of 0 disables the deadline: the advice of Gemini is always awaited.
+
+    Args:
+        model: Evaluation type (lesion, dental, cough, dermis, skin, deepstroke)
+    """
+    budget = budget_seconds(model)
+
+    def dependency(
+        request: Request,
+        x_latency_budget_ms: Optional[int] = Header(None, ge=1, description="Tighter latency budget for this request, in milliseconds")
+    ) -> Optional[float]:
+        seconds = budget
+        if x_latency_budget_ms is not None:
+            seconds = min(seconds, x_latency_budget_ms / 1000) if seconds > 0 else x_latency_budget_ms / 1000
+        if seconds <= 0:
+            return None
+        received_at = getattr(request.state, "received_at", None) or time.monotonic()
+        return received_at + seconds
+
+    return dependency
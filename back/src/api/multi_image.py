@@ -0,0 +1,134 @@
+import asyncio
+import io
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from PIL import Image
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
+from src.infrastructure.container import Container
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
+from src.infrastructure.services.micro_batcher import MicroBatcher
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.infrastructure.services.image_preprocessing import decode_raw_image, is_raw_image
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
+
+MAX_FILES = int(os.getenv("MULTI_IMAGE_MAX_FILES", "20"))
+
+async def read_images(images: List[UploadFile]) -> List[Tuple[str, bytes]]:
+    """
+    Read every uploaded image while the request is open
+
+    Raises:
+        HTTPException: 400 if there are no images or too many
+
+    The content type is not checked (the Flutter client sends application/octet-stream):
+    the bytes of each file are validated when it is decoded, and a file that is not an
+    image is reported on its own NDJSON line.
+    """
+    if not images:
+        raise HTTPException(status_code=400, detail="At least one image is required")
+    if len(images) > MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_FILES} images per request")
+    with memory_diagnostics.stage("upload"):
+        return [(image.filename, await image.read()) for image in images]
+
+class _InvalidImageError(Exception):
+    """An uploaded file that is neither an image nor a valid raw RGB buffer"""
+
+def _error(e: Exception) -> Dict:
+    if isinstance(e, _InvalidImageError):
+        return {"code": "invalid_image", "message": str(e), "retryable": False}
+    if isinstance(e, DialogServiceError):
+        return e.to_dict()
+    return {"code": "evaluation_error", "message": str(e), "retryable": False}
+
+def stream_evaluations(
+    model: str,
+    files: List[Tuple[str, bytes]],
+    description: Optional[str],
+    default_description: str,
+    batcher: MicroBatcher,
+    dialog_service: DialogSystemServiceInterface,
+    include_advice: bool = True,
+    history_store: Optional[EvaluationHistoryStore] = None,
+    patient_id: Optional[str] = None,
+    deadline: Optional[float] = None
+) -> StreamingResponse:
+    """
+    Evaluate several images concurrently and stream one NDJSON line per image as soon as it is ready
+
+    Every image is decoded in a worker thread (raw RGB buffers are not decoded) and
+    classified through the model's micro-batcher, so the images of the request (and of concurrent requests) share
+    forward passes; the medical advice of each image is requested as soon as its
+    classification is known. Lines arrive in completion order and carry the index of
+    the image in the upload; a failed image reports its error without stopping the others.
+
+    Args:
+        model: Model and prompt name (lesion or dental)
+        files: (filename, content) of each image
+        description: Optional description shared by the images
+        default_description: Description sent to the prompt when none is given
+        batcher: Micro-batcher of the model
+        dialog_service: Dialog service for the medical advice
+        include_advice: Whether to generate medical advice for each image
+        history_store: Store every successful result is recorded in
+        patient_id: Patient the results belong to
+        deadline: Time (time.monotonic()) by which each advice is due; later advice is replaced by its template
+
+    Returns:
+        StreamingResponse: application/x-ndjson stream
+    """
+    async def evaluate(index: int, filename: str, content: bytes, vision_service) -> Dict:
+        line = {
+            "index": index, "filename": filename, "classification": None,
+            "medical_advice": None, "advice_is_fallback": False, "error": None
+        }
+        try:
+            with memory_diagnostics.stage("decode"):
+                try:
+                    if is_raw_image(content):
+                        # Resized by the client: a view on the upload, fed as is to the batched preprocessing
+                        image = decode_raw_image(content)
+                    else:
+                        image = await asyncio.to_thread(lambda: Image.open(io.BytesIO(content)).convert("RGB"))
+                except (OSError, ValueError) as e:
+                    # PIL cannot identify or read the bytes, or the raw buffer header does not match its size
+                    raise _InvalidImageError(f"{filename} is not an image") from e
+            label, confidence = await batcher.classify(vision_service, image)
+            line["classification"] = vision_service.format_prediction(label, confidence)
+            if include_advice:
+                prompt = prompt_registry.render(
+                    model,
+                    classification=line["classification"],
+                    description=description or default_description
+                )
+                line["medical_advice"], line["advice_is_fallback"] = await generate_advice(
+                    dialog_service, prompt, model, line["classification"], deadline
+                )
+        except Exception as e:
+            line["error"] = _error(e)
+            return line
+        if history_store is not None:
+            history_store.record(patient_id, model, dict(line))
+        return line
+
+    async def generate() -> AsyncIterator[str]:
+        # The model version is leased for the whole stream, so a hot-swap never mixes versions within a visit
+        async with Container.model_registry().lease(model) as vision_service:
+            tasks = [
+                asyncio.create_task(evaluate(index, filename, content, vision_service))
+                for index, (filename, content) in enumerate(files)
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+            finally:
+                # Client disconnected: stop the evaluations still running
+                for task in tasks:
+                    task.cancel()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
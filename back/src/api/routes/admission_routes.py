@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends
+from src.infrastructure.container import Container
+from src.infrastructure.services.admission_controller import AdmissionController
+from src.infrastructure.services.fallback_advice import fallback_counts
+
+router = APIRouter(prefix="/admission", tags=["Admission"])
+
+def get_admission_controller() -> AdmissionController:
+    """Provides the singleton instance of AdmissionController for dependency injection"""
+    return Container.admission_controller()
+
+@router.get("/stats")
+async def admission_stats(controller: AdmissionController = Depends(get_admission_controller)):
+    """
+    In-flight requests and queue depth per model, for autoscaling decisions
+
+    Returns:
+        dict: Total queue_depth, the state of every admission gate and the advice answered
+              from templates because Gemini missed the latency budget, by modality
+    """
+    return {**controller.stats(), "advice_fallbacks": dict(fallback_counts)}
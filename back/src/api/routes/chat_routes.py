@@ -1,8 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
 from src.domain.dtos.chat_request import ChatRequestDTO
 from src.domain.dtos.chat_response import ChatResponseDTO
+from src.domain.dtos.chat_session_request import ChatSessionRequestDTO
+from src.domain.dtos.chat_session_response import ChatSessionResponseDTO
+from src.domain.dtos.chat_message_request import ChatMessageRequestDTO
+from src.domain.dtos.chat_message_response import ChatMessageResponseDTO
 from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
 from src.infrastructure.services.gemini_service import GeminiService
+from src.infrastructure.services.chat_session_store import ChatSession, ChatSessionStore
+from src.infrastructure.container import Container
+from src.api.security import require_admin_token
+from src.domain.exceptions.dialog_service_error import DialogServiceError
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -10,6 +18,16 @@ def get_ai_service() -> DialogSystemServiceInterface:
     """Dependency injection for the AI service"""
     return GeminiService()
 
+def get_session_store() -> ChatSessionStore:
+    """Provides the singleton instance of ChatSessionStore for dependency injection"""
+    return Container.chat_session_store()
+
+def _get_session(session_store: ChatSessionStore, session_id: str) -> ChatSession:
+    session = session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Chat session {session_id} not found or expired")
+    return session
+
 @router.post("/generate", response_model=ChatResponseDTO)
 async def generate_response(
     request: ChatRequestDTO,
@@ -34,8 +52,111 @@ async def generate_response(
         
         return ChatResponseDTO(response=response)
         
+    except DialogServiceError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error generating response: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/sessions", response_model=ChatSessionResponseDTO, status_code=201)
+async def create_session(
+    request: ChatSessionRequestDTO,
+    session_store: ChatSessionStore = Depends(get_session_store)
+) -> ChatSessionResponseDTO:
+    """
+    Open a chat session whose history is kept by the server
+
+    Args:
+        request: DTO with the system_prompt of the session
+        session_store: Injected chat session store
+
+    Returns:
+        ChatSessionResponseDTO: Session identifier, idle timeout and history token budget
+    """
+    try:
+        session = session_store.create(request.system_prompt)
+        return ChatSessionResponseDTO(
+            session_id=session.session_id,
+            idle_timeout_seconds=int(session_store.idle_seconds),
+            token_budget=session_store.token_budget
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error creating chat session: {str(e)}"
+        )
+
+@router.post("/sessions/{session_id}/messages", response_model=ChatMessageResponseDTO)
+async def send_message(
+    session_id: str,
+    request: ChatMessageRequestDTO,
+    session_store: ChatSessionStore = Depends(get_session_store)
+) -> ChatMessageResponseDTO:
+    """
+    Answer a message in a chat session; only the new message is sent by the client
+
+    Args:
+        session_id: Chat session identifier
+        request: DTO with the message and optional max_output_tokens
+        session_store: Injected chat session store
+
+    Returns:
+        ChatMessageResponseDTO: Generated response and size of the kept history
+    """
+    session = _get_session(session_store, session_id)
+    try:
+        response = await session_store.send(session, request.message, request.max_output_tokens)
+        return ChatMessageResponseDTO(
+            session_id=session_id,
+            response=response,
+            turns=session.messages,
+            history_tokens=session.history_tokens,
+            summarized=session.summary is not None
+        )
+    except DialogServiceError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating response: {str(e)}"
+        )
+
+@router.get("/sessions", dependencies=[Depends(require_admin_token)])
+async def get_session_stats(session_store: ChatSessionStore = Depends(get_session_store)):
+    """
+    Number of open chat sessions and counters of expirations, evictions and compactions
+
+    Returns:
+        dict: Chat session store status
+    """
+    return session_store.status()
+
+@router.get("/sessions/{session_id}")
+async def get_session(
+    session_id: str,
+    session_store: ChatSessionStore = Depends(get_session_store)
+):
+    """
+    Kept state of a chat session: summary of the older turns and recent history
+
+    Returns:
+        dict: Session identifier, system prompt, summary, history and its estimated tokens
+    """
+    return _get_session(session_store, session_id).to_dict()
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(
+    session_id: str,
+    session_store: ChatSessionStore = Depends(get_session_store)
+):
+    """
+    Close a chat session and discard its history
+
+    Returns:
+        dict: Identifier of the deleted session
+    """
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Chat session {session_id} not found or expired")
+    return {"deleted": session_id}
@@ -1,28 +1,57 @@
-from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
-from typing import Optional
+import asyncio
+import json
+import os
+import time
+from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from typing import AsyncIterator, Optional
 from src.domain.dtos.lesion_evaluation_request import LesionEvaluationRequestDTO
 from src.domain.dtos.lesion_evaluation_response import LesionEvaluationResponseDTO
+from src.domain.dtos.cough_stream_start_request import CoughStreamStartRequestDTO
 from src.domain.interfaces.cough_classifier_service_interface import CoughClassifierServiceInterface
 from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
-from src.infrastructure.services.huggingface_cough_classification import CoughClassificationService
+from src.infrastructure.container import Container
 from src.infrastructure.services.gemini_service import GeminiService
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.domain.exceptions.admission_rejected_error import AdmissionRejectedError
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.api.admission import admission_slot
+from src.api.deadline import budget_seconds, latency_budget
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
+from src.infrastructure.services.cough_feature_stream import CoughFeatureStream
 
 router = APIRouter(prefix="/cough", tags=["Cough"])
 
-def get_vision_service() -> CoughClassifierServiceInterface:
-    """Dependency injection for the image classification service"""
-    return CoughClassificationService()
+STREAM_MAX_SECONDS = float(os.getenv("COUGH_STREAM_MAX_SECONDS", "60"))
+STREAM_PROVISIONAL_SECONDS = float(os.getenv("COUGH_STREAM_PROVISIONAL_SECONDS", "1.0"))
+STREAM_PROVISIONAL_GROWTH = float(os.getenv("COUGH_STREAM_PROVISIONAL_GROWTH", "0.25"))
+STREAM_MAX_CONCURRENT = int(os.getenv("COUGH_STREAM_MAX_CONCURRENT", "8"))
+# Streams open in this process
+_active_streams = 0
+
+async def get_vision_service() -> AsyncIterator[CoughClassifierServiceInterface]:
+    """Dependency injection for the cough classification service (active model version, leased for the request)"""
+    async with Container.model_registry().lease("cough") as service:
+        yield service
 
 def get_dialog_service() -> DialogSystemServiceInterface:
     """Dependency injection for the dialog service"""
     return GeminiService()
 
-@router.post("/evaluate", response_model=LesionEvaluationResponseDTO)
+def get_history_store() -> EvaluationHistoryStore:
+    """Dependency injection for the evaluation history store"""
+    return Container.evaluation_history_store()
+
+@router.post("/evaluate", response_model=LesionEvaluationResponseDTO, dependencies=[Depends(admission_slot("cough"))])
 async def evaluate_cough(
     audio: UploadFile = File(..., description="Cough Audio"),
     description: Optional[str] = Form(None, description="Optional description of the cough symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
     vision_service: CoughClassifierServiceInterface = Depends(get_vision_service),
-    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service)
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("cough"))
 ) -> LesionEvaluationResponseDTO:
     """
     Evaluate a dermatological lesion using image classification and medical advice
@@ -30,8 +59,11 @@ async def evaluate_cough(
     Args:
         audio: Lesion image
         description: Optional description of the lesion
+        patient_id: Optional patient identifier for the evaluation history
         vision_service: Image classification service
         dialog_service: Dialog service for medical advice
+        history_store: Store the result is recorded in
+        deadline: Time by which the response is due; template advice is returned when Gemini is later
         
     Returns:
         LesionEvaluationResponseDTO: Classification and medical advice
@@ -39,41 +71,169 @@ async def evaluate_cough(
     try:
         classification = await vision_service.classify_audio(audio, description)
         
-        system_prompt = """Eres un asistente médico experto en el análisis de sonidos de tos. Tu función es ofrecer orientación médica clara, útil y profesional 
-        basada en la clasificación de una muestra de tos. Solo puedes responder sobre los siguientes tres casos: COVID-19, tos normal o tos con síntomas (sintomática).
-        No debes mencionar ni diagnosticar otras enfermedades o condiciones.
-
-        Debes abordar exclusivamente lo siguiente:
-        - Si la tos está posiblemente asociada a COVID-19, si presenta síntomas generales (sintomática), o si se trata de una tos normal
-        - Si es recomendable acudir a una consulta médica
-        - Posibles causas o condiciones relacionadas con uno de los tres tipos de tos permitidos
-        - Recomendaciones para observar la evolución, monitorear síntomas o buscar atención
-        - Un recordatorio claro de que esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones
-
-        Responde con empatía, sencillez y precisión. Nunca inventes o especules fuera de los tres casos definidos."""
-
-        user_prompt = f"""
-        Clasificación de la tos: {classification}
-
-        Descripción adicional del paciente: {description or 'No proporcionada'}
-
-        Por favor, proporciona una orientación médica basada en esta información.
-        """
-
-
-        medical_advice = await dialog_service.generate_response(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            context=f"Classification: {classification}"
+        prompt = prompt_registry.render(
+            "cough",
+            classification=classification,
+            description=description or 'No proporcionada'
+        )
+        medical_advice, advice_is_fallback = await generate_advice(
+            dialog_service, prompt, "cough", classification, deadline
         )
         
-        return LesionEvaluationResponseDTO(
+        response = LesionEvaluationResponseDTO(
             classification=classification,
-            medical_advice=medical_advice
+            medical_advice=medical_advice,
+            advice_is_fallback=advice_is_fallback
         )
+        history_store.record(patient_id, "cough", response.model_dump())
+        return response
         
+    except DialogServiceError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error evaluating lesion: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+class _StreamError(Exception):
+    """Error of a cough stream reported to the client as is (the cause is on the client's side or the server is busy)"""
+
+    def __init__(self, code: str, message: str, close_code: int, retryable: bool = False):
+        self.code = code
+        self.message = message
+        self.close_code = close_code
+        self.retryable = retryable
+        super().__init__(message)
+
+def _stream_error(e: Exception) -> dict:
+    if isinstance(e, DialogServiceError):
+        error = e.to_dict()
+    elif isinstance(e, _StreamError):
+        error = {"code": e.code, "message": e.message, "retryable": e.retryable}
+    else:
+        # Internal details stay in the server log
+        error = {"code": "evaluation_error", "message": "The cough recording could not be evaluated", "retryable": False}
+    return {"type": "error", "error": error}
+
+async def _classify_stream(stream: CoughFeatureStream) -> dict:
+    """
+    Classification of the audio received so far, as sent to the client. Holds a cough
+    admission slot and leases the active model version only while it runs.
+
+    Raises:
+        AdmissionRejectedError: If the cough model is saturated
+    """
+    async with Container.admission_controller().admit("cough", "screening"):
+        features = await asyncio.to_thread(stream.features)
+        async with Container.model_registry().lease("cough") as vision_service:
+            label, confidence = await asyncio.to_thread(vision_service.predict_features, features)
+    return {
+        "label": label,
+        "confidence": float(confidence),
+        "classification": f"{label} (Confidence: {confidence:.1%})",
+        "seconds": round(stream.seconds, 3)
+    }
+
+async def _start_message(websocket: WebSocket) -> CoughStreamStartRequestDTO:
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    try:
+        return CoughStreamStartRequestDTO.model_validate_json(message.get("text") or "")
+    except ValidationError:
+        raise _StreamError(
+            "invalid_start",
+            'The first message must be {"type": "start", "sample_rate": 8000-48000, ...}',
+            close_code=1008
+        )
+
+@router.websocket("/stream")
+async def stream_cough(
+    websocket: WebSocket,
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store)
+) -> None:
+    """
+    Classify a cough while it is being recorded
+
+    The client first sends the text message {"type": "start", "sample_rate": ...} (with
+    the optional description, patient_id and include_advice, kept out of the URL), then
+    binary messages of 16-bit little-endian mono PCM as it records, then the text message
+    {"type": "end"}. The cough features are computed incrementally as the audio arrives,
+    so a {"type": "provisional", ...} classification of the recording so far is sent once
+    it has grown by COUGH_STREAM_PROVISIONAL_SECONDS and by COUGH_STREAM_PROVISIONAL_GROWTH
+    of its length, and the {"type": "final", ...} classification, the same as
+    /cough/evaluate on the whole recording, right after the end message. The medical
+    advice follows in a {"type": "advice", ...} message (unless include_advice is false)
+    and the socket is closed. Errors are sent as {"type": "error", "error": {...}} before
+    closing.
+
+    At most COUGH_STREAM_MAX_CONCURRENT streams run at once. Every classification holds a
+    cough admission slot and leases the model only while it runs: a provisional one is
+    skipped when the model is saturated, a final one is reported as retryable.
+    """
+    global _active_streams
+    await websocket.accept()
+    if _active_streams >= STREAM_MAX_CONCURRENT:
+        await websocket.send_json(_stream_error(_StreamError(
+            "overloaded", "Too many cough streams in progress, retry later", close_code=1013, retryable=True
+        )))
+        await websocket.close(code=1013)
+        return
+    _active_streams += 1
+    try:
+        start = await _start_message(websocket)
+        stream = CoughFeatureStream(start.sample_rate)
+        next_provisional = STREAM_PROVISIONAL_SECONDS
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes") is not None:
+                await asyncio.to_thread(stream.append_pcm16, message["bytes"])
+                if stream.seconds > STREAM_MAX_SECONDS:
+                    raise _StreamError(
+                        "too_long", f"Recordings are limited to {STREAM_MAX_SECONDS:.0f} seconds", close_code=1009
+                    )
+                if stream.seconds >= next_provisional:
+                    # Each read reduces the whole recording: spacing them geometrically keeps the total cost linear
+                    next_provisional = stream.seconds + max(
+                        STREAM_PROVISIONAL_SECONDS, STREAM_PROVISIONAL_GROWTH * stream.seconds
+                    )
+                    try:
+                        await websocket.send_json({"type": "provisional", **await _classify_stream(stream)})
+                    except AdmissionRejectedError:
+                        pass
+            elif json.loads(message.get("text") or "{}").get("type") == "end":
+                break
+
+        try:
+            result = await _classify_stream(stream)
+        except AdmissionRejectedError as e:
+            raise _StreamError("overloaded", str(e), close_code=1013, retryable=True)
+        await websocket.send_json({"type": "final", **result})
+        record = {"classification": result["classification"], "medical_advice": None, "advice_is_fallback": False}
+        if start.include_advice:
+            # The latency budget starts when the recording ends
+            seconds = budget_seconds("cough")
+            prompt = prompt_registry.render(
+                "cough",
+                classification=result["classification"],
+                description=start.description or 'No proporcionada'
+            )
+            record["medical_advice"], record["advice_is_fallback"] = await generate_advice(
+                dialog_service, prompt, "cough", result["classification"],
+                time.monotonic() + seconds if seconds > 0 else None
+            )
+            await websocket.send_json({"type": "advice", **record})
+        history_store.record(start.patient_id, "cough", record)
+        await websocket.close()
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        print(f"Error in cough stream: {str(e)}")
+        await websocket.send_json(_stream_error(e))
+        await websocket.close(code=e.close_code if isinstance(e, _StreamError) else 1011)
+    finally:
+        _active_streams -= 1
@@ -1,21 +1,41 @@
 from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
-from typing import Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import AsyncIterator, Iterator, Optional
+import pandas as pd
 from src.domain.dtos.deepstroke_request import DeepStrokeRequestDTO
 from src.domain.dtos.deepstroke_response import DeepStrokeResponseDTO
-from src.infrastructure.services.deepstroke_service import DeepStrokeService
-from src.infrastructure.services.gemini_service import GeminiService
+from src.infrastructure.services.deepstroke_service import (
+    DeepStrokeService,
+    COLUMNAS_SCORE_CLINICO,
+    calcular_score_clinico_vectorizado
+)
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.api.admission import admission_slot
+from src.api.deadline import latency_budget
+from src.infrastructure.container import Container
+from src.infrastructure.services.image_preprocessing import RAW_IMAGE_CONTENT_TYPE
+from src.infrastructure.services.model_lifecycle import ModelLifecycle, ModelState
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
 
 router = APIRouter(prefix="/deepstroke", tags=["DeepSTROKE - Retinal Fundus Analysis"])
 
-def get_deepstroke_service() -> DeepStrokeService:
-    """Dependency to get DeepStroke service instance"""
-    return DeepStrokeService()
+# Filas procesadas por lote al puntuar cohortes; acota la memoria con archivos grandes
+FILAS_POR_LOTE = 50_000
 
-def get_dialog_service() -> GeminiService:
-    """Dependency injection for the dialog service"""
-    return GeminiService()
+async def get_deepstroke_service() -> AsyncIterator[DeepStrokeService]:
+    """Dependency to get DeepStroke service instance (versión activa del modelo, reservada durante la solicitud)"""
+    async with Container.model_registry().lease("deepstroke") as service:
+        yield service
 
-@router.post("/predict", response_model=DeepStrokeResponseDTO)
+def get_model_lifecycle() -> ModelLifecycle:
+    """Dependency to get the model lifecycle (carga y calentamiento al arrancar)"""
+    return Container.model_lifecycle()
+
+def get_history_store() -> EvaluationHistoryStore:
+    """Dependency to get the evaluation history store (historial de resultados por paciente)"""
+    return Container.evaluation_history_store()
+
+@router.post("/predict", response_model=DeepStrokeResponseDTO, dependencies=[Depends(admission_slot("deepstroke", default_lane="clinical"))])
 async def predict_stroke_risk(
     id_paciente: str = Form(..., description="ID único del paciente"),
     genero: bool = Form(..., description="Género del paciente (True=Masculino, False=Femenino)"),
@@ -30,7 +50,8 @@ async def predict_stroke_risk(
     ojo1: UploadFile = File(..., description="Imagen de fondo de ojo derecho"),
     ojo2: UploadFile = File(..., description="Imagen de fondo de ojo izquierdo"),
     deepstroke_service: DeepStrokeService = Depends(get_deepstroke_service),
-    dialog_service: GeminiService = Depends(get_dialog_service)
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("deepstroke"))
 ):
     """
     Predice el riesgo de accidente cerebrovascular usando análisis de fondo de ojo con RETFound
@@ -52,13 +73,13 @@ async def predict_stroke_risk(
     **Retorna:**
     - Probabilidad de ACV
     - Nivel de riesgo (BAJO, MODERADO, ALTO, MUY ALTO)
-    - Recomendaciones médicas personalizadas
+    - Recomendaciones médicas personalizadas (de plantilla si Gemini no responde dentro del presupuesto de latencia)
     """
     try:
         # Validar tipos de archivo
-        if not ojo1.content_type.startswith('image/'):
+        if not (ojo1.content_type.startswith('image/') or ojo1.content_type == RAW_IMAGE_CONTENT_TYPE):
             raise HTTPException(status_code=400, detail="ojo1 debe ser una imagen")
-        if not ojo2.content_type.startswith('image/'):
+        if not (ojo2.content_type.startswith('image/') or ojo2.content_type == RAW_IMAGE_CONTENT_TYPE):
             raise HTTPException(status_code=400, detail="ojo2 debe ser una imagen")
         
         # Crear DTO con datos de la API (booleanos)
@@ -80,65 +101,110 @@ async def predict_stroke_risk(
         # Convertir a formato del backend (0/1)
         backend_data = request_dto.to_backend_format()
         
-        # Realizar predicción
-        result = await deepstroke_service.predict(backend_data, ojo1, ojo2)
-        
-        # Generar recomendaciones médicas con prompt específico
-        system_prompt = """Eres el Dr. Carlos, un neurólogo especialista en prevención de accidentes cerebrovasculares (ACV) con 15 años de experiencia. 
-        Tu función es ofrecer orientación médica clara, útil y profesional basada en el análisis de riesgo de ACV.
-        
-        IMPORTANTE: Solo puedes responder sobre prevención de ACV y factores de riesgo cardiovascular. 
-        No debes mencionar ni diagnosticar otras enfermedades o condiciones médicas.
-        
-        Debes abordar exclusivamente lo siguiente:
-        - Evaluación del nivel de riesgo de ACV (BAJO, MODERADO, ALTO, MUY ALTO)
-        - Factores de riesgo específicos del paciente que pueden mejorarse
-        - Recomendaciones prácticas para reducir el riesgo de ACV
-        - Si es recomendable acudir a una consulta médica especializada
-        - Frecuencia de controles médicos recomendada
-        - Un recordatorio claro de que esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones
-        
-        Responde con empatía, sencillez y precisión. Máximo 120 palabras. Sé directo y práctico."""
-
-        user_prompt = f"""
-        Paciente: {result['edad_basal']} años, {'Masculino' if result['genero'] == 1 else 'Femenino'}
-        
-        Factores de riesgo:
-        - Fumador: {'Sí' if result['fumador_alguna_ocasion_basal'] == 1 else 'No'}
-        - Hipertensión: {'Sí' if result['hipertension_basal'] == 1 else 'No'}
-        - Diabetes: {'Sí' if result['diabetes_mellitus_tipo_2_basal'] == 1 else 'No'}
-        - Presión arterial: {result['pas_basal']} mmHg
-        - HDL colesterol: {result['hdl_c_basal']} mmol/L
-        - Colesterol total: {result['colesterol_total_basal']} mmol/L
-        - IMC: {result['imc_basal']} kg/m²
-        
-        Resultado del análisis:
-        - Nivel de riesgo: {result['nivel_riesgo']}
-        - Probabilidad de ACV: {result['probabilidad_acv']:.1%}
-        
-        Dr. Carlos, ¿qué recomendaciones específicas tienes para este paciente?
-        """
-
-        medical_advice = await dialog_service.generate_response(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            context=f"ACV - Paciente {result['id_paciente']}"
-        )
-        
-        # Actualizar el resultado con las recomendaciones médicas
-        result['recomendaciones_medicas'] = medical_advice
+        # Realizar predicción (incluye las recomendaciones médicas generadas por el servicio)
+        result = await deepstroke_service.predict(backend_data, ojo1, ojo2, deadline)
         
         # Convertir respuesta del backend a formato de API (booleanos)
-        return DeepStrokeResponseDTO.from_backend_data(result)
+        response = DeepStrokeResponseDTO.from_backend_data(result)
+        # Se guarda en el historial del paciente sin esperar a la escritura en disco
+        history_store.record(id_paciente, "deepstroke", response.model_dump(), classification=response.nivel_riesgo)
+        return response
         
+    except HTTPException:
+        raise
+    except DialogServiceError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error en la predicción: {str(e)}")
 
+def _leer_lotes(archivo: UploadFile) -> Iterator[pd.DataFrame]:
+    """Lee un CSV o Parquet por lotes de FILAS_POR_LOTE filas, solo con las columnas necesarias"""
+    columnas = ['id_paciente', *COLUMNAS_SCORE_CLINICO]
+    nombre = (archivo.filename or "").lower()
+    if nombre.endswith((".parquet", ".pq")) or archivo.content_type == "application/vnd.apache.parquet":
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(archivo.file)
+        presentes = [c for c in columnas if c in parquet.schema_arrow.names]
+        for lote in parquet.iter_batches(batch_size=FILAS_POR_LOTE, columns=presentes):
+            yield lote.to_pandas()
+    else:
+        yield from pd.read_csv(
+            archivo.file,
+            usecols=lambda c: c in columnas,
+            chunksize=FILAS_POR_LOTE
+        )
+
+def _puntuar_lote(lote: pd.DataFrame) -> pd.DataFrame:
+    datos = {clave: lote[columna] for columna, clave in COLUMNAS_SCORE_CLINICO.items() if columna in lote}
+    resultado = pd.DataFrame({'score_clinico': calcular_score_clinico_vectorizado(datos)}, index=lote.index)
+    if 'id_paciente' in lote:
+        resultado.insert(0, 'id_paciente', lote['id_paciente'])
+    return resultado
+
+@router.post("/score-batch")
+def score_batch(
+    archivo: UploadFile = File(..., description="CSV o Parquet con una fila por paciente")
+):
+    """
+    Calcula el score clínico de una cohorte completa
+    
+    El archivo usa las columnas de /deepstroke/predict (genero, fumador_alguna_ocasion_basal,
+    hipertension_basal, diabetes_mellitus_tipo_2_basal, edad_basal, pas_basal, hdl_c_basal,
+    colesterol_total_basal, imc_basal) con valores 0/1 o booleanos, más un id_paciente opcional.
+    Las columnas ausentes o vacías toman el valor por defecto del score individual.
+    
+    **Retorna:**
+    - CSV (id_paciente, score_clinico) emitido por lotes a medida que se calcula; los
+      valores son idénticos a los del score clínico de /deepstroke/predict sin redondear
+    """
+    try:
+        lotes = _leer_lotes(archivo)
+        # El primer lote se procesa antes de responder para devolver 400 si el archivo no es válido
+        primero = next(lotes, None)
+        if primero is None or not any(columna in primero for columna in COLUMNAS_SCORE_CLINICO):
+            raise HTTPException(status_code=400, detail="El archivo no contiene columnas de datos clínicos")
+        primer_resultado = _puntuar_lote(primero)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"No se pudo leer el archivo: {str(e)}")
+
+    def generar_csv() -> Iterator[str]:
+        yield primer_resultado.to_csv(index=False)
+        for lote in lotes:
+            yield _puntuar_lote(lote).to_csv(index=False, header=False)
+
+    return StreamingResponse(
+        generar_csv(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=scores_clinicos.csv"}
+    )
+
+# Estado del modelo -> estado del servicio
+ESTADOS_SALUD = {
+    ModelState.READY: "healthy",
+    ModelState.DEGRADED: "degraded",
+    ModelState.FAILED: "unhealthy"
+}
+
 @router.get("/health")
-async def health_check():
-    """Verificar el estado del servicio DeepSTROKE"""
-    return {
-        "status": "healthy",
-        "service": "DeepSTROKE RETFound",
-        "description": "Servicio de análisis de fondo de ojo para predicción de riesgo de ACV"
-    } 
\ No newline at end of file
+async def health_check(lifecycle: ModelLifecycle = Depends(get_model_lifecycle)):
+    """
+    Verificar el estado del servicio DeepSTROKE
+    
+    **Retorna:**
+    - status: healthy, starting (cargando o calentando), degraded (pesos aleatorios) o unhealthy;
+      responde 503 salvo cuando es healthy
+    - model: estado de carga, origen de los pesos, latencia del calentamiento y cola de solicitudes
+    """
+    estado = lifecycle.model_state("deepstroke")
+    status = ESTADOS_SALUD.get(estado["status"], "starting")
+    return JSONResponse(
+        status_code=200 if status == "healthy" else 503,
+        content={
+            "status": status,
+            "service": "DeepSTROKE RETFound",
+            "description": "Servicio de análisis de fondo de ojo para predicción de riesgo de ACV",
+            "model": estado
+        }
+    )
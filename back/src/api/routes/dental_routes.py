@@ -1,28 +1,48 @@
 from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 from src.domain.dtos.lesion_evaluation_request import LesionEvaluationRequestDTO
 from src.domain.dtos.lesion_evaluation_response import LesionEvaluationResponseDTO
 from src.domain.interfaces.vision_classifier_service_interface import VisionClassifierServiceInterface
 from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
-from src.infrastructure.services.huggingface_dental_service import HuggingFaceDentalService
+from src.infrastructure.container import Container
 from src.infrastructure.services.gemini_service import GeminiService
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.api.admission import admission_slot
+from src.api.deadline import latency_budget
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.api.multi_image import read_images, stream_evaluations
+from src.infrastructure.services.micro_batcher import MicroBatcher
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
 
 router = APIRouter(prefix="/dental", tags=["Dental"])
 
-def get_vision_service() -> VisionClassifierServiceInterface:
-    """Dependency injection for the dental image classification service"""
-    return HuggingFaceDentalService()
+async def get_vision_service() -> AsyncIterator[VisionClassifierServiceInterface]:
+    """Dependency injection for the dental image classification service (active model version, leased for the request)"""
+    async with Container.model_registry().lease("dental") as service:
+        yield service
 
 def get_dialog_service() -> DialogSystemServiceInterface:
     """Dependency injection for the dental advice dialog system"""
     return GeminiService()
 
-@router.post("/evaluate", response_model=LesionEvaluationResponseDTO)
+def get_batcher() -> MicroBatcher:
+    """Dependency injection for the micro-batcher shared by the dental evaluations"""
+    return Container.dental_batcher()
+
+def get_history_store() -> EvaluationHistoryStore:
+    """Dependency injection for the evaluation history store"""
+    return Container.evaluation_history_store()
+
+@router.post("/evaluate", response_model=LesionEvaluationResponseDTO, dependencies=[Depends(admission_slot("dental"))])
 async def evaluate_dental_condition(
     image: UploadFile = File(..., description="Oral or dental image (e.g., X-ray, intraoral photo)"),
     description: Optional[str] = Form(None, description="Optional description of the patient’s symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
     vision_service: VisionClassifierServiceInterface = Depends(get_vision_service),
-    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service)
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("dental"))
 ) -> LesionEvaluationResponseDTO:
     """
     Evaluate an oral or dental condition using image classification and expert medical advice.
@@ -30,8 +50,11 @@ async def evaluate_dental_condition(
     Args:
         image: Image of the oral cavity or dental structure
         description: Optional patient-provided description or symptoms
+        patient_id: Optional patient identifier for the evaluation history
         vision_service: Dental image classification service
         dialog_service: Dialog system for expert dental guidance
+        history_store: Store the result is recorded in
+        deadline: Time by which the response is due; template advice is returned when Gemini is later
     
     Returns:
         LesionEvaluationResponseDTO: Dental condition and advice
@@ -40,39 +63,51 @@ async def evaluate_dental_condition(
         # Step 1: Classify the dental condition
         classification = await vision_service.classify_image(image, description)
         
-        system_prompt = """Eres un dentista experto. Basado en una clasificación preliminar de una posible condición dental u oral, 
-        brinda consejos profesionales, claros y útiles. Tu objetivo es orientar al paciente, pero siempre dejando en claro que este análisis es solo una guía inicial y no reemplaza una consulta médica.
-
-        Incluye en tu respuesta:
-        - Una recomendación clara de acudir al dentista u odontólogo, explicando por qué es importante una revisión presencial
-        - Posibles tratamientos que un profesional podría sugerir (como conducto, extracción, restauración), sin recetar medicamentos ni sugerir automedicación
-        - Síntomas comunes relacionados con la condición que podrían empeorar si no se atienden
-        - Consejos de prevención e higiene bucal para mantener una buena salud dental
-
-        Usa un tono amigable y sencillo, para que cualquier persona pueda entenderlo fácilmente. Limita tu respuesta a solo dos párrafos. Aclara que esta información es solo orientativa y no reemplaza el diagnóstico profesional.
-        """
-
-        user_prompt = f"""
-        Clasificación preliminar de la condición dental: {classification}
-
-        Descripción adicional del paciente: {description or 'No proporcionada'}
-
-        Por favor, brinda una orientación dental basada en esta información, recordando que no es un diagnóstico médico definitivo.
-        """
-        
-        medical_advice = await dialog_service.generate_response(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            context=f"Classification: {classification}"
+        prompt = prompt_registry.render(
+            "dental",
+            classification=classification,
+            description=description or 'No proporcionada'
+        )
+        medical_advice, advice_is_fallback = await generate_advice(
+            dialog_service, prompt, "dental", classification, deadline
         )
         
-        return LesionEvaluationResponseDTO(
+        response = LesionEvaluationResponseDTO(
             classification=classification,
-            medical_advice=medical_advice
+            medical_advice=medical_advice,
+            advice_is_fallback=advice_is_fallback
         )
+        history_store.record(patient_id, "dental", response.model_dump())
+        return response
         
+    except DialogServiceError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error evaluating dental condition: {str(e)}"
         )
+
+@router.post("/evaluate-batch", dependencies=[Depends(admission_slot("dental"))])
+async def evaluate_dental_batch(
+    images: List[UploadFile] = File(..., description="Oral or dental images (e.g., X-ray, intraoral photos)"),
+    description: Optional[str] = Form(None, description="Optional description of the patient’s symptoms"),
+    include_advice: bool = Form(True, description="Generate medical advice for each image"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    batcher: MicroBatcher = Depends(get_batcher),
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("dental"))
+):
+    """
+    Evaluate several oral or dental condition images in one request
+    
+    The images are classified concurrently in shared batches and each result is streamed
+    as an NDJSON line as soon as it is ready: index, filename, classification,
+    medical_advice and error (null unless that image failed).
+    """
+    files = await read_images(images)
+    return stream_evaluations(
+        "dental", files, description, "No proporcionada", batcher, dialog_service, include_advice,
+        history_store=history_store, patient_id=patient_id, deadline=deadline
+    )
@@ -4,9 +4,16 @@ import os
 from src.domain.dtos.lesion_evaluation_response import LesionEvaluationResponseDTO
 from src.infrastructure.container import Container
 from src.infrastructure.services.dermis_service import DermisService
-from io import BytesIO
+from src.infrastructure.services.image_preprocessing import open_image
 from src.infrastructure.services.gemini_service import GeminiService
 from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.domain.exceptions.dermis_unavailable_error import DermisUnavailableError
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.api.admission import admission_slot
+from src.api.deadline import latency_budget
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
 
 router = APIRouter(prefix="/dermis", tags=["Dermis"])
 
@@ -22,12 +29,19 @@ def get_dialog_service() -> DialogSystemServiceInterface:
     """
     return Container.gemini_service()
 
-@router.post("/evaluate", response_model=LesionEvaluationResponseDTO, tags=["Dermis"])
+def get_history_store() -> EvaluationHistoryStore:
+    """Dependency injection for the evaluation history store"""
+    return Container.evaluation_history_store()
+
+@router.post("/evaluate", response_model=LesionEvaluationResponseDTO, tags=["Dermis"], dependencies=[Depends(admission_slot("dermis"))])
 async def evaluate_dermis_condition(
     image: UploadFile = File(..., description="Dermatological image"),
     description: Optional[str] = Form(None, description="Optional description of the symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
     dermis_service: DermisService = Depends(get_dermis_service),
-    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service)
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("dermis"))
 ) -> LesionEvaluationResponseDTO:
     """
     Evaluates a dermatological condition using image classification and generates expert medical advice.
@@ -35,41 +49,34 @@ async def evaluate_dermis_condition(
     """
     try:
         image_bytes = await image.read()
-        classification_result = await dermis_service.classify_disease(BytesIO(image_bytes))
+        classification_result = await dermis_service.classify_disease(open_image(image_bytes))
         predicted_classes = classification_result.get("predicted_classes", [])
         if predicted_classes:
             classification = ", ".join(predicted_classes)
         else:
             classification = "No se detectó ninguna condición conocida. La imagen está limpia o el problema no está en nuestro dataset."
-        system_prompt = (
-            "Eres un dermatólogo experto. Siempre responde en español. "
-            "Solo puedes responder preguntas relacionadas con condiciones dermatológicas, piel, uñas o cabello. "
-            "Si la pregunta o el contexto no está relacionado con temas dermatológicos, rechaza la consulta educadamente diciendo: "
-            "'Lo siento, solo puedo responder preguntas relacionadas con dermatología, piel, uñas o cabello.'\n"
-            "Si recibes un diagnóstico, explica de manera clara y profesional en qué consiste la enfermedad o condición detectada, "
-            "cuáles son sus implicaciones, y qué puede hacer el paciente para aliviar, tratar o curar la enfermedad. "
-            "Incluye recomendaciones sobre:\n"
-            "- Si es necesario consultar a un especialista\n"
-            "- Posibles tratamientos\n"
-            "- Síntomas o señales de alerta que requieren atención urgente\n"
-            "- Medidas preventivas y consejos de cuidado de la piel\n"
-            "Sé profesional pero fácil de entender para un paciente no especialista."
+        prompt = prompt_registry.render(
+            "dermis",
+            classification=classification,
+            description=description or 'Not provided'
         )
-        user_prompt = f"""
-        Dermatological condition classification: {classification}
-        
-        Additional patient description: {description or 'Not provided'}
-        
-        Please provide medical advice based on this information.
-        """
-        medical_advice = await dialog_service.generate_response(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            context=f"Classification: {classification}"
+        medical_advice, advice_is_fallback = await generate_advice(
+            dialog_service, prompt, "dermis", classification, deadline
         )
-        return LesionEvaluationResponseDTO(
+        response = LesionEvaluationResponseDTO(
             classification=classification,
-            medical_advice=medical_advice
+            medical_advice=medical_advice,
+            advice_is_fallback=advice_is_fallback
+        )
+        history_store.record(patient_id, "dermis", response.model_dump())
+        return response
+    except DialogServiceError:
+        raise
+    except DermisUnavailableError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
         )
     except Exception as e:
         raise HTTPException(    
@@ -0,0 +1,135 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from src.api.security import require_admin_token
+from src.infrastructure.services.memory_diagnostics import MemoryDiagnostics, memory_diagnostics
+
+# Exposes allocation sites and internals of the process: administration only
+router = APIRouter(prefix="/diagnostics", tags=["Diagnostics"], dependencies=[Depends(require_admin_token)])
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+def get_memory_diagnostics() -> MemoryDiagnostics:
+    """Provides the process-wide MemoryDiagnostics for dependency injection"""
+    return memory_diagnostics
+
+def _check_group_by(group_by: str) -> None:
+    if group_by not in GROUP_BY:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by: {group_by}. Expected one of {', '.join(GROUP_BY)}")
+
+@router.get("/memory")
+async def get_memory(diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)):
+    """
+    RSS of the process and its growth per route and per stage (upload, decode, inference, advice)
+
+    Returns:
+        dict: Current and peak RSS, tracemalloc state, snapshots and per-route and per-stage counters
+    """
+    return await asyncio.to_thread(diagnostics.stats)
+
+@router.post("/memory/reset")
+async def reset_memory_counters(diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)):
+    """Start the per-route and per-stage counters from zero (for example before a load test)"""
+    diagnostics.reset()
+    return {"reset": True}
+
+@router.post("/memory/tracemalloc/start")
+async def start_tracemalloc(
+    frames: int = Query(10, ge=1, le=100, description="Stack frames stored per allocation"),
+    diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)
+):
+    """
+    Start tracing Python allocations; every allocation is slower while tracing
+
+    Returns:
+        dict: Tracing state
+    """
+    diagnostics.start_tracing(frames)
+    return {"tracing": True, "frames": frames}
+
+@router.post("/memory/tracemalloc/stop")
+async def stop_tracemalloc(diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)):
+    """Stop tracing Python allocations and discard the snapshots"""
+    diagnostics.stop_tracing()
+    return {"tracing": False}
+
+@router.post("/memory/snapshots")
+async def take_snapshot(
+    limit: int = Query(25, ge=1, le=500, description="Largest allocation sites returned"),
+    diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)
+):
+    """
+    Take a tracemalloc snapshot, to be compared with a later one
+
+    Returns:
+        dict: Snapshot identifier and its largest allocation sites; 409 if tracemalloc is not tracing
+    """
+    try:
+        snapshot_id = await asyncio.to_thread(diagnostics.take_snapshot)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    top = await asyncio.to_thread(diagnostics.top, snapshot_id, limit)
+    return {"id": snapshot_id, "top": top}
+
+@router.get("/memory/snapshots/{snapshot_id}")
+async def get_snapshot(
+    snapshot_id: int,
+    limit: int = Query(25, ge=1, le=500, description="Largest allocation sites returned"),
+    group_by: str = Query("lineno", description="lineno, filename or traceback"),
+    diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)
+):
+    """
+    Largest allocation sites of a snapshot
+
+    Returns:
+        dict: Snapshot identifier and allocation sites; 404 if the snapshot was discarded
+    """
+    _check_group_by(group_by)
+    try:
+        top = await asyncio.to_thread(diagnostics.top, snapshot_id, limit, group_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+    return {"id": snapshot_id, "top": top}
+
+@router.get("/memory/diff")
+async def diff_snapshots(
+    from_id: int = Query(..., description="Earlier snapshot"),
+    to_id: int = Query(..., description="Later snapshot"),
+    limit: int = Query(25, ge=1, le=500, description="Allocation sites returned"),
+    group_by: str = Query("lineno", description="lineno, filename or traceback"),
+    diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)
+):
+    """
+    Allocation sites that grew the most between two snapshots, the usual way to find a leak
+
+    Returns:
+        dict: Snapshot identifiers and allocation sites by decreasing growth; 404 if a snapshot was discarded
+    """
+    _check_group_by(group_by)
+    try:
+        diff = await asyncio.to_thread(diagnostics.diff, from_id, to_id, limit, group_by)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Snapshot {e.args[0]} not found")
+    return {"from_id": from_id, "to_id": to_id, "diff": diff}
+
+@router.get("/memory/tensors")
+async def get_tensor_stats(
+    limit: int = Query(20, ge=1, le=500, description="Largest tensor groups returned"),
+    diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)
+):
+    """
+    Live torch tensors grouped by device, dtype and shape (walks the whole heap)
+
+    Returns:
+        dict: Tensor count and size, model parameter size, largest groups and CUDA allocator stats
+    """
+    return await asyncio.to_thread(diagnostics.tensor_stats, limit)
+
+@router.post("/memory/trim")
+async def trim_memory(diagnostics: MemoryDiagnostics = Depends(get_memory_diagnostics)):
+    """
+    Collect garbage and return free heap pages to the OS
+
+    Returns:
+        dict: RSS before and after; a large drop means fragmentation rather than a leak
+    """
+    return await asyncio.to_thread(diagnostics.trim)
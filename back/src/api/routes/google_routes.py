@@ -1,32 +1,61 @@
-from fastapi import APIRouter, Query
-import requests
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-API_KEY = os.getenv("GOOGLE_API_KEY")
+import asyncio
+from fastapi import APIRouter, Query, Depends, File, Form, UploadFile, HTTPException
+from typing import Optional
+from src.api.security import require_admin_token
+from src.infrastructure.container import Container
+from src.infrastructure.services.clinic_spatial_index import ClinicSpatialIndex
+from src.infrastructure.services.geohash import haversine_m
+from src.infrastructure.services.places_clinic_service import PlacesClinicService
 
 router = APIRouter(prefix="/google", tags=["Maps"])
 
-@router.get("/clinicas_cercanas")
-def buscar_clinicas(lat: float = Query(...), lon: float = Query(...), radio: int = 3000):
-    url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    params = {
-        "location": f"{lat},{lon}",
-        "radius": radio,
-        "type": "hospital",
-        "key": API_KEY
-    }
+def get_places_clinic_service() -> PlacesClinicService:
+    """Provides the singleton instance of PlacesClinicService (shared cache and HTTP pool)"""
+    return Container.places_clinic_service()
 
-    response = requests.get(url, params=params)
-    data = response.json()
+def get_clinic_spatial_index() -> ClinicSpatialIndex:
+    """Provides the singleton index of the locally imported clinic dataset"""
+    return Container.clinic_spatial_index()
 
-    resultados = []
-    for lugar in data.get("results", []):
-        resultados.append({
-            "nombre": lugar["name"],
-            "direccion": lugar.get("vicinity"),
-            "ubicacion": lugar["geometry"]["location"]
-        })
+@router.get("/clinicas_cercanas")
+def buscar_clinicas(
+    lat: float = Query(...),
+    lon: float = Query(...),
+    radio: int = 3000,
+    k: Optional[int] = Query(None, ge=1, description="Devolver solo las k clínicas más cercanas dentro del radio"),
+    fuente: str = Query("auto", pattern="^(auto|local|places)$", description="auto: dataset local si hay uno importado, si no Google Places"),
+    places_service: PlacesClinicService = Depends(get_places_clinic_service),
+    clinic_index: ClinicSpatialIndex = Depends(get_clinic_spatial_index)
+):
+    if fuente == "local" or (fuente == "auto" and len(clinic_index) > 0):
+        if k is not None:
+            return clinic_index.nearest(lat, lon, k, radio)
+        return clinic_index.within_radius(lat, lon, radio)
 
+    resultados = places_service.search(lat, lon, radio)
+    if k is not None:
+        resultados = sorted(
+            resultados,
+            key=lambda lugar: haversine_m(lat, lon, lugar["ubicacion"]["lat"], lugar["ubicacion"]["lng"])
+        )[:k]
     return resultados
+
+@router.post("/clinicas/importar", dependencies=[Depends(require_admin_token)])
+async def importar_clinicas(
+    archivo: UploadFile = File(..., description="Dataset de clínicas en CSV o GeoJSON"),
+    reemplazar: bool = Form(False, description="Reemplazar el dataset actual en lugar de actualizarlo"),
+    clinic_index: ClinicSpatialIndex = Depends(get_clinic_spatial_index)
+):
+    """
+    Importa (o re-importa de forma incremental) el dataset local de clínicas.
+    Las clínicas se actualizan por id; con reemplazar=True se descarta el dataset anterior.
+    El parseo y la reconstrucción del KD-tree corren en un hilo, fuera del event loop.
+    """
+    contenido = await archivo.read()
+    try:
+        total = await asyncio.to_thread(
+            clinic_index.import_data, contenido, archivo.filename or "", replace=reemplazar
+        )
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Dataset de clínicas inválido: {str(e)}")
+    return {"clinicas": total}
@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from src.infrastructure.container import Container
+from src.infrastructure.services.model_lifecycle import ModelLifecycle
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+def get_model_lifecycle() -> ModelLifecycle:
+    """Provides the singleton instance of ModelLifecycle for dependency injection"""
+    return Container.model_lifecycle()
+
+@router.get("/live")
+async def liveness(lifecycle: ModelLifecycle = Depends(get_model_lifecycle)):
+    """
+    Liveness probe: the process is up and its event loop answers, whether or not models are loaded
+
+    Returns:
+        dict: Status and uptime
+    """
+    return {"status": "alive", "uptime_seconds": lifecycle.uptime_seconds()}
+
+@router.get("/ready")
+async def readiness(lifecycle: ModelLifecycle = Depends(get_model_lifecycle)):
+    """
+    Readiness probe: every model is loaded, warmed up and has real weights
+
+    Returns:
+        dict: Per-model load status, weight source, warm-up latency and queue depth;
+              503 until the instance can take traffic
+    """
+    state = lifecycle.readiness()
+    return JSONResponse(status_code=200 if lifecycle.is_ready() else 503, content=state)
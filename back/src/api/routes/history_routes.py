@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from src.api.security import require_admin_token
+from src.infrastructure.container import Container
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
+
+# Patient data: guarded like the other administration endpoints
+router = APIRouter(prefix="/history", tags=["History"], dependencies=[Depends(require_admin_token)])
+
+MODALITIES = ("lesion", "dental", "cough", "dermis", "skin", "deepstroke")
+
+def get_history_store() -> EvaluationHistoryStore:
+    """Provides the singleton instance of EvaluationHistoryStore for dependency injection"""
+    return Container.evaluation_history_store()
+
+def _check_modality(modality: Optional[str]) -> None:
+    if modality is not None and modality not in MODALITIES:
+        raise HTTPException(status_code=400, detail=f"Unknown modality: {modality}. Expected one of {', '.join(MODALITIES)}")
+
+@router.get("/{patient_id}")
+async def get_patient_history(
+    patient_id: str,
+    modality: Optional[str] = Query(None, description="Only this evaluation type"),
+    limit: int = Query(50, ge=1, le=500, description="Largest number of evaluations returned"),
+    before: Optional[float] = Query(None, description="Only evaluations created before this Unix timestamp (next page)"),
+    history_store: EvaluationHistoryStore = Depends(get_history_store)
+):
+    """
+    Stored evaluations of a patient, newest first, without running any model again
+
+    Returns:
+        dict: Patient identifier and evaluations (id, modality, classification, created_at, result)
+    """
+    _check_modality(modality)
+    evaluations = await history_store.history_async(patient_id, modality, limit, before)
+    return {"patient_id": patient_id, "evaluations": evaluations}
+
+@router.get("/{patient_id}/latest")
+async def get_latest_evaluations(
+    patient_id: str,
+    modality: Optional[str] = Query(None, description="Only this evaluation type"),
+    history_store: EvaluationHistoryStore = Depends(get_history_store)
+):
+    """
+    Latest stored evaluation of a patient for each modality
+
+    Returns:
+        dict: Patient identifier and latest evaluation by modality; 404 if there is none
+    """
+    _check_modality(modality)
+    latest = await history_store.latest_async(patient_id, modality)
+    if not latest:
+        raise HTTPException(status_code=404, detail=f"No evaluations found for patient {patient_id}")
+    return {"patient_id": patient_id, "latest": latest}
@@ -0,0 +1,208 @@
+import io
+from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
+from typing import Any, Awaitable, Callable, Optional
+from src.domain.dtos.job_response import JobResponseDTO
+from src.domain.exceptions.callback_url_error import CallbackUrlError
+from src.domain.exceptions.job_queue_full_error import JobQueueFullError
+from src.infrastructure.container import Container
+from src.infrastructure.services.job_service import JobService
+from src.api.routes import lesion_routes, dental_routes, cough_routes, dermis_routes, deepstroke_routes
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def get_job_service() -> JobService:
+    """Provides the singleton instance of JobService for dependency injection"""
+    return Container.job_service()
+
+async def _buffer_upload(upload: UploadFile) -> Callable[[], UploadFile]:
+    """
+    Read an upload while the request is still open.
+
+    The request body is gone once the submitting request returns, so the
+    content is kept in memory and a fresh UploadFile is built when the job runs.
+    """
+    content = await upload.read()
+    filename = upload.filename
+    headers = upload.headers
+
+    def rebuild() -> UploadFile:
+        return UploadFile(file=io.BytesIO(content), size=len(content), filename=filename, headers=headers)
+
+    return rebuild
+
+async def _submit(
+    job_service: JobService,
+    kind: str,
+    runner: Callable[[], Awaitable[Any]],
+    callback_url: Optional[str]
+) -> JobResponseDTO:
+    try:
+        job = await job_service.submit(kind, runner, callback_url)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except CallbackUrlError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JobResponseDTO(**job)
+
+@router.post("/lesion", response_model=JobResponseDTO, status_code=202)
+async def submit_lesion_job(
+    image: UploadFile = File(..., description="Dermatological lesion image"),
+    description: Optional[str] = Form(None, description="Optional description of the lesion"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    callback_url: Optional[str] = Form(None, description="URL to POST the finished job to"),
+    job_service: JobService = Depends(get_job_service)
+) -> JobResponseDTO:
+    """Queue a lesion evaluation (same result as POST /lesion/evaluate)"""
+    image_upload = await _buffer_upload(image)
+
+    async def runner():
+        async with Container.model_registry().lease("lesion") as vision_service:
+            return await lesion_routes.evaluate_lesion(
+                image=image_upload(),
+                description=description,
+                patient_id=patient_id,
+                vision_service=vision_service,
+                dialog_service=lesion_routes.get_dialog_service(),
+                history_store=lesion_routes.get_history_store(),
+                # No latency budget: the client polls the job, so Gemini's advice is always awaited
+                deadline=None
+            )
+
+    return await _submit(job_service, "lesion", runner, callback_url)
+
+@router.post("/dental", response_model=JobResponseDTO, status_code=202)
+async def submit_dental_job(
+    image: UploadFile = File(..., description="Oral or dental image (e.g., X-ray, intraoral photo)"),
+    description: Optional[str] = Form(None, description="Optional description of the patient’s symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    callback_url: Optional[str] = Form(None, description="URL to POST the finished job to"),
+    job_service: JobService = Depends(get_job_service)
+) -> JobResponseDTO:
+    """Queue a dental evaluation (same result as POST /dental/evaluate)"""
+    image_upload = await _buffer_upload(image)
+
+    async def runner():
+        async with Container.model_registry().lease("dental") as vision_service:
+            return await dental_routes.evaluate_dental_condition(
+                image=image_upload(),
+                description=description,
+                patient_id=patient_id,
+                vision_service=vision_service,
+                dialog_service=dental_routes.get_dialog_service(),
+                history_store=dental_routes.get_history_store(),
+                deadline=None
+            )
+
+    return await _submit(job_service, "dental", runner, callback_url)
+
+@router.post("/cough", response_model=JobResponseDTO, status_code=202)
+async def submit_cough_job(
+    audio: UploadFile = File(..., description="Cough Audio"),
+    description: Optional[str] = Form(None, description="Optional description of the cough symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    callback_url: Optional[str] = Form(None, description="URL to POST the finished job to"),
+    job_service: JobService = Depends(get_job_service)
+) -> JobResponseDTO:
+    """Queue a cough evaluation (same result as POST /cough/evaluate)"""
+    audio_upload = await _buffer_upload(audio)
+
+    async def runner():
+        async with Container.model_registry().lease("cough") as vision_service:
+            return await cough_routes.evaluate_cough(
+                audio=audio_upload(),
+                description=description,
+                patient_id=patient_id,
+                vision_service=vision_service,
+                dialog_service=cough_routes.get_dialog_service(),
+                history_store=cough_routes.get_history_store(),
+                deadline=None
+            )
+
+    return await _submit(job_service, "cough", runner, callback_url)
+
+@router.post("/dermis", response_model=JobResponseDTO, status_code=202)
+async def submit_dermis_job(
+    image: UploadFile = File(..., description="Dermatological image"),
+    description: Optional[str] = Form(None, description="Optional description of the symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    callback_url: Optional[str] = Form(None, description="URL to POST the finished job to"),
+    job_service: JobService = Depends(get_job_service)
+) -> JobResponseDTO:
+    """Queue a dermatological evaluation (same result as POST /dermis/evaluate)"""
+    image_upload = await _buffer_upload(image)
+
+    async def runner():
+        return await dermis_routes.evaluate_dermis_condition(
+            image=image_upload(),
+            description=description,
+            patient_id=patient_id,
+            dermis_service=dermis_routes.get_dermis_service(),
+            dialog_service=dermis_routes.get_dialog_service(),
+            history_store=dermis_routes.get_history_store(),
+            deadline=None
+        )
+
+    return await _submit(job_service, "dermis", runner, callback_url)
+
+@router.post("/deepstroke", response_model=JobResponseDTO, status_code=202)
+async def submit_deepstroke_job(
+    id_paciente: str = Form(..., description="ID único del paciente"),
+    genero: bool = Form(..., description="Género del paciente (True=Masculino, False=Femenino)"),
+    fumador_alguna_ocasion_basal: bool = Form(..., description="¿Ha fumado alguna vez? (True=Sí, False=No)"),
+    hipertension_basal: bool = Form(..., description="¿Tiene hipertensión? (True=Sí, False=No)"),
+    diabetes_mellitus_tipo_2_basal: bool = Form(..., description="¿Tiene diabetes tipo 2? (True=Sí, False=No)"),
+    edad_basal: int = Form(..., description="Edad del paciente (años)", ge=18, le=120),
+    pas_basal: float = Form(..., description="Presión arterial sistólica (mmHg)", ge=80, le=250),
+    hdl_c_basal: float = Form(..., description="HDL colesterol (mmol/L)", ge=0.1, le=10.0),
+    colesterol_total_basal: float = Form(..., description="Colesterol total (mmol/L)", ge=1.0, le=20.0),
+    imc_basal: float = Form(..., description="Índice de masa corporal (kg/m²)", ge=15.0, le=50.0),
+    ojo1: UploadFile = File(..., description="Imagen de fondo de ojo derecho"),
+    ojo2: UploadFile = File(..., description="Imagen de fondo de ojo izquierdo"),
+    callback_url: Optional[str] = Form(None, description="URL a la que se envía el job al terminar"),
+    job_service: JobService = Depends(get_job_service)
+) -> JobResponseDTO:
+    """Encola una predicción DeepSTROKE (mismo resultado que POST /deepstroke/predict)"""
+    ojo1_upload = await _buffer_upload(ojo1)
+    ojo2_upload = await _buffer_upload(ojo2)
+
+    async def runner():
+        async with Container.model_registry().lease("deepstroke") as deepstroke_service:
+            return await deepstroke_routes.predict_stroke_risk(
+                id_paciente=id_paciente,
+                genero=genero,
+                fumador_alguna_ocasion_basal=fumador_alguna_ocasion_basal,
+                hipertension_basal=hipertension_basal,
+                diabetes_mellitus_tipo_2_basal=diabetes_mellitus_tipo_2_basal,
+                edad_basal=edad_basal,
+                pas_basal=pas_basal,
+                hdl_c_basal=hdl_c_basal,
+                colesterol_total_basal=colesterol_total_basal,
+                imc_basal=imc_basal,
+                ojo1=ojo1_upload(),
+                ojo2=ojo2_upload(),
+                deepstroke_service=deepstroke_service,
+                history_store=deepstroke_routes.get_history_store(),
+                deadline=None
+            )
+
+    return await _submit(job_service, "deepstroke", runner, callback_url)
+
+@router.get("/{job_id}", response_model=JobResponseDTO)
+async def get_job(
+    job_id: str,
+    job_service: JobService = Depends(get_job_service)
+) -> JobResponseDTO:
+    """
+    Poll the state of a job
+
+    Args:
+        job_id: Job identifier returned on submission
+        job_service: Injected job service
+
+    Returns:
+        JobResponseDTO: Current job state, including the result once finished
+    """
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobResponseDTO(**job)
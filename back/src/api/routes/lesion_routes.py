@@ -1,28 +1,48 @@
 from fastapi import APIRouter, HTTPException, Depends, File, Form, UploadFile
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 from src.domain.dtos.lesion_evaluation_request import LesionEvaluationRequestDTO
 from src.domain.dtos.lesion_evaluation_response import LesionEvaluationResponseDTO
 from src.domain.interfaces.vision_classifier_service_interface import VisionClassifierServiceInterface
 from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
-from src.infrastructure.services.huggingface_vision_service import HuggingFaceVisionService
+from src.infrastructure.container import Container
 from src.infrastructure.services.gemini_service import GeminiService
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.api.admission import admission_slot
+from src.api.deadline import latency_budget
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.api.multi_image import read_images, stream_evaluations
+from src.infrastructure.services.micro_batcher import MicroBatcher
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
 
 router = APIRouter(prefix="/lesion", tags=["Lesion"])
 
-def get_vision_service() -> VisionClassifierServiceInterface:
-    """Dependency injection for the image classification service"""
-    return HuggingFaceVisionService()
+async def get_vision_service() -> AsyncIterator[VisionClassifierServiceInterface]:
+    """Dependency injection for the image classification service (active model version, leased for the request)"""
+    async with Container.model_registry().lease("lesion") as service:
+        yield service
 
 def get_dialog_service() -> DialogSystemServiceInterface:
     """Dependency injection for the dialog service"""
     return GeminiService()
 
-@router.post("/evaluate", response_model=LesionEvaluationResponseDTO)
+def get_batcher() -> MicroBatcher:
+    """Dependency injection for the micro-batcher shared by the lesion evaluations"""
+    return Container.lesion_batcher()
+
+def get_history_store() -> EvaluationHistoryStore:
+    """Dependency injection for the evaluation history store"""
+    return Container.evaluation_history_store()
+
+@router.post("/evaluate", response_model=LesionEvaluationResponseDTO, dependencies=[Depends(admission_slot("lesion"))])
 async def evaluate_lesion(
     image: UploadFile = File(..., description="Dermatological lesion image"),
     description: Optional[str] = Form(None, description="Optional description of the lesion"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
     vision_service: VisionClassifierServiceInterface = Depends(get_vision_service),
-    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service)
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("lesion"))
 ) -> LesionEvaluationResponseDTO:
     """
     Evaluate a dermatological lesion using image classification and medical advice
@@ -30,8 +50,11 @@ async def evaluate_lesion(
     Args:
         image: Lesion image
         description: Optional description of the lesion
+        patient_id: Optional patient identifier for the evaluation history
         vision_service: Image classification service
         dialog_service: Dialog service for medical advice
+        history_store: Store the result is recorded in
+        deadline: Time by which the response is due; template advice is returned when Gemini is later
         
     Returns:
         LesionEvaluationResponseDTO: Classification and medical advice
@@ -41,36 +64,51 @@ async def evaluate_lesion(
         classification = await vision_service.classify_image(image, description)
         
         # Step 2: Generate medical advice using Gemini
-        system_prompt = """You are an expert dermatologist. Based on the classification of a dermatological lesion, 
-        provide professional, clear and useful medical advice. Include recommendations on:
-        - Whether specialist consultation is necessary
-        - Possible treatments
-        - Warning signs to watch for
-        - Preventive measures
-        
-        Respond professionally but understandably for the patient."""
-        
-        user_prompt = f"""
-        Lesion classification: {classification}
-        
-        Additional patient description: {description or 'Not provided'}
-        
-        Please provide medical advice based on this information.
-        """
-        
-        medical_advice = await dialog_service.generate_response(
-            system_prompt=system_prompt,
-            user_prompt=user_prompt,
-            context=f"Classification: {classification}"
+        prompt = prompt_registry.render(
+            "lesion",
+            classification=classification,
+            description=description or 'Not provided'
+        )
+        medical_advice, advice_is_fallback = await generate_advice(
+            dialog_service, prompt, "lesion", classification, deadline
         )
         
-        return LesionEvaluationResponseDTO(
+        response = LesionEvaluationResponseDTO(
             classification=classification,
-            medical_advice=medical_advice
+            medical_advice=medical_advice,
+            advice_is_fallback=advice_is_fallback
         )
+        history_store.record(patient_id, "lesion", response.model_dump())
+        return response
         
+    except DialogServiceError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error evaluating lesion: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/evaluate-batch", dependencies=[Depends(admission_slot("lesion"))])
+async def evaluate_lesion_batch(
+    images: List[UploadFile] = File(..., description="Dermatological lesion images"),
+    description: Optional[str] = Form(None, description="Optional description shared by the lesions"),
+    include_advice: bool = Form(True, description="Generate medical advice for each image"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    batcher: MicroBatcher = Depends(get_batcher),
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("lesion"))
+):
+    """
+    Evaluate several dermatological lesion images in one request
+    
+    The images are classified concurrently in shared batches and each result is streamed
+    as an NDJSON line as soon as it is ready: index, filename, classification,
+    medical_advice and error (null unless that image failed).
+    """
+    files = await read_images(images)
+    return stream_evaluations(
+        "lesion", files, description, "Not provided", batcher, dialog_service, include_advice,
+        history_store=history_store, patient_id=patient_id, deadline=deadline
+    )
@@ -0,0 +1,74 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends
+from src.api.security import require_admin_token
+from src.domain.dtos.model_deploy_request import ModelDeployRequestDTO
+from src.infrastructure.container import Container
+from src.infrastructure.services.model_registry import ModelRegistry
+
+router = APIRouter(prefix="/models", tags=["Models"], dependencies=[Depends(require_admin_token)])
+
+def get_model_registry() -> ModelRegistry:
+    """Provides the singleton instance of ModelRegistry for dependency injection"""
+    return Container.model_registry()
+
+@router.get("")
+async def list_models(registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    Versions of every model: active version, versions still draining requests and shadow comparison
+
+    Returns:
+        dict: State of each model
+    """
+    return registry.stats()
+
+@router.get("/{model}")
+async def get_model(model: str, registry: ModelRegistry = Depends(get_model_registry)):
+    """
+    State of the versions of one model (lesion, dental, cough, deepstroke)
+
+    For a model served through a cascade, "cascade" reports the escalation rate to the
+    full model and the estimated latency saved by the first stage.
+    """
+    try:
+        stats = registry.model_stats(model)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+    cascade_stats = getattr(registry.loaded(model), "cascade_stats", None)
+    if cascade_stats is not None:
+        stats["cascade"] = await asyncio.to_thread(cascade_stats)
+    return stats
+
+@router.post("/{model}/versions", status_code=202)
+async def deploy_model_version(
+    model: str,
+    request: ModelDeployRequestDTO,
+    registry: ModelRegistry = Depends(get_model_registry)
+):
+    """
+    Load a new version of a model in the background.
+    With mode=active traffic switches to it atomically once it is warm, while requests
+    already running finish on the previous version. With mode=shadow it receives a copy
+    of sample_rate of the inferences, to compare latency and outputs before promoting it.
+    """
+    try:
+        return registry.deploy(model, request.source, request.version, request.mode, request.sample_rate)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/{model}/shadow/promote")
+async def promote_shadow(model: str, registry: ModelRegistry = Depends(get_model_registry)):
+    """Switch traffic to the shadow candidate of a model (already loaded and warm)"""
+    try:
+        return registry.promote_shadow(model)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"{model} has no shadow version")
+
+@router.delete("/{model}/shadow")
+async def stop_shadow(model: str, registry: ModelRegistry = Depends(get_model_registry)):
+    """Stop the shadow candidate of a model and return its final comparison"""
+    try:
+        return registry.stop_shadow(model)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"{model} has no shadow version")
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form
+from typing import Optional
+from src.domain.dtos.skin_evaluation_response import SkinEvaluationResponseDTO
+from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
+from src.infrastructure.container import Container
+from src.infrastructure.services.skin_evaluation_service import SkinEvaluationService
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.api.admission import admission_slot
+from src.api.deadline import latency_budget
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
+
+router = APIRouter(prefix="/skin", tags=["Skin"])
+
+def get_skin_evaluation_service() -> SkinEvaluationService:
+    """
+    Provides the singleton instance of SkinEvaluationService for dependency injection.
+    """
+    return Container.skin_evaluation_service()
+
+def get_dialog_service() -> DialogSystemServiceInterface:
+    """
+    Provides the singleton instance of GeminiService for dependency injection as a dialog system service.
+    """
+    return Container.gemini_service()
+
+def get_history_store() -> EvaluationHistoryStore:
+    """Dependency injection for the evaluation history store"""
+    return Container.evaluation_history_store()
+
+@router.post("/evaluate", response_model=SkinEvaluationResponseDTO, dependencies=[Depends(admission_slot("lesion"))])
+async def evaluate_skin(
+    image: UploadFile = File(..., description="Skin image"),
+    description: Optional[str] = Form(None, description="Optional description of the lesion or symptoms"),
+    patient_id: Optional[str] = Form(None, description="Optional patient identifier; the result is saved to their history"),
+    skin_service: SkinEvaluationService = Depends(get_skin_evaluation_service),
+    dialog_service: DialogSystemServiceInterface = Depends(get_dialog_service),
+    history_store: EvaluationHistoryStore = Depends(get_history_store),
+    deadline: Optional[float] = Depends(latency_budget("skin"))
+) -> SkinEvaluationResponseDTO:
+    """
+    Evaluates a skin photo with the lesion (Hugging Face) and dermatological (Roboflow) classifiers at once.
+    Replaces calling /lesion/evaluate and /dermis/evaluate back-to-back: the image is uploaded and decoded once,
+    both models run concurrently and a single medical advice covers both results.
+    """
+    try:
+        image_bytes = await image.read()
+        result = await skin_service.classify(image_bytes)
+        classification = result["classification"]
+        prompt = prompt_registry.render(
+            "skin",
+            classification=classification,
+            description=description or 'Not provided'
+        )
+        medical_advice, advice_is_fallback = await generate_advice(
+            dialog_service, prompt, "skin", classification, deadline
+        )
+        response = SkinEvaluationResponseDTO(
+            classification=classification,
+            lesion_classification=result["lesion_classification"],
+            dermis_classes=result["dermis_classes"],
+            medical_advice=medical_advice,
+            advice_is_fallback=advice_is_fallback
+        )
+        history_store.record(patient_id, "skin", response.model_dump())
+        return response
+    except DialogServiceError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error evaluating skin condition: {str(e)}"
+        )
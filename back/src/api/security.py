@@ -0,0 +1,23 @@
+import os
+import secrets
+from typing import Optional
+from fastapi import Header, HTTPException
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None, description="Administration token (ADMIN_TOKEN)")):
+    """
+    Dependency that protects administration endpoints.
+    The request must send the X-Admin-Token header with the value of ADMIN_TOKEN;
+    when ADMIN_TOKEN is not configured administration endpoints are disabled.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Administration endpoints are disabled (ADMIN_TOKEN is not configured)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, admin_token):
+        raise HTTPException(status_code=401, detail="Invalid administration token")
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """
+    Whether token is the configured ADMIN_TOKEN; always False when ADMIN_TOKEN is not configured.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    return bool(admin_token and token and secrets.compare_digest(token, admin_token))
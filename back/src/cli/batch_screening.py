@@ -0,0 +1,324 @@
+"""
+Cribado DeepSTROKE por lotes para cohortes completas de imágenes de fondo de ojo.
+
+Procesa un directorio de imágenes y un CSV de variables clínicas (una fila por
+id_paciente, con las columnas de /deepstroke/predict) sin pasar por la API: las
+imágenes se leen y decodifican en procesos paralelos, RETFound se ejecuta por
+lotes y los resultados se guardan en Parquet por partes, de modo que una
+ejecución interrumpida se reanuda donde quedó.
+
+Las imágenes de cada paciente se toman de las columnas ojo1 y ojo2 del CSV (rutas
+relativas al directorio) o, si no existen, de los archivos <id_paciente>_ojo1.* y
+<id_paciente>_ojo2.* del directorio.
+
+Las columnas binarias aceptan 1/0, true/false, sí/no (genero también masculino/
+femenino) y las numéricas deben estar en los rangos de /deepstroke/predict; una
+fila con valores vacíos o no válidos se guarda con su error, sin predicción. Al
+reanudar se vuelven a procesar los pacientes guardados con error (los de
+recomendaciones solo con --recomendaciones).
+
+Uso:
+    python -m src.cli.batch_screening --imagenes fondos/ --clinicos pacientes.csv --salida resultados/
+    python -m src.cli.batch_screening ... --batch-size 64 --workers 8 --recomendaciones
+
+El resultado se lee con pandas.read_parquet("resultados/").
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import torch
+from torch.utils.data import DataLoader, Dataset
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.infrastructure.services.deepstroke_service import (
+    COLUMNAS_SCORE_CLINICO,
+    DeepStrokeService,
+    calcular_score_clinico_vectorizado,
+    construir_resultado,
+    decodificar_imagen_fondo,
+    normalizar_imagenes_fondo
+)
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+COLUMNAS_BINARIAS = ['genero', 'fumador_alguna_ocasion_basal', 'hipertension_basal', 'diabetes_mellitus_tipo_2_basal']
+VALORES_BOOLEANOS = {
+    '1': 1, '1.0': 1, 'true': 1, 'verdadero': 1, 'si': 1, 'sí': 1, 'yes': 1,
+    '0': 0, '0.0': 0, 'false': 0, 'falso': 0, 'no': 0
+}
+# genero: True=Masculino, como en DeepStrokeRequestDTO
+VALORES_GENERO = {**VALORES_BOOLEANOS, 'masculino': 1, 'hombre': 1, 'femenino': 0, 'mujer': 0}
+# Mismos rangos que DeepStrokeRequestDTO
+RANGOS_NUMERICOS = {
+    'edad_basal': (18, 120),
+    'pas_basal': (80, 250),
+    'hdl_c_basal': (0.1, 10.0),
+    'colesterol_total_basal': (1.0, 20.0),
+    'imc_basal': (15.0, 50.0)
+}
+PREFIJO_ERROR_RECOMENDACIONES = "recomendaciones:"
+# Esquema fijo de las partes Parquet: una parte solo con errores debe poder leerse junto a las demás
+TIPOS_RESULTADO = {
+    'id_paciente': 'string',
+    'probabilidad_acv': 'float64',
+    'score_clinico': 'float64',
+    'score_modelo': 'float64',
+    'nivel_riesgo': 'string',
+    'riesgo_alto': 'boolean',
+    'recomendacion': 'string',
+    **{columna: 'Int64' for columna in COLUMNAS_BINARIAS},
+    'edad_basal': 'Int64',
+    'pas_basal': 'float64',
+    'hdl_c_basal': 'float64',
+    'colesterol_total_basal': 'float64',
+    'imc_basal': 'float64',
+    'recomendaciones_medicas': 'string',
+    'error': 'string'
+}
+
+class FondoOjoDataset(Dataset):
+    """
+    Pares de imágenes de fondo de ojo; la lectura, el hash del contenido, la
+    decodificación y el redimensionado ocurren en los workers del DataLoader, que
+    devuelven buffers uint8 (4 veces menos datos entre procesos que float32)
+    """
+
+    def __init__(self, pares: List[Tuple[int, Optional[str], Optional[str]]]):
+        self.pares = pares
+
+    def __len__(self) -> int:
+        return len(self.pares)
+
+    def __getitem__(self, indice: int):
+        posicion, ruta1, ruta2 = self.pares[indice]
+        try:
+            if ruta1 is None or ruta2 is None:
+                raise FileNotFoundError("imagen de fondo de ojo no encontrada")
+            with open(ruta1, "rb") as f:
+                contenido1 = f.read()
+            with open(ruta2, "rb") as f:
+                contenido2 = f.read()
+            return (
+                posicion,
+                torch.from_numpy(decodificar_imagen_fondo(contenido1)),
+                torch.from_numpy(decodificar_imagen_fondo(contenido2)),
+                hashlib.sha256(contenido1).hexdigest(),
+                hashlib.sha256(contenido2).hexdigest(),
+                ""
+            )
+        except Exception as e:
+            # El paciente se registra con su error en lugar de detener el lote
+            vacio = torch.zeros(224, 224, 3, dtype=torch.uint8)
+            return posicion, vacio, vacio, "", "", f"{type(e).__name__}: {e}"
+
+def _iniciar_worker(_: int) -> None:
+    # Cada worker decodifica una imagen a la vez; evita sobresuscribir la CPU con hilos de torch
+    torch.set_num_threads(1)
+
+def _indexar_imagenes(directorio: str) -> Dict[str, str]:
+    """Nombre sin extensión (en minúsculas) -> ruta de cada imagen del directorio"""
+    indice = {}
+    for raiz, _, archivos in os.walk(directorio):
+        for archivo in archivos:
+            nombre, extension = os.path.splitext(archivo)
+            if extension.lower() in EXTENSIONES_IMAGEN:
+                indice[nombre.lower()] = os.path.join(raiz, archivo)
+    return indice
+
+def _texto(valor) -> str:
+    return "vacío" if pd.isna(valor) else repr(valor)
+
+def _cargar_clinicos(ruta: str) -> pd.DataFrame:
+    """
+    Lee y valida el CSV clínico. Los valores se convierten al formato del backend
+    (0/1, como DeepStrokeRequestDTO.to_backend_format); los vacíos o no válidos quedan
+    como NA y la columna error describe los problemas de cada fila
+    """
+    clinicos = pd.read_csv(ruta, dtype=str)
+    faltantes = [c for c in ['id_paciente', *COLUMNAS_SCORE_CLINICO] if c not in clinicos.columns]
+    if faltantes:
+        raise SystemExit(f"Faltan columnas en {ruta}: {', '.join(faltantes)}")
+    if clinicos['id_paciente'].duplicated().any():
+        raise SystemExit(f"{ruta} tiene id_paciente repetidos")
+
+    problemas = {i: [] for i in clinicos.index}
+    for columna in COLUMNAS_BINARIAS:
+        permitidos = VALORES_GENERO if columna == 'genero' else VALORES_BOOLEANOS
+        valores = clinicos[columna].map(
+            lambda v: permitidos.get(v.strip().lower()) if isinstance(v, str) else None
+        )
+        for i in clinicos.index[valores.isna()]:
+            problemas[i].append(f"{columna}={_texto(clinicos.at[i, columna])} no es verdadero/falso")
+        clinicos[columna] = valores.astype('Int64')
+    for columna, (minimo, maximo) in RANGOS_NUMERICOS.items():
+        valores = pd.to_numeric(clinicos[columna], errors='coerce')
+        invalidos = ~valores.between(minimo, maximo)
+        for i in clinicos.index[invalidos]:
+            problemas[i].append(f"{columna}={_texto(clinicos.at[i, columna])} fuera de [{minimo}, {maximo}]")
+        if columna == 'edad_basal':
+            decimales = ~invalidos & (valores % 1 != 0)
+            for i in clinicos.index[decimales]:
+                problemas[i].append(f"{columna}={_texto(clinicos.at[i, columna])} no es un número entero")
+            invalidos |= decimales
+        valores[invalidos] = float('nan')
+        clinicos[columna] = valores.astype('Int64') if columna == 'edad_basal' else valores
+
+    clinicos['error'] = pd.Series(
+        {i: f"datos clínicos no válidos: {'; '.join(p)}" if p else None for i, p in problemas.items()},
+        dtype=object
+    )
+    return clinicos
+
+def _escribir_parte(ruta: str, resultados: pd.DataFrame) -> None:
+    temporal = ruta + ".tmp"
+    resultados.astype(TIPOS_RESULTADO).to_parquet(temporal, index=False)
+    # El reemplazo atómico garantiza que una parte existe completa o no existe
+    os.replace(temporal, ruta)
+
+def _ids_procesados(salida: str, reintentar_recomendaciones: bool) -> Tuple[set, int]:
+    """
+    Pacientes ya guardados en partes anteriores y número de la siguiente parte.
+
+    Los pacientes guardados con error se quitan de su parte para procesarlos de
+    nuevo; los que solo fallaron en las recomendaciones, si reintentar_recomendaciones
+    """
+    partes = sorted(glob.glob(os.path.join(salida, "parte-*.parquet")))
+    procesados = set()
+    for parte in partes:
+        guardados = pd.read_parquet(parte, columns=['id_paciente', 'error'])
+        fallidos = guardados['error'].notna()
+        if not reintentar_recomendaciones:
+            fallidos &= ~guardados['error'].str.startswith(PREFIJO_ERROR_RECOMENDACIONES, na=False)
+        if fallidos.any():
+            # La parte sigue existiendo (aunque quede vacía) para no alterar la numeración
+            _escribir_parte(parte, pd.read_parquet(parte)[~fallidos.to_numpy()])
+        procesados.update(guardados.loc[~fallidos, 'id_paciente'])
+    return procesados, len(partes)
+
+def _guardar_parte(salida: str, numero: int, resultados: List[Dict]) -> None:
+    ruta = os.path.join(salida, f"parte-{numero:05d}.parquet")
+    _escribir_parte(ruta, pd.DataFrame(resultados, columns=list(TIPOS_RESULTADO)))
+
+async def _agregar_recomendaciones(servicio: DeepStrokeService, resultados: List[Dict]) -> None:
+    """Genera las recomendaciones de Gemini de una parte; el dispatcher limita concurrencia y cuota"""
+    async def generar(resultado: Dict) -> None:
+        try:
+            resultado['recomendaciones_medicas'], _ = await servicio.generate_medical_recommendations(resultado)
+        except DialogServiceError as e:
+            resultado['error'] = f"{PREFIJO_ERROR_RECOMENDACIONES} {e.code}: {e.message}"
+
+    await asyncio.gather(*(generar(r) for r in resultados if not r['error']))
+
+def ejecutar(args: argparse.Namespace) -> None:
+    os.makedirs(args.salida, exist_ok=True)
+    clinicos = _cargar_clinicos(args.clinicos)
+    procesados, numero_parte = _ids_procesados(args.salida, args.recomendaciones)
+    pendientes = clinicos[~clinicos['id_paciente'].isin(procesados)].reset_index(drop=True)
+    invalidos = pendientes['error'].notna()
+    print(
+        f"{len(clinicos)} pacientes, {len(procesados)} ya procesados, {len(pendientes)} pendientes "
+        f"({int(invalidos.sum())} con datos clínicos no válidos)"
+    )
+    if pendientes.empty:
+        return
+
+    # Las filas no válidas no se usan; sus NA toman el valor por defecto del score
+    scores = calcular_score_clinico_vectorizado(
+        {clave: pendientes[columna].astype('float64') for columna, clave in COLUMNAS_SCORE_CLINICO.items()}
+    )
+    columnas = ['id_paciente', *COLUMNAS_SCORE_CLINICO]
+
+    def datos(posicion: int) -> Dict:
+        data = {columna: pendientes.at[posicion, columna] for columna in columnas}
+        return {k: v.item() if hasattr(v, "item") else v for k, v in data.items()}
+
+    # Las filas con datos clínicos no válidos se guardan con su error, sin leer sus imágenes
+    resultados: List[Dict] = [
+        {**datos(posicion), 'recomendaciones_medicas': None, 'error': pendientes.at[posicion, 'error']}
+        for posicion in pendientes.index[invalidos]
+    ]
+
+    indice = _indexar_imagenes(args.imagenes)
+    pares = []
+    for posicion, fila in pendientes[~invalidos].iterrows():
+        if 'ojo1' in pendientes.columns and 'ojo2' in pendientes.columns:
+            ruta1 = os.path.join(args.imagenes, fila['ojo1']) if isinstance(fila['ojo1'], str) else None
+            ruta2 = os.path.join(args.imagenes, fila['ojo2']) if isinstance(fila['ojo2'], str) else None
+        else:
+            ruta1 = indice.get(f"{fila['id_paciente']}_ojo1".lower())
+            ruta2 = indice.get(f"{fila['id_paciente']}_ojo2".lower())
+        pares.append((posicion, ruta1, ruta2))
+
+    cargador = DataLoader(
+        FondoOjoDataset(pares),
+        batch_size=args.batch_size,
+        num_workers=args.workers,
+        pin_memory=torch.cuda.is_available(),
+        worker_init_fn=_iniciar_worker if args.workers > 0 else None
+    )
+    servicio = DeepStrokeService()
+    bucle = asyncio.new_event_loop() if args.recomendaciones else None
+
+    completados = 0
+    inicio = time.monotonic()
+    try:
+        for posiciones, ojos1, ojos2, hashes1, hashes2, errores in cargador:
+            validos = [i for i, error in enumerate(errores) if not error]
+            probabilidades = [None] * len(errores)
+            if validos:
+                # Las imágenes ya vistas (misma huella y versión del modelo) no pasan por RETFound
+                vectores = servicio.embeddings_from_tensors(
+                    [hashes1[i] for i in validos] + [hashes2[i] for i in validos],
+                    # Escalado y normalización de todo el lote en una sola operación vectorizada
+                    normalizar_imagenes_fondo(torch.cat([ojos1[validos], ojos2[validos]]).numpy())
+                )
+                for i, probabilidad in zip(validos, servicio.probabilities_from_embeddings(
+                    vectores[:len(validos)], vectores[len(validos):]
+                ).tolist()):
+                    probabilidades[i] = probabilidad
+            for posicion, probabilidad, error in zip(posiciones.tolist(), probabilidades, errores):
+                data = datos(posicion)
+                if error:
+                    resultado = {**data, 'error': error}
+                else:
+                    resultado = {**construir_resultado(data, float(scores[posicion]), probabilidad), 'error': None}
+                resultado['recomendaciones_medicas'] = None
+                resultados.append(resultado)
+
+            if len(resultados) >= args.checkpoint:
+                if bucle is not None:
+                    bucle.run_until_complete(_agregar_recomendaciones(servicio, resultados))
+                _guardar_parte(args.salida, numero_parte, resultados)
+                numero_parte += 1
+                completados += len(resultados)
+                resultados = []
+                velocidad = completados / (time.monotonic() - inicio)
+                print(f"{completados}/{len(pendientes)} pacientes ({velocidad:.1f} pacientes/s)")
+
+        if resultados:
+            if bucle is not None:
+                bucle.run_until_complete(_agregar_recomendaciones(servicio, resultados))
+            _guardar_parte(args.salida, numero_parte, resultados)
+            completados += len(resultados)
+    finally:
+        if bucle is not None:
+            bucle.close()
+
+    print(f"Listo: {completados} pacientes en {time.monotonic() - inicio:.1f}s -> {args.salida}")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Cribado DeepSTROKE por lotes de una cohorte de imágenes de fondo de ojo")
+    parser.add_argument("--imagenes", required=True, help="Directorio con las imágenes de fondo de ojo")
+    parser.add_argument("--clinicos", required=True, help="CSV con las variables clínicas, una fila por id_paciente")
+    parser.add_argument("--salida", required=True, help="Directorio de salida de las partes Parquet (permite reanudar)")
+    parser.add_argument("--batch-size", type=int, default=32, help="Pacientes por forward de RETFound (default 32)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1), help="Procesos de lectura y decodificación de imágenes")
+    parser.add_argument("--checkpoint", type=int, default=1024, help="Pacientes por parte Parquet guardada (default 1024)")
+    parser.add_argument("--recomendaciones", action="store_true", help="Generar recomendaciones médicas con Gemini (requiere GEMINI_API_KEY)")
+    ejecutar(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmark of the inference profiles, with an accuracy-parity check.
+
+Loads each model twice, with the default profile (eager, torch.no_grad) and with
+the optimized one (inference_mode, channels-last, Conv-BN folding in RETFound,
+torch.compile and, where supported, bfloat16 autocast); the optimized RETFound
+gets the weights of the default one, so both run the same network even without
+a checkpoint. Then:
+
+- times both on the same preprocessed batches (median latency and throughput per
+  batch size, after a few untimed runs);
+- compares their outputs on every image: largest and mean absolute probability
+  difference and top-1 agreement (for DeepSTROKE, of the 0.5 threshold on the
+  stroke probability).
+
+The run fails (exit code 1) when a model's largest probability difference exceeds
+the tolerance (--tolerance, default 1e-4 in float32 and 2e-2 under bfloat16).
+Images come from --images or are synthetic; the lesion cascade is not used.
+
+Usage:
+    python -m src.cli.benchmark_profiles
+    python -m src.cli.benchmark_profiles --models lesion deepstroke --batch-sizes 1 16 --bf16 false
+    python -m src.cli.benchmark_profiles --lesion-model ./vit --images samples/ --json benchmark.json
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+import torch
+from PIL import Image
+from src.domain.weights import RETFOUND_WEIGHTS_PATH
+from src.infrastructure.services.inference_profile import InferenceProfile
+from src.infrastructure.services.huggingface_vision_service import HuggingFaceVisionService
+from src.infrastructure.services.huggingface_dental_service import HuggingFaceDentalService
+from src.infrastructure.services.deepstroke_service import (
+    DeepStrokeService,
+    decodificar_imagen_fondo,
+    normalizar_imagenes_fondo
+)
+
+MODELS = ("lesion", "dental", "deepstroke")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff")
+
+def load_images(directory: Optional[str], count: int, seed: int) -> List[bytes]:
+    """Encoded images of the directory, or count PNG images of uniform noise"""
+    if directory:
+        paths = sorted(
+            path for path in glob.glob(os.path.join(directory, "*"))
+            if path.lower().endswith(IMAGE_EXTENSIONS)
+        )[:count]
+        if not paths:
+            raise SystemExit(f"No images found in {directory}")
+        contents = []
+        for path in paths:
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        return contents
+    rng = np.random.default_rng(seed)
+    contents = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 256, (256, 256, 3), dtype=np.uint8)).save(buffer, format="PNG")
+        contents.append(buffer.getvalue())
+    return contents
+
+def build(model: str, profile: InferenceProfile, args: argparse.Namespace, baseline=None):
+    """
+    Service of a model with the given profile, and the function of a batch to its probabilities.
+    A DeepSTROKE service built with a baseline gets the baseline's RETFound weights, so both
+    profiles run the same network even when there is no checkpoint (random weights).
+    """
+    if model == "deepstroke":
+        if baseline is None:
+            service = DeepStrokeService(args.retfound_weights, inference_profile=profile)
+        else:
+            with tempfile.TemporaryDirectory() as directory:
+                weights_path = os.path.join(directory, "retfound.pth")
+                torch.save(baseline._model.state_dict(), weights_path)
+                service = DeepStrokeService(weights_path, inference_profile=profile)
+        # Both eyes of a patient: the batch and the same images in reverse order
+        return service, lambda images: service.predict_probabilities(images, images.flip(0))
+    if model == "lesion":
+        service = HuggingFaceVisionService(args.lesion_model, inference_profile=profile)
+        # The profile applies to the full model: time it without the first stage
+        service.cascade = None
+    else:
+        service = HuggingFaceDentalService(args.dental_model, inference_profile=profile)
+    return service, service.probabilities
+
+def preprocess(model: str, service, contents: List[bytes]) -> torch.Tensor:
+    """Model input (N, 3, height, width) of the encoded images"""
+    if model == "deepstroke":
+        return normalizar_imagenes_fondo(np.stack([decodificar_imagen_fondo(contenido) for contenido in contents]))
+    images = [Image.open(io.BytesIO(content)).convert("RGB") for content in contents]
+    return service.pixel_values(images)
+
+def batch_of(inputs: torch.Tensor, size: int) -> torch.Tensor:
+    """First size inputs, repeated when there are fewer"""
+    repeats = -(-size // len(inputs))
+    return inputs.repeat(repeats, 1, 1, 1)[:size].contiguous()
+
+def time_runs(run: Callable[[torch.Tensor], torch.Tensor], batch: torch.Tensor, warmup: int, iterations: int) -> List[float]:
+    for _ in range(warmup):
+        run(batch)
+    seconds = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run(batch)
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+def parity(baseline: torch.Tensor, optimized: torch.Tensor) -> Dict[str, float]:
+    """Largest and mean absolute difference of the probabilities and top-1 agreement"""
+    difference = (baseline - optimized).abs()
+    if baseline.dim() == 1:
+        agreement = ((baseline >= 0.5) == (optimized >= 0.5)).float().mean()
+    else:
+        agreement = (baseline.argmax(dim=-1) == optimized.argmax(dim=-1)).float().mean()
+    return {
+        "max_abs_diff": float(difference.max()),
+        "mean_abs_diff": float(difference.mean()),
+        "top1_agreement": float(agreement)
+    }
+
+def benchmark(model: str, args: argparse.Namespace, contents: List[bytes]) -> Dict[str, Any]:
+    device = DeepStrokeService._device if model == "deepstroke" else "cpu"
+    profiles = {
+        "default": InferenceProfile("default", device=device),
+        "optimized": InferenceProfile("optimized", bf16=args.bf16, compile=not args.no_compile, device=device)
+    }
+    result: Dict[str, Any] = {"model": model, "profiles": {}, "latency": []}
+    runs, outputs = {}, {}
+    inputs = baseline = None
+    for name, profile in profiles.items():
+        start = time.perf_counter()
+        service, run = build(model, profile, args, baseline)
+        load_seconds = time.perf_counter() - start
+        if baseline is None:
+            baseline = service
+            inputs = preprocess(model, service, contents)
+        # Parity over every image, in batches of the largest size
+        size = max(args.batch_sizes)
+        outputs[name] = torch.cat([run(inputs[i:i + size]) for i in range(0, len(inputs), size)])
+        runs[name] = run
+        result["profiles"][name] = {**profile.describe(), "load_seconds": round(load_seconds, 2)}
+
+    for batch_size in args.batch_sizes:
+        batch = batch_of(inputs, batch_size)
+        row = {"batch_size": batch_size}
+        for name, run in runs.items():
+            median = statistics.median(time_runs(run, batch, args.warmup, args.iterations))
+            row[f"{name}_ms"] = round(1000 * median, 3)
+            row[f"{name}_per_second"] = round(batch_size / median, 1)
+        row["speedup"] = round(row["default_ms"] / row["optimized_ms"], 2)
+        result["latency"].append(row)
+
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = 2e-2 if profiles["optimized"].bf16 else 1e-4
+    result["parity"] = {**parity(outputs["default"], outputs["optimized"]), "images": len(inputs), "tolerance": tolerance}
+    result["parity"]["passed"] = result["parity"]["max_abs_diff"] <= tolerance
+    return result
+
+def report(result: Dict[str, Any]) -> None:
+    optimized = result["profiles"]["optimized"]
+    print(f"\n{result['model']}: optimized profile with bf16_autocast={optimized['bf16_autocast']}, "
+          f"compiled={optimized['compiled'] or 'nothing'} in {optimized['compile_seconds']}s")
+    print(f"{'batch':>6} {'default ms':>11} {'optimized ms':>13} {'default/s':>10} {'optimized/s':>12} {'speedup':>8}")
+    for row in result["latency"]:
+        print(f"{row['batch_size']:>6} {row['default_ms']:>11.2f} {row['optimized_ms']:>13.2f} "
+              f"{row['default_per_second']:>10.1f} {row['optimized_per_second']:>12.1f} {row['speedup']:>7.2f}x")
+    check = result["parity"]
+    print(f"parity on {check['images']} images: max |dp| {check['max_abs_diff']:.2e}, mean |dp| {check['mean_abs_diff']:.2e}, "
+          f"top-1 agreement {check['top1_agreement']:.1%} -> {'PASS' if check['passed'] else 'FAIL'} (tolerance {check['tolerance']:.0e})")
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Latency and accuracy parity of the default and optimized inference profiles")
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS), help="Models to benchmark (default all)")
+    parser.add_argument("--lesion-model", default="Anwarkh1/Skin_Cancer-Image_Classification", help="Hugging Face name or directory of the lesion model")
+    parser.add_argument("--dental-model", default="vishnu027/dental_classification_model_010424", help="Hugging Face name or directory of the dental model")
+    parser.add_argument("--retfound-weights", default=RETFOUND_WEIGHTS_PATH, help="RETFound checkpoint (random weights if missing)")
+    parser.add_argument("--images", help="Directory of images for the parity check and the timed batches (default synthetic noise)")
+    parser.add_argument("--count", type=int, default=64, help="Images used at most (default 64)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32], help="Timed batch sizes (default 1 8 32)")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed runs per batch size (default 20)")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed runs before timing (default 3)")
+    parser.add_argument("--bf16", choices=("auto", "true", "false"), default="auto", help="bfloat16 autocast of the optimized profile (default auto)")
+    parser.add_argument("--no-compile", action="store_true", help="Optimized profile without torch.compile")
+    parser.add_argument("--tolerance", type=float, help="Largest accepted probability difference (default 1e-4, 2e-2 under bfloat16)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic images")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # The benchmark never writes feature vectors to the shared cache
+    os.environ["FUNDUS_EMBEDDINGS_PATH"] = ""
+    contents = load_images(args.images, args.count, args.seed)
+    print(f"{len(contents)} images, {torch.get_num_threads()} torch threads")
+    results = []
+    for model in args.models:
+        result = benchmark(model, args, contents)
+        report(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if not all(result["parity"]["passed"] for result in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
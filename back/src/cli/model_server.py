@@ -0,0 +1,63 @@
+"""
+Model server: one model served to the API gateways over the network.
+
+With MODEL_SERVING_MODE=remote the API process holds no model and forwards every
+inference to model servers like this one, listed per model in
+MODEL_REMOTE_<MODEL>_URLS. Each model scales on its own: run as many servers of a
+model as its load needs, on the nodes that suit it, behind one DNS name or listed
+one by one. The model is loaded and warmed up before the server listens; on SIGTERM
+or SIGINT it reports itself as draining, finishes the calls in progress and exits.
+
+Usage:
+    python -m src.cli.model_server --model lesion --port 9101
+    MODEL_RPC_TOKEN=... python -m src.cli.model_server --model lesion --host 0.0.0.0 --port 9101
+    python -m src.cli.model_server --model deepstroke --source weights/retfound_v2.pth --threads 8
+"""
+import argparse
+import os
+import signal
+import threading
+from typing import List, Optional
+from dotenv import load_dotenv
+from src.infrastructure.services.model_server import SERVED_MODELS, ModelServer
+
+def main(argv: Optional[List[str]] = None) -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve one model to the API gateways (MODEL_SERVING_MODE=remote)")
+    parser.add_argument("--model", required=True, choices=tuple(SERVED_MODELS), help="Model to serve")
+    parser.add_argument("--source", help="Hugging Face model name or weights path (default the model's own default)")
+    parser.add_argument(
+        "--host",
+        default=os.getenv("MODEL_SERVER_HOST", "127.0.0.1"),
+        help="Address to listen on (default 127.0.0.1); other addresses require MODEL_RPC_TOKEN"
+    )
+    parser.add_argument("--port", type=int, default=int(os.getenv("MODEL_SERVER_PORT", "9100")), help="Port to listen on (default 9100)")
+    parser.add_argument("--threads", type=int, help="torch/BLAS threads (default all the CPUs of the node)")
+    parser.add_argument("--concurrency", type=int, help="Calls running the model at once (default MODEL_SERVER_CONCURRENCY or 1)")
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        import torch
+        from threadpoolctl import threadpool_limits
+        torch.set_num_threads(args.threads)
+        threadpool_limits(args.threads)
+
+    try:
+        server = ModelServer(args.model, args.source, args.host, args.port, args.concurrency)
+    except ValueError as e:
+        parser.error(str(e))
+    server.load_service()
+    server.listen()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    listener = threading.Thread(target=server.serve_forever, name="model-server", daemon=True)
+    listener.start()
+    while not stopping.wait(1.0) and listener.is_alive():
+        pass
+    print(f"Model server {args.model} draining")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class ChatMessageRequestDTO(BaseModel):
+    """DTO for a new user message in a chat session"""
+    
+    message: str = Field(..., min_length=1, description="User's message; only this turn is sent, the history is kept by the server")
+    max_output_tokens: Optional[int] = Field(None, ge=1, description="Optional cap on the length of the response")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "message": "And what is its population?",
+                "max_output_tokens": None
+            }
+        }
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+
+class ChatMessageResponseDTO(BaseModel):
+    """DTO for the model's answer to a chat session message"""
+    
+    session_id: str = Field(..., description="Chat session identifier")
+    response: str = Field(..., description="Response generated by the model")
+    turns: int = Field(..., description="Messages of the session answered so far")
+    history_tokens: int = Field(..., description="Estimated tokens of history sent with the next message")
+    summarized: bool = Field(..., description="Whether older turns are carried as a summary")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_id": "kq3X9v0bR2m8yT1cZ7wLfA",
+                "response": "Paris has about 2.1 million inhabitants.",
+                "turns": 2,
+                "history_tokens": 58,
+                "summarized": False
+            }
+        }
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+class ChatSessionRequestDTO(BaseModel):
+    """DTO to open a server-side chat session with Gemini"""
+    
+    system_prompt: str = Field(..., description="Instructions on how the model should respond during the whole session")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "system_prompt": "You are a helpful assistant that responds clearly and concisely."
+            }
+        }
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+class ChatSessionResponseDTO(BaseModel):
+    """DTO for a newly opened chat session"""
+    
+    session_id: str = Field(..., description="Identifier to send the messages of the session to")
+    idle_timeout_seconds: int = Field(..., description="Seconds without messages after which the session is discarded")
+    token_budget: int = Field(..., description="Estimated tokens of history kept for the model; older turns are summarized or dropped")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_id": "kq3X9v0bR2m8yT1cZ7wLfA",
+                "idle_timeout_seconds": 1800,
+                "token_budget": 4000
+            }
+        }
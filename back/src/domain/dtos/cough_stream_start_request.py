@@ -0,0 +1,22 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class CoughStreamStartRequestDTO(BaseModel):
+    """DTO for the first message of a /cough/stream WebSocket, sent before the audio"""
+
+    type: str = Field(..., pattern="^start$", description="Always \"start\"")
+    sample_rate: int = Field(..., ge=8000, le=48000, description="Sample rate of the PCM frames, in Hz")
+    description: Optional[str] = Field(None, description="Optional description of the cough symptoms")
+    patient_id: Optional[str] = Field(None, description="Optional patient identifier; the result is saved to their history")
+    include_advice: bool = Field(True, description="Whether to generate medical advice after the final classification")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "type": "start",
+                "sample_rate": 16000,
+                "description": "Tos seca desde hace tres días",
+                "patient_id": None,
+                "include_advice": True
+            }
+        }
@@ -10,6 +10,7 @@ class DeepStrokeResponseDTO(BaseModel):
     riesgo_alto: bool = Field(..., description="¿Riesgo alto? (True=Sí, False=No)")
     recomendacion: str = Field(..., description="Recomendación clínica básica")
     recomendaciones_medicas: str = Field(..., description="Recomendaciones médicas personalizadas generadas por IA")
+    recomendaciones_de_respaldo: bool = Field(False, description="¿Recomendaciones de plantilla? (Gemini no respondió dentro del presupuesto de latencia)")
     
     # Datos del paciente (booleanos para la API)
     genero: bool = Field(..., description="Género del paciente (True=Masculino, False=Femenino)")
@@ -47,6 +48,7 @@ class DeepStrokeResponseDTO(BaseModel):
                 "riesgo_alto": True,
                 "recomendacion": "Consulta especialista",
                 "recomendaciones_medicas": "Dr. Carlos: Su riesgo de ACV es ALTO (65%). Factores a mejorar: presión arterial elevada (140 mmHg) y diabetes. Recomendaciones: control estricto de glucemia, dieta baja en sal, ejercicio moderado 30 min/día. Consulte cardiólogo cada 3 meses. Esto no es diagnóstico médico, sino evaluación de IA.",
+                "recomendaciones_de_respaldo": False,
                 "genero": True,
                 "fumador_alguna_ocasion_basal": False,
                 "hipertension_basal": False,
@@ -0,0 +1,33 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, Field
+
+class JobResponseDTO(BaseModel):
+    """DTO for asynchronous evaluation job status"""
+    
+    job_id: str = Field(..., description="Unique job identifier")
+    kind: str = Field(..., description="Evaluation type: lesion, dental, cough, dermis or deepstroke")
+    status: str = Field(..., description="Job status: queued, running, succeeded or failed")
+    result: Optional[Dict[str, Any]] = Field(None, description="Evaluation result when the job succeeded")
+    error: Optional[str] = Field(None, description="Error message when the job failed")
+    callback_url: Optional[str] = Field(None, description="URL notified with the job when it finishes")
+    created_at: float = Field(..., description="Creation time (Unix timestamp)")
+    started_at: Optional[float] = Field(None, description="Start time (Unix timestamp)")
+    finished_at: Optional[float] = Field(None, description="Finish time (Unix timestamp)")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "job_id": "3f2b7c1e9a8d4e55b1f0c2d3e4f5a6b7",
+                "kind": "lesion",
+                "status": "succeeded",
+                "result": {
+                    "classification": "Melanoma (Confidence: 85%)",
+                    "medical_advice": "Based on the classification, immediate consultation with a dermatologist is recommended..."
+                },
+                "error": None,
+                "callback_url": None,
+                "created_at": 1760000000.0,
+                "started_at": 1760000000.2,
+                "finished_at": 1760000004.9
+            }
+        }
@@ -5,11 +5,13 @@ class LesionEvaluationResponseDTO(BaseModel):
     
     classification: str = Field(..., description="Lesion classification with confidence")
     medical_advice: str = Field(..., description="Medical advice based on classification")
+    advice_is_fallback: bool = Field(False, description="Whether the advice is a pre-authored template because Gemini did not answer within the latency budget")
     
     class Config:
         json_schema_extra = {
             "example": {
                 "classification": "Melanoma (Confidence: 85%)",
-                "medical_advice": "Based on the classification, immediate consultation with a dermatologist is recommended for professional evaluation and possible biopsy."
+                "medical_advice": "Based on the classification, immediate consultation with a dermatologist is recommended for professional evaluation and possible biopsy.",
+                "advice_is_fallback": False
             }
         } 
\ No newline at end of file
@@ -0,0 +1,20 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+class ModelDeployRequestDTO(BaseModel):
+    """DTO for loading a new version of a model"""
+    
+    source: Optional[str] = Field(None, description="Hugging Face model name (lesion, dental) or weights file path (cough, deepstroke); empty for the default weights")
+    version: Optional[str] = Field(None, description="Version label; defaults to v<n>")
+    mode: Literal["active", "shadow"] = Field("active", description="active: switch traffic once warm; shadow: mirror sampled traffic to compare")
+    sample_rate: float = Field(0.1, gt=0.0, le=1.0, description="Fraction of inferences mirrored in shadow mode")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "source": "Anwarkh1/Skin_Cancer-Image_Classification",
+                "version": "2025-06-skin",
+                "mode": "shadow",
+                "sample_rate": 0.1
+            }
+        }
@@ -0,0 +1,22 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+class SkinEvaluationResponseDTO(BaseModel):
+    """DTO for the combined skin evaluation (Hugging Face lesion model + Roboflow dermis model)"""
+    
+    classification: str = Field(..., description="Merged classification of both models")
+    lesion_classification: Optional[str] = Field(None, description="Lesion classification with confidence (Hugging Face)")
+    dermis_classes: Optional[List[str]] = Field(None, description="Dermatological conditions detected (Roboflow)")
+    medical_advice: str = Field(..., description="Medical advice based on both classifications")
+    advice_is_fallback: bool = Field(False, description="Whether the advice is a pre-authored template because Gemini did not answer within the latency budget")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "classification": "Lesion: Melanoma (Confidence: 85%). Dermatological conditions: Eczema",
+                "lesion_classification": "Melanoma (Confidence: 85%)",
+                "dermis_classes": ["Eczema"],
+                "medical_advice": "Based on the classification, immediate consultation with a dermatologist is recommended...",
+                "advice_is_fallback": False
+            }
+        }
@@ -0,0 +1 @@
+# Exceptions package 
@@ -0,0 +1,8 @@
+class AdmissionRejectedError(Exception):
+    """Raised when a model is saturated and a request is rejected instead of queued"""
+
+    def __init__(self, model: str, reason: str, retry_after: int):
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Model '{model}' is overloaded ({reason}), retry in {retry_after}s")
@@ -0,0 +1,2 @@
+class CallbackUrlError(Exception):
+    """Raised when a job callback URL is not allowed (host not in the allowlist or not a public address)"""
@@ -0,0 +1,7 @@
+class DermisUnavailableError(Exception):
+    """Raised when the Roboflow dermatological classifier cannot answer (circuit open or failed call)"""
+
+    def __init__(self, reason: str, retry_after: int):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Dermatological classifier unavailable ({reason}), retry in {retry_after}s")
@@ -0,0 +1,35 @@
+from typing import Optional
+
+class DialogServiceError(Exception):
+    """Structured error of a dialog system service (LLM) call"""
+
+    def __init__(
+        self,
+        code: str,
+        message: str,
+        retryable: bool = False,
+        status_code: int = 502,
+        retry_after: Optional[int] = None
+    ):
+        """
+        Args:
+            code: Machine readable cause: rate_limited, quota_exhausted, upstream_unavailable,
+                  timeout, empty_response, truncated_response or upstream_error
+            message: Human readable description
+            retryable: Whether the same request may succeed later
+            status_code: HTTP status the API answers with
+            retry_after: Seconds the client should wait before retrying, if known
+        """
+        self.code = code
+        self.message = message
+        self.retryable = retryable
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(f"{code}: {message}")
+
+    def to_dict(self) -> dict:
+        return {
+            "code": self.code,
+            "message": self.message,
+            "retryable": self.retryable
+        }
@@ -0,0 +1,6 @@
+class JobQueueFullError(Exception):
+    """Raised when the background job queue cannot accept more work"""
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        super().__init__(f"Job queue is full ({max_pending} pending jobs)")
@@ -0,0 +1,6 @@
+class ModelWorkerError(Exception):
+    """Raised when a model worker process fails to start, crashes or does not answer in time"""
+
+    def __init__(self, model: str, message: str):
+        self.model = model
+        super().__init__(f"Model worker {model}: {message}")
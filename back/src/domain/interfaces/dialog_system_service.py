@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Dict, List, Optional
 
 class DialogSystemServiceInterface(ABC):
     """Interface for dialog system services that generate responses"""
@@ -9,7 +9,8 @@ class DialogSystemServiceInterface(ABC):
         self,
         system_prompt: str,
         user_prompt: str,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        max_output_tokens: Optional[int] = None
     ) -> str:
         """
         Generates a response based on system prompt, user prompt and optional context
@@ -18,8 +19,30 @@ class DialogSystemServiceInterface(ABC):
             system_prompt: Instructions on how the model should respond
             user_prompt: User's question or prompt
             context: Optional additional context for the conversation
+            max_output_tokens: Optional cap on the length of the response
             
         Returns:
             str: Response generated by the model
         """
-        pass 
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def generate_chat_response(
+        self,
+        system_prompt: str,
+        contents: List[Dict],
+        max_output_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Generates the next turn of a multi-turn conversation
+
+        Args:
+            system_prompt: Instructions on how the model should respond
+            contents: Conversation turns, oldest first, as {"role": "user" | "model", "parts": [text]};
+                      the last one is the new user message
+            max_output_tokens: Optional cap on the length of the response
+
+        Returns:
+            str: Response generated by the model
+        """
+        pass
@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+class JobStoreInterface(ABC):
+    """Interface for storages that keep the state of background jobs"""
+    
+    @abstractmethod
+    async def create(self, job: Dict[str, Any]) -> None:
+        """
+        Persists a new job record
+        
+        Args:
+            job: Job record with at least job_id, kind, status and created_at
+        """
+        pass
+    
+    @abstractmethod
+    async def update(self, job_id: str, **fields: Any) -> None:
+        """
+        Updates the given fields of an existing job
+        
+        Args:
+            job_id: Job identifier
+            fields: Fields to overwrite (status, result, error, started_at, finished_at)
+        """
+        pass
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a job record
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            Optional[Dict[str, Any]]: Job record, or None if it does not exist
+        """
+        pass
+    
+    @abstractmethod
+    async def delete_finished_before(self, timestamp: float) -> int:
+        """
+        Removes finished jobs older than the given time
+        
+        Args:
+            timestamp: Jobs finished before this Unix timestamp are removed
+            
+        Returns:
+            int: Number of removed jobs
+        """
+        pass
+    
+    @abstractmethod
+    async def heartbeat(self) -> None:
+        """Marks the unfinished jobs of this process as alive"""
+        pass
+    
+    @abstractmethod
+    async def fail_abandoned(self, timestamp: float) -> int:
+        """
+        Fails the unfinished jobs of other processes whose last heartbeat is older than the given time
+        
+        Args:
+            timestamp: Unix timestamp before which a heartbeat counts as missing
+            
+        Returns:
+            int: Number of failed jobs
+        """
+        pass
@@ -1,9 +1,95 @@
+import os
 from dependency_injector import containers, providers
 from src.infrastructure.services.roboflow_dermi_service import RoboflowDermisService
 from src.infrastructure.services.dermis_service import DermisService
 from src.infrastructure.services.gemini_service import GeminiService
+from src.infrastructure.services.huggingface_vision_service import HuggingFaceVisionService
+from src.infrastructure.services.huggingface_dental_service import HuggingFaceDentalService
+from src.infrastructure.services.huggingface_cough_classification import CoughClassificationService
+from src.infrastructure.services.deepstroke_service import DeepStrokeService
+from src.infrastructure.services.process_model_services import (
+    ProcessVisionService,
+    ProcessDentalService,
+    ProcessCoughService,
+    ProcessDeepStrokeService,
+    RemoteVisionService,
+    RemoteDentalService,
+    RemoteCoughService,
+    RemoteDeepStrokeService
+)
+from src.infrastructure.services.skin_evaluation_service import SkinEvaluationService
+from src.infrastructure.services.in_memory_job_store import InMemoryJobStore
+from src.infrastructure.services.sqlite_job_store import SQLiteJobStore
+from src.infrastructure.services.job_service import JobService
+from src.infrastructure.services.places_clinic_service import PlacesClinicService
+from src.infrastructure.services.clinic_spatial_index import ClinicSpatialIndex
+from src.infrastructure.services.admission_controller import AdmissionController
+from src.infrastructure.services.model_lifecycle import ModelLifecycle
+from src.infrastructure.services.model_registry import ModelRegistry
+from src.infrastructure.services.micro_batcher import MicroBatcher
+from src.infrastructure.services.evaluation_history_store import EvaluationHistoryStore
+from src.infrastructure.services.chat_session_store import ChatSessionStore
 
 class Container(containers.DeclarativeContainer):
+    # Every local model is served by the registry: these providers return its active version,
+    # loaded once (the startup lifecycle thread usually loads it first) and hot-swappable
+    # MODEL_SERVING_MODE=process runs each model in its own worker process instead of the API process,
+    # and remote on model servers of other nodes (the API process is then a gateway holding no model)
+    model_factories = providers.Selector(
+        lambda: os.getenv("MODEL_SERVING_MODE", "inprocess"),
+        inprocess=providers.Object({
+            "lesion": HuggingFaceVisionService,
+            "dental": HuggingFaceDentalService,
+            "cough": CoughClassificationService,
+            "deepstroke": DeepStrokeService
+        }),
+        process=providers.Object({
+            "lesion": ProcessVisionService,
+            "dental": ProcessDentalService,
+            "cough": ProcessCoughService,
+            "deepstroke": ProcessDeepStrokeService
+        }),
+        remote=providers.Object({
+            "lesion": RemoteVisionService,
+            "dental": RemoteDentalService,
+            "cough": RemoteCoughService,
+            "deepstroke": RemoteDeepStrokeService
+        })
+    )
+    model_registry = providers.Singleton(ModelRegistry, factories=model_factories)
+    vision_service = providers.Callable(lambda registry: registry.current("lesion"), registry=model_registry)
+    dental_service = providers.Callable(lambda registry: registry.current("dental"), registry=model_registry)
+    cough_service = providers.Callable(lambda registry: registry.current("cough"), registry=model_registry)
+    deepstroke_service = providers.Callable(lambda registry: registry.current("deepstroke"), registry=model_registry)
+    lesion_batcher = providers.Singleton(MicroBatcher, name="lesion")
+    dental_batcher = providers.Singleton(MicroBatcher, name="dental")
     roboflow_service = providers.Singleton(RoboflowDermisService)
     dermis_service = providers.Singleton(DermisService, roboflow_service=roboflow_service)
     gemini_service = providers.Singleton(GeminiService)
+    chat_session_store = providers.Singleton(ChatSessionStore, dialog_service=gemini_service)
+    skin_evaluation_service = providers.Singleton(
+        SkinEvaluationService,
+        model_registry=model_registry,
+        roboflow_service=roboflow_service
+    )
+    job_store = providers.Selector(
+        lambda: os.getenv("JOB_STORE_BACKEND", "memory"),
+        memory=providers.Singleton(InMemoryJobStore),
+        sqlite=providers.Singleton(SQLiteJobStore, db_path=os.getenv("JOB_STORE_PATH", "jobs.db"))
+    )
+    job_service = providers.Singleton(JobService, store=job_store)
+    places_clinic_service = providers.Singleton(PlacesClinicService)
+    clinic_spatial_index = providers.Singleton(ClinicSpatialIndex)
+    evaluation_history_store = providers.Singleton(EvaluationHistoryStore)
+    admission_controller = providers.Singleton(AdmissionController)
+    model_lifecycle = providers.Singleton(
+        ModelLifecycle,
+        loaders=providers.Dict(
+            lesion=vision_service.provider,
+            dental=dental_service.provider,
+            cough=cough_service.provider,
+            deepstroke=deepstroke_service.provider
+        ),
+        admission_controller=admission_controller,
+        model_registry=model_registry
+    )
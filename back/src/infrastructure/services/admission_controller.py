@@ -0,0 +1,190 @@
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from src.domain.exceptions.admission_rejected_error import AdmissionRejectedError
+
+# Lower value = served first when requests wait for the same gate
+PRIORITY_LANES = {"clinical": 0, "screening": 1}
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded, priority-ordered wait queue.
+
+    Up to max_concurrency requests run at once. Further requests wait in the
+    queue, ordered by lane and then arrival, unless the queue already holds
+    max_queue requests, the expected wait exceeds max_wait or the request has
+    waited max_wait seconds; in those cases AdmissionRejectedError is raised.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: List[list] = []  # heap of [priority, sequence, future]
+        self._queued = 0
+        self._sequence = itertools.count()
+        self._service_time = 1.0  # exponential moving average, seconds
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _retry_after(self) -> int:
+        backlog = self._queued + self.in_flight
+        return max(1, math.ceil(self._service_time * backlog / self.max_concurrency))
+
+    def _reject(self, reason: str) -> AdmissionRejectedError:
+        self.rejected += 1
+        return AdmissionRejectedError(self.name, reason, self._retry_after())
+
+    async def acquire(self, priority: int) -> None:
+        if self.in_flight < self.max_concurrency and self._queued == 0:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self._queued >= self.max_queue:
+            raise self._reject("queue full")
+        expected_wait = self._service_time * (self._queued + 1) / self.max_concurrency
+        if expected_wait > self.max_wait:
+            raise self._reject("expected wait too long")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._waiters, entry)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(future)
+            raise self._reject("wait timeout")
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        self.admitted += 1
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        """Give up a place in the queue; a slot already handed over is passed on"""
+        if future.done() and not future.cancelled():
+            self.release(0.0)
+        else:
+            future.cancel()
+            self._queued -= 1
+
+    def release(self, service_time: float) -> None:
+        if service_time > 0:
+            self._service_time = 0.8 * self._service_time + 0.2 * service_time
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            # The slot goes straight to the next waiter, in_flight stays the same
+            self._queued -= 1
+            future.set_result(None)
+            return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_seconds": self.max_wait,
+            "avg_service_seconds": round(self._service_time, 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected
+        }
+
+class AdmissionController:
+    """
+    Per-model admission control with backpressure.
+
+    Each model has its own AdmissionGate configured through environment variables
+    (ADMISSION_<MODEL>_CONCURRENCY, ADMISSION_<MODEL>_QUEUE, ADMISSION_<MODEL>_MAX_WAIT_SECONDS).
+    When ADMISSION_GLOBAL_CONCURRENCY is set, admitted requests of every model also share
+    a global gate, where clinical requests (DeepSTROKE) overtake screening traffic.
+    """
+
+    DEFAULTS = {
+        "lesion": (4, 32, 10.0),
+        "dental": (4, 32, 10.0),
+        "cough": (4, 32, 10.0),
+        "dermis": (8, 64, 10.0),
+        "deepstroke": (2, 16, 15.0)
+    }
+
+    def __init__(self):
+        self.gates: Dict[str, AdmissionGate] = {}
+        for model, (concurrency, queue, wait) in self.DEFAULTS.items():
+            prefix = f"ADMISSION_{model.upper()}"
+            self.gates[model] = AdmissionGate(
+                model,
+                max_concurrency=int(os.getenv(f"{prefix}_CONCURRENCY", str(concurrency))),
+                max_queue=int(os.getenv(f"{prefix}_QUEUE", str(queue))),
+                max_wait=float(os.getenv(f"{prefix}_MAX_WAIT_SECONDS", str(wait)))
+            )
+        global_concurrency = int(os.getenv("ADMISSION_GLOBAL_CONCURRENCY", "0"))
+        self.global_gate: Optional[AdmissionGate] = None
+        if global_concurrency > 0:
+            self.global_gate = AdmissionGate(
+                "global",
+                max_concurrency=global_concurrency,
+                max_queue=int(os.getenv("ADMISSION_GLOBAL_QUEUE", "128")),
+                max_wait=float(os.getenv("ADMISSION_GLOBAL_MAX_WAIT_SECONDS", "15"))
+            )
+
+    @asynccontextmanager
+    async def admit(self, model: str, lane: str = "screening"):
+        """
+        Hold an execution slot of a model for the duration of the block
+
+        Args:
+            model: Gate name (lesion, dental, cough, dermis, deepstroke)
+            lane: Priority lane, clinical or screening
+
+        Raises:
+            AdmissionRejectedError: If the model (or the global gate) is saturated
+        """
+        priority = PRIORITY_LANES.get(lane, PRIORITY_LANES["screening"])
+        gate = self.gates[model]
+        await gate.acquire(priority)
+        if self.global_gate is not None:
+            try:
+                await self.global_gate.acquire(priority)
+            except BaseException:
+                gate.release(0.0)
+                raise
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            if self.global_gate is not None:
+                self.global_gate.release(elapsed)
+            gate.release(elapsed)
+
+    def queue_depth(self) -> int:
+        """Total number of requests waiting in every gate"""
+        depth = sum(gate.queued for gate in self.gates.values())
+        if self.global_gate is not None:
+            depth += self.global_gate.queued
+        return depth
+
+    def stats(self) -> Dict:
+        stats = {
+            "queue_depth": self.queue_depth(),
+            "models": {name: gate.stats() for name, gate in self.gates.items()}
+        }
+        if self.global_gate is not None:
+            stats["global"] = self.global_gate.stats()
+        return stats
@@ -0,0 +1,160 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import torch
+import torch.nn.functional as F
+from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+# A stage maps preprocessed pixel values (N, 3, height, width) of the full model to logits (N, num_labels)
+Stage = Callable[[torch.Tensor], torch.Tensor]
+
+def _resize(pixel_values: torch.Tensor, size: int) -> torch.Tensor:
+    if pixel_values.shape[-2:] == (size, size):
+        return pixel_values
+    return F.interpolate(pixel_values, size=(size, size), mode="bilinear", antialias=True, align_corners=False)
+
+def resolution_stage(model, resolution: int) -> Stage:
+    """
+    First stage running the full model on a downscaled input
+
+    The position embeddings are interpolated to the smaller patch grid, so a ViT at
+    half resolution processes a quarter of the tokens.
+
+    Args:
+        model: Hugging Face image classification model supporting interpolate_pos_encoding
+        resolution: Side of the downscaled input
+    """
+    def run(pixel_values: torch.Tensor) -> torch.Tensor:
+        return model(pixel_values=_resize(pixel_values, resolution), interpolate_pos_encoding=True).logits
+    return run
+
+def model_stage(processor, model, model_name: str) -> Stage:
+    """
+    First stage running a smaller (distilled) model with the same labels and normalization
+
+    Args:
+        processor: Image processor of the full model
+        model: Full model, whose labels the small model must share
+        model_name: Hugging Face name of the small model
+
+    Raises:
+        ValueError: If the small model has other labels or another input normalization
+    """
+    small_processor = AutoImageProcessor.from_pretrained(model_name)
+    small_model = AutoModelForImageClassification.from_pretrained(model_name).eval()
+    if small_model.config.id2label != model.config.id2label:
+        raise ValueError(f"{model_name} does not predict the same labels as the full model")
+    for attribute in ("image_mean", "image_std", "rescale_factor"):
+        expected, actual = getattr(processor, attribute, None), getattr(small_processor, attribute, None)
+        if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+            expected, actual = list(expected), list(actual)
+        if expected != actual:
+            raise ValueError(f"{model_name} uses another {attribute} than the full model")
+    size = small_model.config.image_size
+
+    def run(pixel_values: torch.Tensor) -> torch.Tensor:
+        return small_model(pixel_values=_resize(pixel_values, size)).logits
+    return run
+
+class CascadeClassifier:
+    """
+    Confidence-gated two-stage classification.
+
+    Every image first goes through a cheap stage; the images whose top probability
+    reaches the threshold are answered by it, and only the others are escalated to
+    the full model (as one batch). Stage latencies are accumulated so the escalation
+    rate and the time saved against running the full model on every image can be
+    reported.
+    """
+
+    def __init__(self, description: str, first_stage: Stage, full_stage: Stage, threshold: float):
+        """
+        Args:
+            description: Name of the first stage, reported in the stats
+            first_stage: Cheap stage
+            full_stage: Full model
+            threshold: Smallest first-stage confidence that is not escalated
+        """
+        self.description = description
+        self.first_stage = first_stage
+        self.full_stage = full_stage
+        self.threshold = threshold
+        self.full_reference_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.images = 0
+            self.escalated = 0
+            self.first_stage_seconds = 0.0
+            self.full_stage_seconds = 0.0
+
+    def calibrate(self, pixel_values: torch.Tensor) -> None:
+        """
+        Time the full model on a batch (warm-up) and start the stats from zero
+
+        The measured per-image latency is the reference for the saving until real
+        escalations have been timed.
+        """
+        start = time.perf_counter()
+        self.full_stage(pixel_values)
+        self.full_reference_seconds = (time.perf_counter() - start) / len(pixel_values)
+        self.reset_stats()
+
+    def probabilities(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        """
+        Class probabilities of a batch, escalating the uncertain images
+
+        Args:
+            pixel_values: Preprocessed images of the full model, (N, 3, height, width)
+
+        Returns:
+            torch.Tensor: Probabilities (N, num_labels) of the stage that answered each image
+        """
+        start = time.perf_counter()
+        # float32 probabilities even when the stages run under bfloat16 autocast
+        probabilities = torch.softmax(self.first_stage(pixel_values).float(), dim=-1)
+        first_seconds = time.perf_counter() - start
+
+        hard = probabilities.max(dim=-1).values < self.threshold
+        escalated = int(hard.sum())
+        full_seconds = 0.0
+        if escalated:
+            start = time.perf_counter()
+            probabilities[hard] = torch.softmax(self.full_stage(pixel_values[hard]).float(), dim=-1)
+            full_seconds = time.perf_counter() - start
+
+        with self._lock:
+            self.images += len(pixel_values)
+            self.escalated += escalated
+            self.first_stage_seconds += first_seconds
+            self.full_stage_seconds += full_seconds
+        return probabilities
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Escalation rate and latency of each stage
+
+        The saving is estimated from the full model's measured per-image latency on the
+        escalated images (or its warm-up latency before any escalation), applied to every image.
+        """
+        with self._lock:
+            full_per_image = self.full_stage_seconds / self.escalated if self.escalated else self.full_reference_seconds
+            stats = {
+                "first_stage": self.description,
+                "threshold": self.threshold,
+                "images": self.images,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalated / self.images, 4) if self.images else None,
+                "first_stage_ms_per_image": round(1000 * self.first_stage_seconds / self.images, 3) if self.images else None,
+                "full_model_ms_per_image": round(1000 * full_per_image, 3) if full_per_image is not None else None,
+                "estimated_saved_ms_per_image": None,
+                "estimated_speedup": None
+            }
+            if self.images and full_per_image is not None:
+                full_only = full_per_image * self.images
+                actual = self.first_stage_seconds + self.full_stage_seconds
+                stats["estimated_saved_ms_per_image"] = round(1000 * (full_only - actual) / self.images, 3)
+                stats["estimated_speedup"] = round(full_only / actual, 2) if actual else None
+            return stats
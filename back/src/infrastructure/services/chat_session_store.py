@@ -0,0 +1,226 @@
+import asyncio
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set
+from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
+from src.infrastructure.services.prompt_registry import count_tokens, prompt_registry
+
+class ChatSession:
+    """Conversation kept by the server: system instruction, summary of the older turns and the recent turns"""
+
+    def __init__(self, session_id: str, system_prompt: str):
+        self.session_id = session_id
+        self.system_prompt = system_prompt
+        # Gemini multi-turn contents, alternating user and model, oldest first
+        self.turns: List[Dict[str, Any]] = []
+        self.turn_tokens: List[int] = []
+        self.summary: Optional[str] = None
+        self.summary_tokens = 0
+        self.messages = 0
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        # One message at a time per session, so turns are appended in order
+        self.lock = asyncio.Lock()
+
+    @property
+    def history_tokens(self) -> int:
+        return self.summary_tokens + sum(self.turn_tokens)
+
+    def contents(self, message: str) -> List[Dict[str, Any]]:
+        """Contents sent to the model: the kept turns followed by the new message, the summary leading the first one"""
+        contents = [*self.turns, {"role": "user", "parts": [message]}]
+        if self.summary:
+            first = contents[0]
+            contents[0] = {"role": "user", "parts": [f"Summary of our conversation so far: {self.summary}", *first["parts"]]}
+        return contents
+
+    def append(self, message: str, response: str) -> None:
+        self.turns.append({"role": "user", "parts": [message]})
+        self.turns.append({"role": "model", "parts": [response]})
+        self.turn_tokens.extend((count_tokens(message), count_tokens(response)))
+        self.messages += 1
+
+    def drop_oldest(self, count: int) -> List[Dict[str, Any]]:
+        """Remove the count oldest turns (a whole number of exchanges) and return them"""
+        dropped = self.turns[:count]
+        del self.turns[:count]
+        del self.turn_tokens[:count]
+        return dropped
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "system_prompt": self.system_prompt,
+            "messages": self.messages,
+            "summary": self.summary,
+            "history": [{"role": turn["role"], "text": turn["parts"][0]} for turn in self.turns],
+            "history_tokens": self.history_tokens,
+            "created_at": self.created_at,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1)
+        }
+
+class ChatSessionStore:
+    """
+    Server-side chat sessions.
+
+    The client sends only its new message; the session keeps the conversation as
+    Gemini's native multi-turn contents, sent with the system instruction of the
+    session (whose model is cached by GeminiService). The history is bounded by
+    CHAT_SESSION_TOKEN_BUDGET estimated tokens: once an answer takes it over the
+    budget, the turns older than the last CHAT_SESSION_KEEP_MESSAGES are folded into
+    a running summary by Gemini (CHAT_SESSION_COMPACTION=summarize) or dropped
+    (truncate). Summarizing runs after the answer is returned; the next message of
+    the session waits for it. Sessions live in process memory, in LRU order: idle
+    sessions expire after CHAT_SESSION_IDLE_SECONDS and the least recently used one
+    is evicted beyond CHAT_SESSION_MAX_SESSIONS.
+    """
+
+    def __init__(
+        self,
+        dialog_service: DialogSystemServiceInterface,
+        max_sessions: Optional[int] = None,
+        idle_seconds: Optional[float] = None,
+        token_budget: Optional[int] = None,
+        keep_messages: Optional[int] = None,
+        compaction: Optional[str] = None
+    ):
+        """
+        Args:
+            dialog_service: Service generating the answers and the summaries
+            max_sessions: Sessions kept at most. Defaults to CHAT_SESSION_MAX_SESSIONS (1000)
+            idle_seconds: Lifetime of a session without messages. Defaults to CHAT_SESSION_IDLE_SECONDS (1800)
+            token_budget: Estimated tokens of summary plus turns sent per message. Defaults to CHAT_SESSION_TOKEN_BUDGET (4000)
+            keep_messages: Most recent turns never summarized. Defaults to CHAT_SESSION_KEEP_MESSAGES (6)
+            compaction: summarize or truncate. Defaults to CHAT_SESSION_COMPACTION (summarize)
+        """
+        self.dialog_service = dialog_service
+        self.max_sessions = max_sessions or int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "1000"))
+        self.idle_seconds = idle_seconds or float(os.getenv("CHAT_SESSION_IDLE_SECONDS", "1800"))
+        self.token_budget = token_budget or int(os.getenv("CHAT_SESSION_TOKEN_BUDGET", "4000"))
+        self.keep_messages = keep_messages if keep_messages is not None else int(os.getenv("CHAT_SESSION_KEEP_MESSAGES", "6"))
+        # Whole exchanges are kept: the turns after a compaction start with a user message
+        self.keep_messages += self.keep_messages % 2
+        self.compaction = compaction or os.getenv("CHAT_SESSION_COMPACTION", "summarize")
+        # Thinking headroom added to the client's max_output_tokens (Gemini counts its thinking against it)
+        self.thinking_tokens = int(os.getenv("CHAT_THINKING_TOKENS", "1024"))
+        if self.compaction not in ("summarize", "truncate"):
+            raise ValueError(f"Unknown CHAT_SESSION_COMPACTION: {self.compaction}. Expected summarize or truncate")
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"created": 0, "expired": 0, "evicted": 0, "summarized": 0, "truncated": 0, "summary_errors": 0}
+
+    def _expire(self) -> None:
+        # Least recently used first: stop at the first session still in use
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_used < self.idle_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.stats["expired"] += 1
+
+    def create(self, system_prompt: str) -> ChatSession:
+        """
+        Open a session
+
+        Args:
+            system_prompt: Instructions on how the model should respond in the session
+
+        Returns:
+            ChatSession: New session, the most recently used
+        """
+        self._expire()
+        session = ChatSession(secrets.token_urlsafe(16), system_prompt)
+        self._sessions[session.session_id] = session
+        self.stats["created"] += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["evicted"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Session by identifier, marked as used; None if unknown, expired or evicted"""
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    async def send(self, session: ChatSession, message: str, max_output_tokens: Optional[int] = None) -> str:
+        """
+        Answer a message in a session and add both turns to its history
+
+        Args:
+            session: Session of the conversation
+            message: New user message
+            max_output_tokens: Optional cap on the length of the response (approximate: the thinking
+                headroom is added to it, and the model may use it for the answer)
+
+        Returns:
+            str: Response generated by the model
+
+        Raises:
+            DialogServiceError: If Gemini fails; the history is left unchanged
+        """
+        async with session.lock:
+            # Never send more than the budget, even when the summary of the previous turn failed
+            self._truncate(session, self.token_budget - count_tokens(message))
+            response = await self.dialog_service.generate_chat_response(
+                session.system_prompt,
+                session.contents(message),
+                max_output_tokens=max_output_tokens + self.thinking_tokens if max_output_tokens else None
+            )
+            session.append(message, response)
+            session.last_used = time.monotonic()
+        if session.history_tokens > self.token_budget:
+            task = asyncio.create_task(self._compact(session))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return response
+
+    def _truncate(self, session: ChatSession, budget: int) -> None:
+        """Drop the oldest exchanges until the history fits the budget"""
+        dropped = 0
+        while session.turns and session.history_tokens > budget:
+            session.drop_oldest(2)
+            dropped += 1
+        if dropped:
+            self.stats["truncated"] += 1
+
+    async def _compact(self, session: ChatSession) -> None:
+        async with session.lock:
+            if session.history_tokens <= self.token_budget:
+                return
+            older = len(session.turns) - self.keep_messages
+            if self.compaction == "summarize" and older > 0:
+                transcript = "\n".join(f"{turn['role']}: {turn['parts'][0]}" for turn in session.turns[:older])
+                prompt = prompt_registry.render("chat_summary", summary=session.summary or "(none)", transcript=transcript)
+                try:
+                    summary = await self.dialog_service.generate_response(
+                        system_prompt=prompt.system_prompt,
+                        user_prompt=prompt.user_prompt,
+                        max_output_tokens=prompt.output_token_limit
+                    )
+                    session.drop_oldest(older)
+                    session.summary = summary.strip()
+                    session.summary_tokens = count_tokens(session.summary)
+                    self.stats["summarized"] += 1
+                except Exception as e:
+                    self.stats["summary_errors"] += 1
+                    print(f"Error summarizing chat session {session.session_id}: {str(e)}")
+            self._truncate(session, self.token_budget)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "token_budget": self.token_budget,
+            "compaction": self.compaction,
+            **self.stats
+        }
@@ -0,0 +1,97 @@
+import threading
+import time
+
+class CircuitBreaker:
+    """
+    Circuit breaker for calls to remote services.
+
+    After failure_threshold consecutive failures the circuit opens and calls are
+    rejected for recovery_timeout seconds. Then a single trial call is let through
+    (half-open): success closes the circuit again, failure re-opens it. Calls slower
+    than slow_call_threshold seconds count as failures, so a remote that answers
+    but too slowly is also bypassed.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0, slow_call_threshold: float = None):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds the circuit stays open before a trial call
+            slow_call_threshold: Latency in seconds above which a call counts as failed (None disables it)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half_open"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go to the remote service
+
+        Returns:
+            bool: True if the call is allowed
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next trial call is let through (0 when the circuit is closed or half-open)"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def release_trial(self) -> None:
+        """Give back the half-open trial of a call that ended without an outcome (cancelled)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self, latency: float = 0.0) -> None:
+        """
+        Record a finished call
+
+        Args:
+            latency: Call duration in seconds, compared against slow_call_threshold
+        """
+        if self.slow_call_threshold is not None and latency > self.slow_call_threshold:
+            self.record_failure()
+            return
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a failed call"""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
@@ -0,0 +1,244 @@
+import csv
+import heapq
+import io
+import json
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.infrastructure.services.geohash import EARTH_RADIUS_M
+
+Point = Tuple[float, float, float]
+
+def _to_xyz(lat: float, lon: float) -> Point:
+    """Project a coordinate to 3D Cartesian coordinates (meters) on the Earth sphere"""
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+    cos_phi = math.cos(phi)
+    return (
+        EARTH_RADIUS_M * cos_phi * math.cos(lam),
+        EARTH_RADIUS_M * cos_phi * math.sin(lam),
+        EARTH_RADIUS_M * math.sin(phi)
+    )
+
+def _chord(radius_m: float) -> float:
+    """Straight-line distance equivalent to a great-circle distance"""
+    return 2 * EARTH_RADIUS_M * math.sin(min(radius_m, math.pi * EARTH_RADIUS_M) / (2 * EARTH_RADIUS_M))
+
+class _KDTree:
+    """
+    Static 3D KD-tree. Points are projected to Cartesian coordinates on the sphere,
+    where straight-line (chord) distance grows monotonically with great-circle
+    distance, so radius and nearest-neighbor queries need no special handling of
+    the antimeridian or the poles.
+    """
+
+    def __init__(self, points: List[Point]):
+        self.points = points
+        self.node_point: List[int] = []
+        self.node_axis: List[int] = []
+        self.node_left: List[int] = []
+        self.node_right: List[int] = []
+        self.root = self._build(list(range(len(points))))
+
+    def _build(self, indices: List[int]) -> int:
+        if not indices:
+            return -1
+        spreads = [
+            max(self.points[i][axis] for i in indices) - min(self.points[i][axis] for i in indices)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        indices.sort(key=lambda i: self.points[i][axis])
+        middle = len(indices) // 2
+
+        node = len(self.node_point)
+        self.node_point.append(indices[middle])
+        self.node_axis.append(axis)
+        self.node_left.append(-1)
+        self.node_right.append(-1)
+        self.node_left[node] = self._build(indices[:middle])
+        self.node_right[node] = self._build(indices[middle + 1:])
+        return node
+
+    def within(self, query: Point, radius: float) -> List[Tuple[float, int]]:
+        """(distance, point index) of every point closer than radius, nearest first"""
+        found = []
+        radius_sq = radius * radius
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            point_index = self.node_point[node]
+            point = self.points[point_index]
+            dist_sq = (point[0] - query[0]) ** 2 + (point[1] - query[1]) ** 2 + (point[2] - query[2]) ** 2
+            if dist_sq <= radius_sq:
+                found.append((math.sqrt(dist_sq), point_index))
+            diff = query[self.node_axis[node]] - point[self.node_axis[node]]
+            near, far = (self.node_left[node], self.node_right[node]) if diff < 0 else (self.node_right[node], self.node_left[node])
+            stack.append(near)
+            if diff * diff <= radius_sq:
+                stack.append(far)
+        found.sort()
+        return found
+
+    def nearest(self, query: Point, k: int, radius: float) -> List[Tuple[float, int]]:
+        """(distance, point index) of the k nearest points closer than radius, nearest first"""
+        heap: List[Tuple[float, int]] = []  # max-heap of (-dist_sq, index)
+        worst_sq = radius * radius
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                continue
+            point_index = self.node_point[node]
+            point = self.points[point_index]
+            dist_sq = (point[0] - query[0]) ** 2 + (point[1] - query[1]) ** 2 + (point[2] - query[2]) ** 2
+            if dist_sq <= worst_sq:
+                heapq.heappush(heap, (-dist_sq, point_index))
+                if len(heap) > k:
+                    heapq.heappop(heap)
+                if len(heap) == k:
+                    worst_sq = -heap[0][0]
+            diff = query[self.node_axis[node]] - point[self.node_axis[node]]
+            near, far = (self.node_left[node], self.node_right[node]) if diff < 0 else (self.node_right[node], self.node_left[node])
+            # The far side is pushed first so the near side is explored first and tightens worst_sq
+            if diff * diff <= worst_sq:
+                stack.append(far)
+            stack.append(near)
+        return sorted((math.sqrt(-neg_sq), index) for neg_sq, index in heap)
+
+class ClinicSpatialIndex:
+    """
+    In-memory spatial index over a locally imported clinic dataset.
+
+    Clinics are imported from CSV or GeoJSON and indexed in a KD-tree, so nearby
+    clinic queries are answered without calling Google Places, also in fully
+    offline deployments. Imports are incremental: clinics are upserted by id and
+    the tree is rebuilt and swapped in atomically, while queries keep using the
+    previous tree.
+
+    CSV columns: nombre (or name), direccion (or address / vicinity), lat (or latitude),
+    lon (or lng / longitude) and an optional id. GeoJSON: Point features with the same
+    names as properties.
+    """
+
+    def __init__(self, dataset_path: Optional[str] = None):
+        """
+        Initialize the index
+
+        Args:
+            dataset_path: Dataset imported on creation. If not provided, looks for CLINICS_DATASET_PATH
+        """
+        self._records: Dict[str, Dict] = {}
+        self._tree: Optional[_KDTree] = None
+        self._tree_records: List[Dict] = []
+        self._lock = threading.Lock()
+        dataset_path = dataset_path or os.getenv("CLINICS_DATASET_PATH")
+        if dataset_path and os.path.exists(dataset_path):
+            with open(dataset_path, "rb") as f:
+                count = self.import_data(f.read(), dataset_path)
+            print(f"Clinic dataset loaded from {dataset_path}: {count} clinics")
+
+    def __len__(self) -> int:
+        return len(self._tree_records)
+
+    def import_data(self, content: bytes, filename: str, replace: bool = False) -> int:
+        """
+        Import clinics from a CSV or GeoJSON file
+
+        Args:
+            content: File content
+            filename: File name, used to tell the format (.csv, .json or .geojson)
+            replace: Drop the clinics imported before instead of upserting into them
+
+        Returns:
+            int: Number of clinics in the index after the import
+        """
+        text = content.decode("utf-8-sig")
+        if filename.lower().endswith((".json", ".geojson")):
+            parsed = list(self._parse_geojson(text))
+        else:
+            parsed = list(self._parse_csv(text))
+
+        with self._lock:
+            records = {} if replace else dict(self._records)
+            for clinic_id, record in parsed:
+                records[clinic_id] = record
+            tree_records = list(records.values())
+            tree = _KDTree([
+                _to_xyz(record["ubicacion"]["lat"], record["ubicacion"]["lng"]) for record in tree_records
+            ])
+            self._records = records
+            # Swapped together so queries always see a consistent tree and record list
+            self._tree, self._tree_records = tree, tree_records
+        return len(tree_records)
+
+    def within_radius(self, lat: float, lon: float, radius_m: float) -> List[Dict]:
+        """
+        Clinics closer than radius_m, nearest first
+
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            radius_m: Search radius in meters
+
+        Returns:
+            List[Dict]: Clinics with nombre, direccion and ubicacion ({"lat", "lng"})
+        """
+        tree, records = self._tree, self._tree_records
+        if tree is None:
+            return []
+        return [records[index] for _, index in tree.within(_to_xyz(lat, lon), _chord(radius_m))]
+
+    def nearest(self, lat: float, lon: float, k: int, radius_m: float = math.inf) -> List[Dict]:
+        """
+        The k clinics nearest to a point, optionally limited to a radius
+
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            k: Number of clinics
+            radius_m: Maximum distance in meters
+
+        Returns:
+            List[Dict]: Clinics with nombre, direccion and ubicacion ({"lat", "lng"}), nearest first
+        """
+        tree, records = self._tree, self._tree_records
+        if tree is None or k <= 0:
+            return []
+        return [records[index] for _, index in tree.nearest(_to_xyz(lat, lon), k, _chord(radius_m))]
+
+    @staticmethod
+    def _record(properties: Dict, lat: float, lon: float) -> Tuple[str, Dict]:
+        nombre = properties.get("nombre") or properties.get("name")
+        direccion = properties.get("direccion") or properties.get("address") or properties.get("vicinity")
+        clinic_id = str(properties.get("id") or f"{nombre}|{lat:.6f}|{lon:.6f}")
+        return clinic_id, {
+            "nombre": nombre,
+            "direccion": direccion,
+            "ubicacion": {"lat": lat, "lng": lon}
+        }
+
+    def _parse_csv(self, text: str) -> Iterable[Tuple[str, Dict]]:
+        for row in csv.DictReader(io.StringIO(text)):
+            row = {key.strip().lower(): (value or "").strip() for key, value in row.items() if key}
+            lat = row.get("lat") or row.get("latitude")
+            lon = row.get("lon") or row.get("lng") or row.get("longitude")
+            if not lat or not lon:
+                continue
+            yield self._record(row, float(lat), float(lon))
+
+    def _parse_geojson(self, text: str) -> Iterable[Tuple[str, Dict]]:
+        data = json.loads(text)
+        features = data.get("features", []) if data.get("type") == "FeatureCollection" else [data]
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") != "Point":
+                continue
+            lon, lat = geometry["coordinates"][:2]
+            properties = dict(feature.get("properties") or {})
+            if feature.get("id") is not None and "id" not in properties:
+                properties["id"] = feature["id"]
+            yield self._record(properties, float(lat), float(lon))
@@ -0,0 +1,184 @@
+from typing import Dict, List, Optional
+import librosa
+import numpy as np
+from scipy.fft import dct
+
+class _RunningMoments:
+    """Count, mean and sum of squared deviations of a stream of values, merged block by block (Chan et al.)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        count = values.size
+        if not count:
+            return
+        values = values.astype(np.float64, copy=False)
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+
+    def copy(self) -> "_RunningMoments":
+        moments = _RunningMoments()
+        moments.count, moments.mean, moments.m2 = self.count, self.mean, self.m2
+        return moments
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.count)) if self.count else 0.0
+
+# Frame-local features: every STFT/analysis frame contributes its values once, to running moments
+_RUNNING_FEATURES = ("rms", "zcr", "spectral_centroid", "spectral_bandwidth", "spectral_contrast", "rolloff")
+
+class CoughFeatureStream:
+    """
+    Cough features of an audio stream, computed incrementally as the samples arrive.
+
+    Gives the same features as CoughClassificationService.extract_all_features_from_audio
+    on the audio received so far, without recomputing it: the analysis window (2048
+    samples, hop 512, centered as librosa does) slides over the stream and each frame is
+    analyzed once, as soon as all its samples are in. Only the samples of the frames not
+    analyzed yet are kept. RMS, zero-crossing rate, spectral centroid, bandwidth, contrast
+    and rolloff are frame-local, so they are reduced to running means and standard
+    deviations. MFCCs (clipped 80 dB below the loudest mel band of the whole recording)
+    and chroma (tuned on the whole recording) depend on every frame, so the compact
+    per-frame log-mel and power spectra are kept and reduced when the features are read.
+    The last frames, padded past the end of the audio, are analyzed on each read without
+    being committed.
+    """
+
+    N_FFT = 2048
+    HOP_LENGTH = 512
+    TOP_DB = 80.0
+
+    def __init__(self, sr: int):
+        """
+        Args:
+            sr: Sample rate of the stream, in Hz
+        """
+        self.sr = sr
+        self.samples = 0
+        self._first: Optional[float] = None
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._tail_start = 0
+        self._frames = 0
+        self._carry = b""
+        self._moments = {name: _RunningMoments() for name in _RUNNING_FEATURES}
+        self._log_mel: List[np.ndarray] = []
+        self._power: List[np.ndarray] = []
+
+    @property
+    def seconds(self) -> float:
+        return self.samples / self.sr
+
+    def append_pcm16(self, data: bytes) -> None:
+        """Append 16-bit little-endian mono PCM, scaled to [-1, 1) as librosa.load does; a split sample is kept for the next chunk"""
+        data = self._carry + data
+        usable = len(data) - len(data) % 2
+        self._carry = data[usable:]
+        self.append(np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0)
+
+    def append(self, y: np.ndarray) -> None:
+        """Append float samples and analyze the frames they complete"""
+        if not y.size:
+            return
+        if self._first is None:
+            self._first = float(y[0])
+        self._tail = np.concatenate([self._tail, y.astype(np.float32, copy=False)])
+        self.samples += y.size
+
+        # Frame t spans samples [t * hop - n_fft / 2, t * hop + n_fft / 2)
+        half = self.N_FFT // 2
+        if self.samples < half:
+            return
+        frames = (self.samples - half) // self.HOP_LENGTH + 1
+        if frames <= self._frames:
+            return
+        block = self._analyze(self._frames, frames, final=False)
+        self._commit(block, self._moments, self._log_mel, self._power)
+        self._frames = frames
+        keep_from = max(0, frames * self.HOP_LENGTH - half)
+        self._tail = self._tail[keep_from - self._tail_start:]
+        self._tail_start = keep_from
+
+    def _segment(self, start: int, end: int, pad_value: float, last: float) -> np.ndarray:
+        """Samples [start, end) of the stream, padded with pad_value before it and last after it"""
+        before = max(0, -start)
+        after = max(0, end - self.samples)
+        samples = self._tail[max(start, 0) - self._tail_start:min(end, self.samples) - self._tail_start]
+        if not before and not after:
+            return samples
+        return np.concatenate([
+            np.full(before, pad_value, dtype=np.float32),
+            samples,
+            np.full(after, last, dtype=np.float32)
+        ])
+
+    def _analyze(self, first_frame: int, end_frame: int, final: bool) -> Dict[str, np.ndarray]:
+        """Per-frame features of frames [first_frame, end_frame); final pads the end of the audio like librosa"""
+        half = self.N_FFT // 2
+        start = first_frame * self.HOP_LENGTH - half
+        end = (end_frame - 1) * self.HOP_LENGTH + half
+        last = float(self._tail[-1]) if final and self._tail.size else 0.0
+        # Zero padding for the spectra and RMS, edge padding for the zero-crossing rate
+        y = self._segment(start, end, 0.0, 0.0)
+        y_edge = self._segment(start, end, self._first, last)
+
+        magnitude = np.abs(librosa.stft(y, n_fft=self.N_FFT, hop_length=self.HOP_LENGTH, center=False))
+        power = magnitude ** 2
+        mel = librosa.feature.melspectrogram(S=power, sr=self.sr)
+        return {
+            "rms": librosa.feature.rms(y=y, frame_length=self.N_FFT, hop_length=self.HOP_LENGTH, center=False),
+            "zcr": librosa.feature.zero_crossing_rate(y_edge, frame_length=self.N_FFT, hop_length=self.HOP_LENGTH, center=False),
+            "spectral_centroid": librosa.feature.spectral_centroid(S=magnitude, sr=self.sr),
+            "spectral_bandwidth": librosa.feature.spectral_bandwidth(S=magnitude, sr=self.sr),
+            "spectral_contrast": librosa.feature.spectral_contrast(S=magnitude, sr=self.sr),
+            "rolloff": librosa.feature.spectral_rolloff(S=magnitude, sr=self.sr),
+            "log_mel": librosa.power_to_db(mel, top_db=None),
+            "power": power
+        }
+
+    @staticmethod
+    def _commit(block: Dict[str, np.ndarray], moments: Dict[str, _RunningMoments], log_mel: List[np.ndarray], power: List[np.ndarray]) -> None:
+        for name in _RUNNING_FEATURES:
+            moments[name].update(block[name])
+        log_mel.append(block["log_mel"])
+        power.append(block["power"])
+
+    def features(self) -> Dict[str, float]:
+        """
+        Features of the audio received so far, as extract_all_features_from_audio computes them
+
+        Raises:
+            ValueError: If no audio was received
+        """
+        if not self.samples:
+            raise ValueError("No audio received")
+        moments = {name: value.copy() for name, value in self._moments.items()}
+        log_mel, power = list(self._log_mel), list(self._power)
+        frames = self.samples // self.HOP_LENGTH + 1
+        if frames > self._frames:
+            self._commit(self._analyze(self._frames, frames, final=True), moments, log_mel, power)
+
+        features = {"duration": self.seconds}
+        for name in _RUNNING_FEATURES:
+            features[f"{name}_mean"] = moments[name].mean
+            features[f"{name}_std"] = moments[name].std
+
+        log_mel = np.concatenate(log_mel, axis=1)
+        log_mel = np.maximum(log_mel, log_mel.max() - self.TOP_DB)
+        mfccs = dct(log_mel, axis=0, type=2, norm="ortho")[:13]
+        for i in range(13):
+            features[f"mfcc{i+1}_mean"] = np.mean(mfccs[i])
+            features[f"mfcc{i+1}_std"] = np.std(mfccs[i])
+
+        chroma = librosa.feature.chroma_stft(S=np.concatenate(power, axis=1), sr=self.sr)
+        features["chroma_mean"] = np.mean(chroma)
+        features["chroma_std"] = np.std(chroma)
+        return features
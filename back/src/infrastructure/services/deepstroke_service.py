@@ -1,13 +1,20 @@
+import asyncio
 import os
+import hashlib
 import torch
 import torch.nn as nn
-import io
-from PIL import Image
+import numpy as np
 from fastapi import UploadFile
-from typing import Dict
-import torchvision.transforms as transforms
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 from src.domain.weights import RETFOUND_WEIGHTS_PATH
 from src.infrastructure.services.gemini_service import GeminiService
+from src.infrastructure.services.prompt_registry import prompt_registry
+from src.infrastructure.services.fallback_advice import generate_advice
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
+from src.infrastructure.services.fundus_embedding_store import FundusEmbeddingStore
+from src.infrastructure.services.image_preprocessing import RETFOUND_PREPROCESS, open_image
+from src.infrastructure.services.inference_profile import InferenceProfile, fuse_conv_bn
+from src.infrastructure.services.model_registry import observed_inference
 
 class RETFoundModel(nn.Module):
     """Modelo RETFound simplificado para análisis de fondo de ojo"""
@@ -40,11 +47,16 @@ class RETFoundModel(nn.Module):
             nn.Linear(128, num_classes)
         )
     
+    def extract_features(self, x):
+        """Vector de características (B, 256) de cada imagen; solo depende de la imagen"""
+        return torch.flatten(self.features(x), 1)
+
+    def classify_features(self, features):
+        """Logits (B, num_classes) a partir de los vectores de extract_features"""
+        return self.classifier(features)
+
     def forward(self, x):
-        x = self.features(x)
-        x = torch.flatten(x, 1)
-        x = self.classifier(x)
-        return x
+        return self.classify_features(self.extract_features(x))
 
 def calcular_score_clinico(datos_clinicos: Dict) -> float:
     """
@@ -80,6 +92,117 @@ def calcular_score_clinico(datos_clinicos: Dict) -> float:
     # Asegurar que esté entre 0 y 1
     return max(0.0, min(1.0, score))
 
+# Columnas del formato del backend usadas por el score clínico, y su clave en calcular_score_clinico
+COLUMNAS_SCORE_CLINICO = {
+    'genero': 'genero',
+    'fumador_alguna_ocasion_basal': 'fumador',
+    'hipertension_basal': 'hipertension',
+    'diabetes_mellitus_tipo_2_basal': 'diabetes',
+    'edad_basal': 'edad',
+    'pas_basal': 'pas',
+    'hdl_c_basal': 'hdl_c',
+    'colesterol_total_basal': 'colesterol',
+    'imc_basal': 'imc'
+}
+
+def calcular_score_clinico_vectorizado(datos_clinicos: Mapping) -> np.ndarray:
+    """
+    Versión vectorizada de calcular_score_clinico para cohortes completas
+
+    Aplica las mismas operaciones en float64 y en el mismo orden que la versión
+    escalar (incluida la suma secuencial de los factores ponderados), por lo que el
+    resultado de cada paciente es bit a bit idéntico al de calcular_score_clinico.
+
+    Args:
+        datos_clinicos: Arrays columnares o DataFrame con las mismas claves que
+            calcular_score_clinico (edad, hipertension, diabetes, fumador, pas,
+            hdl_c, colesterol, imc). Las columnas ausentes y los valores vacíos
+            (NaN) toman el mismo valor por defecto que una clave ausente
+
+    Returns:
+        np.ndarray: Score clínico entre 0 y 1 de cada paciente
+    """
+    columnas = [np.asarray(datos_clinicos[clave]) for clave in datos_clinicos.keys()]
+    if not columnas:
+        raise ValueError("Se necesita al menos una columna de datos clínicos")
+    n = len(columnas[0])
+
+    def columna(clave: str, defecto: float) -> np.ndarray:
+        if clave not in datos_clinicos:
+            return np.full(n, defecto, dtype=np.float64)
+        valores = np.asarray(datos_clinicos[clave], dtype=np.float64)
+        return np.where(np.isnan(valores), defecto, valores)
+
+    # Mismos factores y normalizaciones que calcular_score_clinico; deben mantenerse en sincronía
+    valores = [
+        np.minimum(columna('edad', 50) / 100, 1.0),
+        columna('hipertension', 0) * 0.25,
+        columna('diabetes', 0) * 0.20,
+        columna('fumador', 0) * 0.15,
+        np.minimum(columna('pas', 120) / 200, 1.0),
+        np.maximum(0.0, 1 - columna('hdl_c', 1.0) / 2),
+        np.minimum(columna('colesterol', 200) / 400, 1.0),
+        np.minimum(columna('imc', 25) / 50, 1.0)
+    ]
+    pesos = [0.25, 0.20, 0.15, 0.10, 0.15, 0.05, 0.05, 0.05]
+
+    score = np.zeros(n, dtype=np.float64)
+    for valor, peso in zip(valores, pesos):
+        score += valor * peso
+
+    return np.maximum(0.0, np.minimum(1.0, score))
+
+# Preprocesado de las imágenes de fondo de ojo (compartido por la API y el procesamiento por lotes):
+# mismo resultado que Compose([Resize((224, 224)), ToTensor(), Normalize(...)]), normalizando el lote completo
+def decodificar_imagen_fondo(contenido: bytes) -> np.ndarray:
+    """
+    Decodifica y redimensiona una imagen de fondo de ojo a un buffer uint8 (224, 224, 3);
+    un buffer RGB crudo de 224x224 (ya redimensionado por el cliente) se usa tal cual
+    """
+    return RETFOUND_PREPROCESS.to_uint8(open_image(contenido))
+
+def normalizar_imagenes_fondo(buffers: np.ndarray) -> torch.Tensor:
+    """Convierte un lote de buffers uint8 (N, 224, 224, 3) en la entrada de RETFound (N, 3, 224, 224)"""
+    return RETFOUND_PREPROCESS.normalize(buffers)
+
+def cargar_imagen_fondo(contenido: bytes) -> torch.Tensor:
+    """Decodifica y preprocesa una imagen de fondo de ojo a un tensor (3, 224, 224)"""
+    return normalizar_imagenes_fondo(decodificar_imagen_fondo(contenido)[None])[0]
+
+def construir_resultado(data: Dict, score_clinico: float, prob_modelo: float) -> Dict:
+    """
+    Combina el score clínico y la probabilidad del modelo en el resultado de un paciente
+    
+    Args:
+        data: Datos del paciente en formato del backend (0/1)
+        score_clinico: Score de calcular_score_clinico
+        prob_modelo: Probabilidad de ACV estimada por RETFound
+    
+    Returns:
+        Dict: Resultado con probabilidad, nivel de riesgo y recomendación
+    """
+    # Combinar score clínico y modelo
+    peso_clinico = 0.7
+    peso_modelo = 0.3
+    probabilidad_final = (peso_clinico * score_clinico) + (peso_modelo * prob_modelo)
+    
+    riesgo_alto = probabilidad_final > 0.5
+    nivel_riesgo = "MUY ALTO" if probabilidad_final > 0.75 else \
+                  "ALTO" if probabilidad_final > 0.5 else \
+                  "MODERADO" if probabilidad_final > 0.3 else "BAJO"
+    recomendacion = 'Consulta especialista' if riesgo_alto else 'Seguimiento rutinario'
+
+    return {
+        'id_paciente': data['id_paciente'],
+        'probabilidad_acv': round(float(probabilidad_final), 4),
+        'score_clinico': round(float(score_clinico), 4),
+        'score_modelo': round(float(prob_modelo), 4),
+        'nivel_riesgo': nivel_riesgo,
+        'riesgo_alto': riesgo_alto,
+        'recomendacion': recomendacion,
+        **data
+    }
+
 class DeepStrokeService:
     """Servicio para inferencia del modelo DeepSTROKE usando RETFound"""
     _instance = None
@@ -87,14 +210,41 @@ class DeepStrokeService:
     _device = 'cuda' if torch.cuda.is_available() else 'cpu'
     _weights_path = RETFOUND_WEIGHTS_PATH
     _gemini_service = None
+    _model_version = None
+    _embedding_store = None
+    _weight_source = None
+    _inference_profile = None
 
-    def __new__(cls):
+    def __new__(cls, weights_path: Optional[str] = None, inference_profile: Optional[InferenceProfile] = None):
+        # Sin weights_path se comparte una única instancia con los pesos por defecto;
+        # con weights_path (nueva versión del registro de modelos) o un perfil propio se crea otra instancia
+        if weights_path is not None or inference_profile is not None:
+            return cls._create(weights_path or cls._weights_path, inference_profile)
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._load_model()
-            cls._instance._gemini_service = GeminiService()
+            cls._instance = cls._create(cls._weights_path)
         return cls._instance
 
+    @classmethod
+    def _create(cls, weights_path: str, inference_profile: Optional[InferenceProfile] = None) -> "DeepStrokeService":
+        instance = super().__new__(cls)
+        instance._weights_path = weights_path
+        instance._load_model()
+        instance._inference_profile = inference_profile or InferenceProfile.for_model("deepstroke", cls._device)
+        # La huella se calcula con las capas sin fusionar, así no depende del perfil
+        instance._model_version = instance._compute_model_version()
+        instance._aplicar_perfil()
+        # FUNDUS_EMBEDDINGS_PATH vacío desactiva la caché de vectores
+        if os.getenv("FUNDUS_EMBEDDINGS_PATH", "fundus_embeddings.db"):
+            instance._embedding_store = FundusEmbeddingStore()
+        return instance
+
+    @property
+    def gemini_service(self) -> GeminiService:
+        """Servicio de Gemini, creado al generar la primera recomendación (el modelo funciona sin GEMINI_API_KEY)"""
+        if self._gemini_service is None:
+            DeepStrokeService._gemini_service = GeminiService()
+        return self._gemini_service
+
     def _load_model(self):
         """Carga el modelo RETFound desde los pesos"""
         if self._model is None:
@@ -110,9 +260,11 @@ class DeepStrokeService:
                         self._model.load_state_dict(checkpoint['state_dict'])
                     else:
                         self._model.load_state_dict(checkpoint)
+                    self._weight_source = f"checkpoint:{os.path.basename(self._weights_path)}"
                 else:
                     print(f"Pesos no encontrados en: {self._weights_path}")
                     print("Usando modelo con pesos aleatorios")
+                    self._weight_source = "random"
                 
                 self._model.eval()
                 self._model.to(self._device)
@@ -123,118 +275,201 @@ class DeepStrokeService:
                 self._model = RETFoundModel(num_classes=2)
                 self._model.eval()
                 self._model.to(self._device)
+                self._weight_source = "random"
 
-    async def _generate_medical_recommendations(self, prediction_result: Dict) -> str:
-        """Genera recomendaciones médicas personalizadas usando Gemini"""
-        system_prompt = """Eres el Dr. Carlos, un neurólogo especialista en prevención de accidentes cerebrovasculares (ACV) con 15 años de experiencia. 
-        Tu función es ofrecer orientación médica clara, útil y profesional basada en el análisis de riesgo de ACV.
-        
-        IMPORTANTE: Solo puedes responder sobre prevención de ACV y factores de riesgo cardiovascular. 
-        No debes mencionar ni diagnosticar otras enfermedades o condiciones médicas.
+    @property
+    def weight_source(self) -> str:
+        """Origen de los pesos: checkpoint:<archivo> o random (modelo sin entrenar, predicciones sin valor clínico)"""
+        return self._weight_source
+
+    @property
+    def inference_profile(self) -> InferenceProfile:
+        """Perfil de inferencia de RETFound: INFERENCE_DEEPSTROKE_PROFILE o INFERENCE_PROFILE"""
+        return self._inference_profile
+
+    def _aplicar_perfil(self) -> None:
+        """Perfil optimizado: fusiona Conv-BN en el encoder, lo pasa a channels-last y lo compila antes de la primera petición"""
+        if not self._inference_profile.optimized:
+            return
+        self._model.features = fuse_conv_bn(self._model.features)
+        self._inference_profile.prepare(
+            self._model.features,
+            "RETFoundModel.features",
+            lambda n: self._model.features(
+                self._inference_profile.input(torch.zeros(n, 3, 224, 224, device=self._device))
+            )
+        )
+
+    def warm_up(self) -> None:
+        """Pasa un par de imágenes sintéticas por el preprocesado y RETFound (calentamiento al arrancar, sin usar la caché)"""
+        ruido = np.random.default_rng(0).integers(0, 256, (2, 224, 224, 3), dtype=np.uint8)
+        imagenes = normalizar_imagenes_fondo(ruido)
+        self.predict_probabilities(imagenes[:1], imagenes[1:])
+
+    async def generate_medical_recommendations(self, prediction_result: Dict, deadline: Optional[float] = None) -> Tuple[str, bool]:
+        """
+        Genera recomendaciones médicas personalizadas usando Gemini
+
+        Args:
+            prediction_result: Resultado de la predicción con los datos del paciente
+            deadline: Instante (time.monotonic()) en que deben estar listas; después, o si Gemini falla, se usa la plantilla del nivel de riesgo
+
+        Returns:
+            Tuple[str, bool]: Recomendaciones y si son las de la plantilla
+        """
+        prompt = prompt_registry.render(
+            "deepstroke",
+            edad=prediction_result['edad_basal'],
+            genero='Masculino' if prediction_result['genero'] == 1 else 'Femenino',
+            fumador='Sí' if prediction_result['fumador_alguna_ocasion_basal'] == 1 else 'No',
+            hipertension='Sí' if prediction_result['hipertension_basal'] == 1 else 'No',
+            diabetes='Sí' if prediction_result['diabetes_mellitus_tipo_2_basal'] == 1 else 'No',
+            pas=prediction_result['pas_basal'],
+            hdl_c=prediction_result['hdl_c_basal'],
+            colesterol=prediction_result['colesterol_total_basal'],
+            imc=prediction_result['imc_basal'],
+            nivel_riesgo=prediction_result['nivel_riesgo'],
+            probabilidad=f"{prediction_result['probabilidad_acv']:.1%}"
+        )
+
+        # Con plazo, la falta de tiempo o un error de Gemini usan la plantilla; sin plazo los errores se propagan
+        return await generate_advice(
+            self.gemini_service, prompt, "deepstroke", prediction_result['nivel_riesgo'], deadline
+        )
+
+    def _compute_model_version(self) -> str:
+        """
+        Huella del encoder de imágenes: los vectores guardados solo se reutilizan con los mismos pesos.
+        Con pesos aleatorios la huella cambia en cada proceso, así que nunca se reutilizan vectores de otro.
+        """
+        huella = hashlib.sha256()
+        for nombre, tensor in sorted(self._model.features.state_dict().items()):
+            huella.update(nombre.encode())
+            huella.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+        # Con autocast bfloat16 los vectores difieren de los de float32: no se mezclan en la caché
+        if self._inference_profile.bf16:
+            huella.update(b"bf16")
+        return huella.hexdigest()[:16]
+
+    def _embeddings(self, hashes: List[str], tensores: Callable[[List[int]], torch.Tensor]) -> torch.Tensor:
+        """
+        Vectores de características de un lote de imágenes, calculando solo los que no están guardados
         
-        Debes abordar exclusivamente lo siguiente:
-        - Evaluación del nivel de riesgo de ACV (BAJO, MODERADO, ALTO, MUY ALTO)
-        - Factores de riesgo específicos del paciente que pueden mejorarse
-        - Recomendaciones prácticas para reducir el riesgo de ACV
-        - Si es recomendable acudir a una consulta médica especializada
-        - Frecuencia de controles médicos recomendada
-        - Un recordatorio claro de que esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones
+        Args:
+            hashes: SHA-256 del contenido de cada imagen
+            tensores: Devuelve las imágenes preprocesadas (N, 3, 224, 224) de las posiciones pedidas
         
-        Responde con empatía, sencillez y precisión. Máximo 120 palabras. Sé directo y práctico."""
+        Returns:
+            torch.Tensor: Vectores (B, 256) en CPU
+        """
+        guardados = {}
+        if self._embedding_store is not None:
+            guardados = self._embedding_store.get_many(hashes, self._model_version)
+        faltantes = [i for i, h in enumerate(hashes) if h not in guardados]
 
-        user_prompt = f"""
-        Paciente: {prediction_result['edad_basal']} años, {'Masculino' if prediction_result['genero'] == 1 else 'Femenino'}
+        calculados = {}
+        if faltantes:
+            with self._inference_profile.context():
+                vectores = self._model.extract_features(
+                    self._inference_profile.input(tensores(faltantes).to(self._device, non_blocking=True))
+                ).float().cpu()
+            calculados = {hashes[i]: vector for i, vector in zip(faltantes, vectores)}
+            if self._embedding_store is not None:
+                self._embedding_store.put_many(
+                    {h: vector.numpy() for h, vector in calculados.items()},
+                    self._model_version
+                )
+
+        return torch.stack([
+            calculados[h] if h in calculados else torch.from_numpy(guardados[h].copy())
+            for h in hashes
+        ])
+
+    def embeddings_from_bytes(self, contenidos: List[bytes]) -> torch.Tensor:
+        """Vectores de imágenes sin decodificar; las ya vistas no se decodifican ni pasan por el modelo"""
+        hashes = [hashlib.sha256(contenido).hexdigest() for contenido in contenidos]
+        return self._embeddings(
+            hashes,
+            lambda posiciones: normalizar_imagenes_fondo(
+                np.stack([decodificar_imagen_fondo(contenidos[i]) for i in posiciones])
+            )
+        )
+
+    def embeddings_from_tensors(self, hashes: List[str], imagenes: torch.Tensor) -> torch.Tensor:
+        """Vectores de imágenes ya preprocesadas (N, 3, 224, 224), identificadas por el SHA-256 de su archivo"""
+        return self._embeddings(hashes, lambda posiciones: imagenes[posiciones])
+
+    def probabilities_from_embeddings(self, vectores1: torch.Tensor, vectores2: torch.Tensor) -> torch.Tensor:
+        """
+        Probabilidad de ACV del modelo a partir de los vectores de ambos ojos
         
-        Factores de riesgo:
-        - Fumador: {'Sí' if prediction_result['fumador_alguna_ocasion_basal'] == 1 else 'No'}
-        - Hipertensión: {'Sí' if prediction_result['hipertension_basal'] == 1 else 'No'}
-        - Diabetes: {'Sí' if prediction_result['diabetes_mellitus_tipo_2_basal'] == 1 else 'No'}
-        - Presión arterial: {prediction_result['pas_basal']} mmHg
-        - HDL colesterol: {prediction_result['hdl_c_basal']}
-        - Colesterol total: {prediction_result['colesterol_total_basal']}
-        - IMC: {prediction_result['imc_basal']}
+        Args:
+            vectores1: Vectores del ojo derecho, (B, 256)
+            vectores2: Vectores del ojo izquierdo, (B, 256)
+        
+        Returns:
+            torch.Tensor: Probabilidad de cada paciente, (B,) en CPU
+        """
+        n = vectores1.shape[0]
+        with self._inference_profile.context():
+            logits = self._model.classify_features(torch.cat([vectores1, vectores2]).to(self._device)).float()
+            
+            # Combinar características de ambas imágenes
+            combined_features = (logits[:n] + logits[n:]) / 2
+            probabilities = torch.softmax(combined_features, dim=1)
+        return probabilities[:, 1].cpu()
+
+    def predict_probabilities(self, ojos1: torch.Tensor, ojos2: torch.Tensor) -> torch.Tensor:
+        """
+        Probabilidad de ACV del modelo para un lote de pacientes
         
-        Resultado del análisis:
-        - Nivel de riesgo: {prediction_result['nivel_riesgo']}
-        - Probabilidad de ACV: {prediction_result['probabilidad_acv']:.1%}
+        Args:
+            ojos1: Imágenes preprocesadas del ojo derecho, (B, 3, 224, 224)
+            ojos2: Imágenes preprocesadas del ojo izquierdo, (B, 3, 224, 224)
         
-        Dr. Carlos, ¿qué recomendaciones específicas tienes para este paciente?
+        Returns:
+            torch.Tensor: Probabilidad de cada paciente, (B,) en CPU
         """
+        n = ojos1.shape[0]
+        with self._inference_profile.context():
+            # Ambos ojos en un único forward; en eval cada muestra es independiente del resto del lote
+            vectores = self._model.extract_features(
+                self._inference_profile.input(torch.cat([ojos1, ojos2]).to(self._device, non_blocking=True))
+            ).float()
+        return self.probabilities_from_embeddings(vectores[:n], vectores[n:])
 
-        try:
-            recommendations = await self._gemini_service.generate_response(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                context=f"ACV - Paciente {prediction_result['id_paciente']}"
-            )
-            return recommendations
-        except Exception as e:
-            print(f"Error generando recomendaciones con Gemini: {str(e)}")
-            return "No se pudieron generar recomendaciones personalizadas en este momento."
-
-    async def predict(self, data: Dict, ojo1: UploadFile, ojo2: UploadFile) -> Dict:
-        # Procesar imágenes directamente desde UploadFile
-        image1 = Image.open(io.BytesIO(await ojo1.read())).convert('RGB')
-        image2 = Image.open(io.BytesIO(await ojo2.read())).convert('RGB')
+    @observed_inference
+    def probabilities_from_bytes(self, ojos1: List[bytes], ojos2: List[bytes]) -> torch.Tensor:
+        """
+        Probabilidad de ACV del modelo a partir de las imágenes sin decodificar de cada paciente
         
-        transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-        ])
+        Una imagen ya analizada en otra visita no vuelve a pasar por el modelo.
         
-        image1 = transform(image1).unsqueeze(0).to(self._device)
-        image2 = transform(image2).unsqueeze(0).to(self._device)
+        Returns:
+            torch.Tensor: Probabilidad de cada paciente, (B,) en CPU
+        """
+        n = len(ojos1)
+        vectores = self.embeddings_from_bytes(list(ojos1) + list(ojos2))
+        return self.probabilities_from_embeddings(vectores[:n], vectores[n:])
 
+    async def predict(self, data: Dict, ojo1: UploadFile, ojo2: UploadFile, deadline: Optional[float] = None) -> Dict:
         # Score clínico
-        datos_clinicos = {
-            'genero': data['genero'],
-            'fumador': data['fumador_alguna_ocasion_basal'],
-            'hipertension': data['hipertension_basal'],
-            'diabetes': data['diabetes_mellitus_tipo_2_basal'],
-            'edad': data['edad_basal'],
-            'pas': data['pas_basal'],
-            'hdl_c': data['hdl_c_basal'],
-            'colesterol': data['colesterol_total_basal'],
-            'imc': data['imc_basal']
-        }
+        datos_clinicos = {clave: data[columna] for columna, clave in COLUMNAS_SCORE_CLINICO.items()}
         score_clinico = calcular_score_clinico(datos_clinicos)
 
-        # Predicción modelo
-        with torch.no_grad():
-            features1 = self._model(image1)
-            features2 = self._model(image2)
-            
-            # Combinar características de ambas imágenes
-            combined_features = (features1 + features2) / 2
-            probabilities = torch.softmax(combined_features, dim=1)
-            prob_modelo = probabilities[0, 1].item()
-
-        # Combinar score clínico y modelo
-        peso_clinico = 0.7
-        peso_modelo = 0.3
-        probabilidad_final = (peso_clinico * score_clinico) + (peso_modelo * prob_modelo)
-        
-        riesgo_alto = probabilidad_final > 0.5
-        nivel_riesgo = "MUY ALTO" if probabilidad_final > 0.75 else \
-                      "ALTO" if probabilidad_final > 0.5 else \
-                      "MODERADO" if probabilidad_final > 0.3 else "BAJO"
-        recomendacion = 'Consulta especialista' if riesgo_alto else 'Seguimiento rutinario'
+        # Predicción modelo con los vectores de ambos ojos
+        with memory_diagnostics.stage("upload"):
+            imagenes1, imagenes2 = [await ojo1.read()], [await ojo2.read()]
+        # La caché SQLite de vectores, la decodificación y RETFound bloquean: fuera del event loop
+        probabilidades = await asyncio.to_thread(self.probabilities_from_bytes, imagenes1, imagenes2)
+        prob_modelo = probabilidades[0].item()
 
         # Crear resultado base
-        result = {
-            'id_paciente': data['id_paciente'],
-            'probabilidad_acv': round(float(probabilidad_final), 4),
-            'score_clinico': round(float(score_clinico), 4),
-            'score_modelo': round(float(prob_modelo), 4),
-            'nivel_riesgo': nivel_riesgo,
-            'riesgo_alto': riesgo_alto,
-            'recomendacion': recomendacion,
-            **data
-        }
+        result = construir_resultado(data, score_clinico, prob_modelo)
 
         # Generar recomendaciones médicas personalizadas
-        medical_recommendations = await self._generate_medical_recommendations(result)
+        medical_recommendations, de_respaldo = await self.generate_medical_recommendations(result, deadline)
         result['recomendaciones_medicas'] = medical_recommendations
+        result['recomendaciones_de_respaldo'] = de_respaldo
 
         return result 
\ No newline at end of file
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_COLUMNS = ("id", "patient_id", "modality", "classification", "result", "created_at")
+
+class EvaluationHistoryStore:
+    """
+    Indexed store of the evaluation results of every patient.
+
+    Every evaluation (lesion, dental, cough, dermis, skin, DeepSTROKE) is recorded
+    with its patient and modality so the history of a patient and the latest result
+    of each modality are read back from an index instead of running the models or
+    Gemini again. Writes never wait on the disk: record() only queues the result and
+    a background thread inserts the queued results in batches, one transaction each,
+    so a result is readable about EVALUATION_HISTORY_FLUSH_MS after its response.
+    Backed by a SQLite file in WAL mode: reads use their own connection and are not
+    blocked by the writer.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store and start its writer thread
+
+        Args:
+            db_path: Path of the SQLite file. If not provided, looks for EVALUATION_HISTORY_PATH (default evaluation_history.db)
+        """
+        self.db_path = db_path or os.getenv("EVALUATION_HISTORY_PATH") or "evaluation_history.db"
+        self.flush_interval = float(os.getenv("EVALUATION_HISTORY_FLUSH_MS", "200")) / 1000
+        self.max_batch = int(os.getenv("EVALUATION_HISTORY_MAX_BATCH", "500"))
+        self._queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("EVALUATION_HISTORY_QUEUE_SIZE", "10000")))
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0, "write_errors": 0}
+        self._overflowing = False
+
+        self._writer = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._writer:
+            self._writer.execute("PRAGMA journal_mode=WAL")
+            self._writer.execute("PRAGMA synchronous=NORMAL")
+            self._writer.execute(
+                """
+                CREATE TABLE IF NOT EXISTS evaluations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    patient_id TEXT,
+                    modality TEXT NOT NULL,
+                    classification TEXT,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            # History of a patient per modality and across modalities, newest first
+            self._writer.execute(
+                "CREATE INDEX IF NOT EXISTS idx_evaluations_patient_modality ON evaluations (patient_id, modality, created_at DESC)"
+            )
+            self._writer.execute(
+                "CREATE INDEX IF NOT EXISTS idx_evaluations_patient ON evaluations (patient_id, created_at DESC)"
+            )
+
+        self._lock = threading.Lock()
+        self._reader = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._reader.row_factory = sqlite3.Row
+        self._thread = threading.Thread(target=self._write_loop, name="evaluation-history-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, patient_id: Optional[str], modality: str, result: Dict[str, Any], classification: Optional[str] = None) -> None:
+        """
+        Queue an evaluation result to be saved (returns immediately)
+
+        Args:
+            patient_id: Patient identifier. Results without one are not saved: no history would list them
+            modality: Evaluation type (lesion, dental, cough, dermis, skin, deepstroke)
+            result: Response returned to the client
+            classification: Short summary of the result. Defaults to result["classification"]
+        """
+        if not patient_id:
+            return
+        if classification is None:
+            classification = result.get("classification")
+        row = (patient_id, modality, classification, result, time.time())
+        try:
+            self._queue.put_nowait(row)
+            self.stats["recorded"] += 1
+        except queue.Full:
+            # Logged once per overflow, not once per dropped result
+            if not self._overflowing:
+                print("Evaluation history queue full, dropping results until the writer catches up")
+            self._overflowing = True
+            self.stats["dropped"] += 1
+
+    def _write_loop(self) -> None:
+        while True:
+            rows = [self._queue.get()]
+            # Let the results of concurrent requests gather so they share one transaction
+            time.sleep(self.flush_interval)
+            while len(rows) < self.max_batch:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._writer:
+                    self._writer.executemany(
+                        "INSERT INTO evaluations (patient_id, modality, classification, result, created_at) VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (patient_id, modality, classification, json.dumps(result, ensure_ascii=False, default=str), created_at)
+                            for patient_id, modality, classification, result, created_at in rows
+                        ]
+                    )
+                self.stats["written"] += len(rows)
+                self._overflowing = False
+            except Exception as e:
+                self.stats["write_errors"] += len(rows)
+                print(f"Error writing {len(rows)} evaluation history records: {str(e)}")
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued result is written (used at shutdown)"""
+        self._queue.join()
+
+    def _fetch(self, query: str, params: tuple) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._reader.execute(query, params).fetchall()
+        return [
+            {
+                "id": row["id"],
+                "patient_id": row["patient_id"],
+                "modality": row["modality"],
+                "classification": row["classification"],
+                "created_at": row["created_at"],
+                "result": json.loads(row["result"])
+            }
+            for row in rows
+        ]
+
+    def history(
+        self,
+        patient_id: str,
+        modality: Optional[str] = None,
+        limit: int = 50,
+        before: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluations of a patient, newest first
+
+        Args:
+            patient_id: Patient identifier
+            modality: Only this evaluation type
+            limit: Largest number of evaluations returned
+            before: Only evaluations created before this timestamp (pagination)
+
+        Returns:
+            List[Dict[str, Any]]: Evaluations with their stored result
+        """
+        conditions = ["patient_id = ?"]
+        params: list = [patient_id]
+        if modality is not None:
+            conditions.append("modality = ?")
+            params.append(modality)
+        if before is not None:
+            conditions.append("created_at < ?")
+            params.append(before)
+        return self._fetch(
+            f"SELECT {', '.join(_COLUMNS)} FROM evaluations WHERE {' AND '.join(conditions)} ORDER BY created_at DESC LIMIT ?",
+            (*params, limit)
+        )
+
+    def latest(self, patient_id: str, modality: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest evaluation of a patient for each modality
+
+        Args:
+            patient_id: Patient identifier
+            modality: Only this evaluation type
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Latest evaluation by modality (empty if the patient has none)
+        """
+        if modality is not None:
+            return {evaluation["modality"]: evaluation for evaluation in self.history(patient_id, modality, limit=1)}
+        # One index seek per modality of the patient instead of scanning the whole history
+        return {
+            evaluation["modality"]: evaluation
+            for evaluation in self._fetch(
+                f"""
+                SELECT {', '.join(_COLUMNS)} FROM evaluations AS e
+                WHERE patient_id = ? AND id = (
+                    SELECT id FROM evaluations
+                    WHERE patient_id = e.patient_id AND modality = e.modality
+                    ORDER BY created_at DESC LIMIT 1
+                )
+                """,
+                (patient_id,)
+            )
+        }
+
+    async def history_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.history, *args, **kwargs)
+
+    async def latest_async(self, *args, **kwargs) -> Dict[str, Dict[str, Any]]:
+        return await asyncio.to_thread(self.latest, *args, **kwargs)
@@ -0,0 +1,205 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
+from src.infrastructure.services.prompt_registry import RenderedPrompt
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
+
+# Pre-authored advice returned instead of Gemini's when it is not ready within the latency
+# budget of the request. Each modality lists (keywords, advice) by decreasing severity: the
+# first entry whose keyword appears in the classification is used, otherwise the default.
+# Texts are in the language of the modality's prompt.
+
+_LESION_ES: List[Tuple[Tuple[str, ...], str]] = [
+    (("melanoma",),
+     "El resultado sugiere un posible melanoma. Pide una cita con un dermatólogo lo antes posible para una revisión presencial "
+     "y, si la indica, una biopsia. Acude antes si la lesión crece, cambia de forma o color, sangra o pica. "
+     "Mientras tanto evita el sol directo sobre la zona y usa protector solar."),
+    (("basal cell", "basocelular"),
+     "El resultado sugiere un posible carcinoma basocelular, un cáncer de piel de crecimiento lento que se trata con buenos resultados. "
+     "Consulta a un dermatólogo en las próximas semanas; si la lesión sangra, forma costra o no cicatriza, adelanta la consulta. "
+     "Protege la piel del sol."),
+    (("actinic", "actínica"),
+     "El resultado sugiere una posible queratosis actínica, una lesión causada por el sol que puede evolucionar si no se trata. "
+     "Consulta a un dermatólogo para valorar su tratamiento y revisa otras zonas expuestas al sol. Usa protector solar a diario."),
+    (("vascular",),
+     "El resultado sugiere una lesión vascular, por lo general benigna. Consulta a un médico si crece, sangra con facilidad o duele."),
+    (("dermatofibroma",),
+     "El resultado sugiere un dermatofibroma, un nódulo benigno frecuente. No suele necesitar tratamiento; consulta a un dermatólogo si cambia de tamaño o molesta."),
+    (("keratosis", "queratosis"),
+     "El resultado sugiere una queratosis benigna. No suele requerir tratamiento, pero conviene que un dermatólogo la revise si cambia o se irrita."),
+    (("nevi", "nevus", "melanocytic", "lunar"),
+     "El resultado sugiere un lunar (nevus) benigno. Vigila los cambios con la regla ABCDE (asimetría, bordes, color, diámetro y evolución) "
+     "y consulta a un dermatólogo si aparece alguno."),
+]
+
+_FALLBACK_ADVICE: Dict[str, Tuple[List[Tuple[Tuple[str, ...], str]], str, str]] = {
+    "lesion": (
+        [
+            (("melanoma",),
+             "The result suggests a possible melanoma. Book an appointment with a dermatologist as soon as possible for an in-person "
+             "examination and, if indicated, a biopsy. Seek care sooner if the lesion grows, changes shape or color, bleeds or itches. "
+             "Meanwhile keep the area out of direct sun and use sunscreen."),
+            (("basal cell",),
+             "The result suggests a possible basal cell carcinoma, a slow-growing skin cancer with very good treatment outcomes. "
+             "See a dermatologist within the next few weeks, sooner if the lesion bleeds, crusts or does not heal. Protect your skin from the sun."),
+            (("actinic",),
+             "The result suggests a possible actinic keratosis, a sun-induced lesion that can progress if untreated. "
+             "See a dermatologist to discuss treatment and have other sun-exposed areas checked. Use sunscreen daily."),
+            (("vascular",),
+             "The result suggests a vascular lesion, usually benign. See a doctor if it grows, bleeds easily or hurts."),
+            (("dermatofibroma",),
+             "The result suggests a dermatofibroma, a common benign nodule. It rarely needs treatment; see a dermatologist if it changes size or bothers you."),
+            (("keratosis",),
+             "The result suggests a benign keratosis. It usually needs no treatment, but have a dermatologist check it if it changes or becomes irritated."),
+            (("nevi", "nevus", "melanocytic"),
+             "The result suggests a benign mole (nevus). Watch for changes using the ABCDE rule (asymmetry, border, color, diameter, evolution) "
+             "and see a dermatologist if any appear."),
+        ],
+        "Have a dermatologist examine the lesion, sooner if it grows, changes shape or color, bleeds or itches. Protect your skin from the sun.",
+        "This is a preliminary automated guide and does not replace a medical diagnosis."
+    ),
+    "skin": (
+        _LESION_ES,
+        "Consulta a un dermatólogo para que revise la zona, antes si la lesión crece, cambia de forma o color, sangra o pica. Protege la piel del sol.",
+        "Esta orientación se basa en inteligencia artificial y no reemplaza un diagnóstico médico."
+    ),
+    "dermis": (
+        _LESION_ES,
+        "Consulta a un dermatólogo para confirmar la condición y recibir el tratamiento adecuado. Mantén la zona limpia e hidratada, "
+        "evita rascarte y acude antes si aparece dolor, fiebre, supuración o la lesión se extiende rápidamente.",
+        "Esta orientación se basa en inteligencia artificial y no reemplaza un diagnóstico médico."
+    ),
+    "dental": (
+        [
+            (("ulcer", "úlcera", "ulcera"),
+             "La imagen podría mostrar una úlcera bucal. La mayoría curan solas en una o dos semanas; evita comidas ácidas o picantes "
+             "y acude al dentista si dura más de dos semanas, es muy dolorosa o se repite con frecuencia."),
+            (("caries", "cavity"),
+             "La imagen podría mostrar caries. Pide cita con tu dentista para tratarla antes de que avance; si aparece dolor intenso "
+             "o inflamación, acude cuanto antes. Cepíllate con pasta con flúor dos veces al día y reduce los azúcares."),
+            (("gingivitis",),
+             "La imagen podría mostrar gingivitis (inflamación de las encías). Mejora el cepillado y usa hilo dental a diario; "
+             "acude al dentista para una limpieza profesional si las encías sangran o siguen inflamadas."),
+            (("calculus", "cálculo", "calculo", "tartar", "sarro"),
+             "La imagen podría mostrar sarro (cálculo dental). Solo se elimina con una limpieza profesional: pide cita con tu dentista "
+             "y mantén un buen cepillado y el uso de hilo dental."),
+            (("discoloration", "decoloración", "mancha"),
+             "La imagen podría mostrar un cambio de color en los dientes. Consulta a tu dentista para conocer la causa y las opciones "
+             "de tratamiento; reduce el café, el té y el tabaco."),
+            (("hypodontia", "hipodoncia"),
+             "La imagen podría indicar hipodoncia (ausencia de algunos dientes). Un dentista u ortodoncista puede valorar las opciones "
+             "de tratamiento en una consulta presencial."),
+        ],
+        "Acude a tu dentista para una revisión presencial, antes si aparece dolor, inflamación o sangrado. "
+        "Cepíllate dos veces al día con pasta con flúor y usa hilo dental.",
+        "Esta información es solo orientativa y no reemplaza el diagnóstico profesional."
+    ),
+    "cough": (
+        [
+            (("covid",),
+             "La tos podría estar asociada a COVID-19. Hazte una prueba, limita el contacto con otras personas y vigila tus síntomas. "
+             "Busca atención médica urgente si tienes dificultad para respirar, dolor en el pecho o fiebre alta persistente."),
+            (("symptomatic", "sintomática", "sintomatica"),
+             "La tos presenta características de una tos con síntomas. Descansa, mantente hidratado y vigila su evolución; "
+             "consulta a un médico si dura más de una semana, empeora o aparece fiebre o dificultad para respirar."),
+            (("healthy", "normal"),
+             "La tos parece normal. Mantente hidratado y observa su evolución; consulta a un médico si persiste más de dos semanas o aparecen otros síntomas."),
+        ],
+        "Observa la evolución de la tos y consulta a un médico si persiste, empeora o aparece fiebre o dificultad para respirar.",
+        "Esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones."
+    ),
+    "deepstroke": (
+        [
+            (("muy alto",),
+             "El riesgo estimado de ACV es muy alto. Pide una consulta con tu médico o un neurólogo en los próximos días para revisar "
+             "tus factores de riesgo. Acude a urgencias de inmediato ante pérdida de fuerza o sensibilidad en un lado del cuerpo, "
+             "dificultad para hablar o pérdida súbita de visión."),
+            (("alto",),
+             "El riesgo estimado de ACV es alto. Consulta a tu médico en las próximas semanas para controlar la presión arterial, "
+             "el colesterol y la glucosa. Deja de fumar, reduce la sal y haz actividad física regular."),
+            (("moderado",),
+             "El riesgo estimado de ACV es moderado. Revisa con tu médico tus factores de riesgo en un control anual, vigila la presión "
+             "arterial y mantén una dieta equilibrada y actividad física regular."),
+            (("bajo",),
+             "El riesgo estimado de ACV es bajo. Mantén tus hábitos saludables: no fumar, actividad física, dieta equilibrada y "
+             "controles médicos periódicos."),
+        ],
+        "Revisa con tu médico tus factores de riesgo cardiovascular en un control periódico.",
+        "Esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones."
+    ),
+}
+
+def fallback_advice(modality: str, classification: str) -> str:
+    """
+    Pre-authored advice for a classification, answered instantly
+
+    Args:
+        modality: Evaluation type (lesion, dental, cough, dermis, skin, deepstroke)
+        classification: Classification returned to the client (for DeepSTROKE, the risk level)
+
+    Returns:
+        str: Advice of the most severe label found in the classification, or the modality's general advice
+    """
+    entries, default, disclaimer = _FALLBACK_ADVICE[modality]
+    text = classification.lower().replace("_", " ").replace("-", " ")
+    for keywords, advice in entries:
+        if any(keyword in text for keyword in keywords):
+            return f"{advice} {disclaimer}"
+    return f"{default} {disclaimer}"
+
+# Advice answered from the templates instead of Gemini, by modality
+fallback_counts: Counter = Counter()
+
+async def generate_advice(
+    dialog_service: DialogSystemServiceInterface,
+    prompt: RenderedPrompt,
+    modality: str,
+    classification: str,
+    deadline: Optional[float] = None
+) -> Tuple[str, bool]:
+    """
+    Medical advice from Gemini, or from the pre-authored templates when it is not ready in time or fails
+
+    With a deadline (the evaluation routes) the client already has its classification, so a
+    Gemini error (rate limited after retries, unavailable, empty or truncated answer) is also
+    answered from the templates. Without one (jobs, batch screening) errors are raised, so the
+    caller can report them and retry.
+
+    Args:
+        dialog_service: Dialog service for the medical advice
+        prompt: Rendered advice prompt
+        modality: Evaluation type, selecting the templates
+        classification: Classification the fallback advice is chosen for
+        deadline: time.monotonic() by which the advice is needed; None waits for Gemini however long it takes
+
+    Returns:
+        Tuple[str, bool]: Advice and whether it is the fallback template
+
+    Raises:
+        DialogServiceError: If Gemini fails and there is no deadline
+    """
+    request = dialog_service.generate_response(
+        system_prompt=prompt.system_prompt,
+        user_prompt=prompt.user_prompt,
+        max_output_tokens=prompt.output_token_limit
+    )
+    with memory_diagnostics.stage("advice"):
+        if deadline is None:
+            return await request, False
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining <= 0:
+                request.close()
+                raise asyncio.TimeoutError
+            # The Gemini call is cancelled at the deadline, releasing its dispatcher slot
+            return await asyncio.wait_for(request, timeout=remaining), False
+        except asyncio.TimeoutError:
+            fallback_counts[modality] += 1
+            return fallback_advice(modality, classification), True
+        except DialogServiceError as e:
+            print(f"Gemini advice for {modality} failed, answering from the templates: {e.code}")
+            fallback_counts[modality] += 1
+            return fallback_advice(modality, classification), True
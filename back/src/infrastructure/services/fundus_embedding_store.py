@@ -0,0 +1,92 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+import numpy as np
+
+class FundusEmbeddingStore:
+    """
+    On-disk store of fundus image feature vectors.
+    
+    Vectors are keyed by the SHA-256 of the image file content and the version of
+    the encoder that produced them, so an archived image sent again on a later
+    visit is scored without running the image model, and a new model version never
+    reuses vectors of the previous one. Backed by a SQLite file in WAL mode, shared
+    by every process (API workers, batch CLI) pointing to the same path.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize the store
+        
+        Args:
+            db_path: Path of the SQLite file. If not provided, looks for FUNDUS_EMBEDDINGS_PATH (default fundus_embeddings.db)
+        """
+        self.db_path = db_path or os.getenv("FUNDUS_EMBEDDINGS_PATH") or "fundus_embeddings.db"
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    content_hash TEXT NOT NULL,
+                    model_version TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (content_hash, model_version)
+                )
+                """
+            )
+        self.stats = {"hits": 0, "misses": 0}
+    
+    def get_many(self, content_hashes: Iterable[str], model_version: str) -> Dict[str, np.ndarray]:
+        """
+        Look up the vectors of several images
+        
+        Args:
+            content_hashes: SHA-256 of the image files
+            model_version: Version of the encoder
+            
+        Returns:
+            Dict[str, np.ndarray]: float32 vector of every image found, by hash
+        """
+        content_hashes = list(dict.fromkeys(content_hashes))
+        rows = []
+        # Chunked to stay below SQLite's limit of bound parameters per statement
+        for start in range(0, len(content_hashes), 500):
+            chunk = content_hashes[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            with self._lock:
+                rows += self._connection.execute(
+                    f"SELECT content_hash, vector FROM embeddings WHERE model_version = ? AND content_hash IN ({placeholders})",
+                    (model_version, *chunk)
+                ).fetchall()
+        found = {content_hash: np.frombuffer(vector, dtype=np.float32) for content_hash, vector in rows}
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(content_hashes) - len(found)
+        return found
+    
+    def put_many(self, vectors: Dict[str, np.ndarray], model_version: str) -> None:
+        """
+        Save the vectors of several images
+        
+        Args:
+            vectors: float32 vector of every image, by SHA-256 of the file
+            model_version: Version of the encoder that produced them
+        """
+        if not vectors:
+            return
+        now = time.time()
+        rows = [
+            (content_hash, model_version, int(vector.size), np.ascontiguousarray(vector, dtype=np.float32).tobytes(), now)
+            for content_hash, vector in vectors.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (content_hash, model_version, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
@@ -0,0 +1,172 @@
+import asyncio
+import math
+import os
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+from google.api_core import exceptions as google_exceptions
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+
+T = TypeVar("T")
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for asyncio.
+
+    Tokens refill at rate per second up to capacity. Each call reserves a token,
+    possibly driving the balance negative, and sleeps until its reservation is
+    covered, so waiters are served in order without a lock.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, max_wait: float) -> None:
+        """
+        Take a token, waiting for it if necessary
+
+        Args:
+            max_wait: Longest acceptable wait in seconds
+
+        Raises:
+            DialogServiceError: If the token would not be available within max_wait
+        """
+        self._refill()
+        wait = max(0.0, (1 - self.tokens) / self.rate)
+        if wait > max_wait:
+            raise DialogServiceError(
+                "rate_limited",
+                f"Local rate limit reached, next slot in {wait:.1f}s",
+                retryable=True,
+                status_code=429,
+                retry_after=math.ceil(wait)
+            )
+        self.tokens -= 1
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+class GeminiDispatcher:
+    """
+    Dispatcher in front of every Gemini call.
+
+    Calls are paced by a token bucket sized to the API quota, limited by a global
+    concurrency cap and retried with jittered exponential backoff on retryable
+    errors. Failures are raised as DialogServiceError instead of being turned into
+    a successful-looking text, so callers can stop instead of wasting work.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_queue_wait: Optional[float] = None
+    ):
+        """
+        Initialize the dispatcher
+
+        Args:
+            requests_per_minute: Request quota (GEMINI_REQUESTS_PER_MINUTE, default 60)
+            burst: Requests allowed at once after an idle period (GEMINI_BURST, default 10)
+            max_concurrency: Concurrent requests to Gemini (GEMINI_MAX_CONCURRENCY, default 8)
+            max_retries: Retries of a retryable error (GEMINI_MAX_RETRIES, default 3)
+            timeout: Timeout in seconds of one attempt (GEMINI_TIMEOUT_SECONDS, default 30)
+            max_queue_wait: Longest wait for the rate limit or a concurrency slot (GEMINI_MAX_QUEUE_WAIT_SECONDS, default 20)
+        """
+        requests_per_minute = requests_per_minute or float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+        burst = burst or int(os.getenv("GEMINI_BURST", "10"))
+        self.bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=burst)
+        self.max_concurrency = max_concurrency or int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+        self.timeout = timeout or float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+        self.max_queue_wait = max_queue_wait or float(os.getenv("GEMINI_MAX_QUEUE_WAIT_SECONDS", "20"))
+        self.backoff_base = 0.5
+        self.backoff_cap = 8.0
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.in_flight = 0
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a Gemini request under the rate limit, concurrency cap and retry policy
+
+        Args:
+            request: Coroutine factory performing one attempt of the request
+
+        Returns:
+            T: Result of the first successful attempt
+
+        Raises:
+            DialogServiceError: If the request failed with a non-retryable error or ran out of retries
+        """
+        for attempt in range(self.max_retries + 1):
+            # Local limits are not retried here: waiting longer than max_queue_wait is what they prevent
+            await self._acquire_slot()
+            try:
+                return await self._attempt(request)
+            except DialogServiceError as error:
+                if not error.retryable or attempt == self.max_retries:
+                    raise
+            # Full jitter: spreads retries of concurrent callers so they do not hit the quota together
+            await asyncio.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+
+    async def _acquire_slot(self) -> None:
+        """Take a rate limit token and a concurrency slot"""
+        await self.bucket.acquire(self.max_queue_wait)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_queue_wait)
+        except asyncio.TimeoutError:
+            raise DialogServiceError(
+                "rate_limited",
+                f"All {self.max_concurrency} Gemini slots are busy",
+                retryable=True,
+                status_code=429,
+                retry_after=math.ceil(self.max_queue_wait)
+            )
+
+    async def _attempt(self, request: Callable[[], Awaitable[T]]) -> T:
+        """Run one attempt in an acquired slot and release it"""
+        self.in_flight += 1
+        try:
+            return await asyncio.wait_for(request(), timeout=self.timeout)
+        except DialogServiceError:
+            raise
+        except Exception as e:
+            raise self._to_dialog_error(e) from e
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def _to_dialog_error(self, error: Exception) -> DialogServiceError:
+        if isinstance(error, asyncio.TimeoutError):
+            return DialogServiceError("timeout", f"Gemini did not answer within {self.timeout:.0f}s", retryable=True, status_code=504)
+        if isinstance(error, google_exceptions.ResourceExhausted):
+            return DialogServiceError("quota_exhausted", str(error), retryable=True, status_code=429, retry_after=30)
+        if isinstance(error, google_exceptions.TooManyRequests):
+            return DialogServiceError("rate_limited", str(error), retryable=True, status_code=429, retry_after=5)
+        if isinstance(error, (
+            google_exceptions.ServiceUnavailable,
+            google_exceptions.InternalServerError,
+            google_exceptions.DeadlineExceeded,
+            google_exceptions.GatewayTimeout
+        )):
+            return DialogServiceError("upstream_unavailable", str(error), retryable=True, status_code=503, retry_after=5)
+        return DialogServiceError("upstream_error", str(error), retryable=False, status_code=502)
+
+_default_dispatcher: Optional[GeminiDispatcher] = None
+
+def get_gemini_dispatcher() -> GeminiDispatcher:
+    """Dispatcher shared by every GeminiService instance of the process"""
+    global _default_dispatcher
+    if _default_dispatcher is None:
+        _default_dispatcher = GeminiDispatcher()
+    return _default_dispatcher
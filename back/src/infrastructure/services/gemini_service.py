@@ -1,17 +1,26 @@
 import os
+from collections import OrderedDict
 import google.generativeai as genai
-from typing import Optional
+from typing import Dict, List, Optional
 from src.domain.interfaces.dialog_system_service import DialogSystemServiceInterface
+from src.domain.exceptions.dialog_service_error import DialogServiceError
+from src.infrastructure.services.gemini_dispatcher import GeminiDispatcher, get_gemini_dispatcher
 
 class GeminiService(DialogSystemServiceInterface):
     """Implementation of the AI service using Google Gemini"""
+
+    MODEL_NAME = 'gemini-2.5-flash'
+    # Models are bound to their system instruction; shared by every instance of the process
+    _models: "OrderedDict[str, genai.GenerativeModel]" = OrderedDict()
+    _max_cached_models = 64
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, dispatcher: Optional[GeminiDispatcher] = None):
         """
         Initialize the Gemini service
         
         Args:
             api_key: Google Gemini API key. If not provided, looks for it in environment variables
+            dispatcher: Rate limiting and retry dispatcher. If not provided, the one shared by the process is used
         """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         if not self.api_key:
@@ -19,13 +28,14 @@ class GeminiService(DialogSystemServiceInterface):
         
         # Configure Gemini
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.dispatcher = dispatcher or get_gemini_dispatcher()
     
     async def generate_response(
         self,
         system_prompt: str,
         user_prompt: str,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        max_output_tokens: Optional[int] = None
     ) -> str:
         """
         Generate a response using Gemini
@@ -34,26 +44,92 @@ class GeminiService(DialogSystemServiceInterface):
             system_prompt: Instructions on how the model should respond
             user_prompt: User's question or prompt
             context: Optional additional context for the conversation
+            max_output_tokens: Optional output token limit, thinking included (gemini-2.5-flash counts
+                its thinking against it and this SDK cannot set a thinking budget)
             
         Returns:
             str: Response generated by the model
+            
+        Raises:
+            DialogServiceError: If Gemini is rate limited, unavailable, returns no text or is cut off by the token cap
         """
+        # The system prompt goes as system instruction, only the variable part is sent as content
+        model = self._get_model(system_prompt)
+        contents = f"Context: {context}\n\n{user_prompt}" if context else user_prompt
+        generation_config = self._generation_config(max_output_tokens)
+        
+        # Generate response
+        response = await self.dispatcher.call(
+            lambda: model.generate_content_async(contents, generation_config=generation_config)
+        )
+        return self._text(response)
+
+    async def generate_chat_response(
+        self,
+        system_prompt: str,
+        contents: List[Dict],
+        max_output_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Generate the next turn of a conversation using Gemini's native multi-turn contents
+
+        Args:
+            system_prompt: Instructions on how the model should respond
+            contents: Conversation turns, oldest first, as {"role": "user" | "model", "parts": [text]}
+            max_output_tokens: Optional output token limit, thinking included (gemini-2.5-flash counts
+                its thinking against it and this SDK cannot set a thinking budget)
+
+        Returns:
+            str: Response generated by the model
+
+        Raises:
+            DialogServiceError: If Gemini is rate limited, unavailable, returns no text or is cut off by the token cap
+        """
+        model = self._get_model(system_prompt)
+        generation_config = self._generation_config(max_output_tokens)
+        # Stateless call with the whole (bounded) history: a retry of the dispatcher sends the same turns
+        response = await self.dispatcher.call(
+            lambda: model.generate_content_async(contents, generation_config=generation_config)
+        )
+        return self._text(response)
+
+    @staticmethod
+    def _generation_config(max_output_tokens: Optional[int]) -> Optional[genai.types.GenerationConfig]:
+        """Generation config limiting the output (thinking and answer) to max_output_tokens"""
+        if not max_output_tokens:
+            return None
+        return genai.types.GenerationConfig(max_output_tokens=max_output_tokens)
+
+    @staticmethod
+    def _text(response) -> str:
+        """Text of a Gemini response"""
+        candidates = getattr(response, "candidates", None) or []
+        if candidates and candidates[0].finish_reason == genai.protos.Candidate.FinishReason.MAX_TOKENS:
+            # Partial advice must not reach the patient as if it were complete
+            raise DialogServiceError(
+                "truncated_response",
+                "Gemini reached the output token limit before finishing the response",
+                retryable=True,
+                status_code=502
+            )
         try:
-            # Build the complete prompt
-            full_prompt = f"{system_prompt}\n\n"
-            if context:
-                full_prompt += f"Context: {context}\n\n"
-            full_prompt += f"User: {user_prompt}"
-            
-            # Generate response
-            response = self.model.generate_content(full_prompt)
-            
-            if response.text:
-                return response.text
-            else:
-                return "Sorry, I couldn't generate a response at this time."
-                
-        except Exception as e:
-            # In production, you should log the error
-            print(f"Error generating response with Gemini: {str(e)}")
-            return "Sorry, an error occurred while processing your request." 
\ No newline at end of file
+            text = response.text
+        except ValueError as e:
+            # Raised by the SDK when the candidate was blocked or has no text parts
+            raise DialogServiceError("empty_response", f"Gemini returned no text: {str(e)}", status_code=502)
+        if not text:
+            raise DialogServiceError("empty_response", "Gemini returned an empty response", status_code=502)
+        return text
+
+    @classmethod
+    def _get_model(cls, system_prompt: str) -> genai.GenerativeModel:
+        """Model configured with a system instruction, reused across calls with the same instruction"""
+        model = cls._models.get(system_prompt)
+        if model is None:
+            model = genai.GenerativeModel(cls.MODEL_NAME, system_instruction=system_prompt or None)
+            cls._models[system_prompt] = model
+            while len(cls._models) > cls._max_cached_models:
+                cls._models.popitem(last=False)
+        else:
+            cls._models.move_to_end(system_prompt)
+        return model
@@ -0,0 +1,126 @@
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(_BASE32)}
+
+EARTH_RADIUS_M = 6371008.8
+
+def encode(lat: float, lon: float, precision: int) -> str:
+    """
+    Encode a coordinate as a geohash
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        precision: Number of characters of the geohash
+
+    Returns:
+        str: Geohash of the cell that contains the coordinate
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value_range, value = (lon_range, lon) if even else (lat_range, lat)
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            value_range[0] = middle
+        else:
+            bits <<= 1
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+def bounds(cell: str) -> Tuple[float, float, float, float]:
+    """
+    Bounding box of a geohash cell
+
+    Args:
+        cell: Geohash
+
+    Returns:
+        Tuple[float, float, float, float]: (min_lat, min_lon, max_lat, max_lon)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        bits = _DECODE[char]
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if (bits >> shift) & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+def center(cell: str) -> Tuple[float, float]:
+    """Center (lat, lon) of a geohash cell"""
+    min_lat, min_lon, max_lat, max_lon = bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+
+def neighbors(cell: str) -> List[str]:
+    """
+    The eight cells around a geohash cell, with the same precision
+
+    Args:
+        cell: Geohash
+
+    Returns:
+        List[str]: Neighbor geohashes (cells beyond the poles are skipped)
+    """
+    min_lat, min_lon, max_lat, max_lon = bounds(cell)
+    lat_step = max_lat - min_lat
+    lon_step = max_lon - min_lon
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+    result = []
+    for d_lat in (-1, 0, 1):
+        for d_lon in (-1, 0, 1):
+            if d_lat == 0 and d_lon == 0:
+                continue
+            lat = center_lat + d_lat * lat_step
+            if lat <= -90.0 or lat >= 90.0:
+                continue
+            lon = (center_lon + d_lon * lon_step + 180.0) % 360.0 - 180.0
+            result.append(encode(lat, lon, len(cell)))
+    return result
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters between two coordinates"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+def precision_for_radius(radius_m: float) -> int:
+    """
+    Precision of the largest geohash cells that are not larger than the given radius,
+    so a cell never adds more than about the radius to a search around it
+
+    Args:
+        radius_m: Search radius in meters
+
+    Returns:
+        int: Geohash precision between 1 and 9
+    """
+    # Approximate cell height in meters (the larger side at mid latitudes) per precision
+    cell_sizes = {1: 5000000, 2: 1250000, 3: 156000, 4: 39100, 5: 4890, 6: 1220, 7: 153, 8: 38.2, 9: 4.77}
+    for precision in range(1, 10):
+        if cell_sizes[precision] <= radius_m:
+            return precision
+    return 9
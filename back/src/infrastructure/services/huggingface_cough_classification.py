@@ -4,17 +4,20 @@ import numpy as np
 import pandas as pd
 import io
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from fastapi import UploadFile
 from src.domain.interfaces.cough_classifier_service_interface import CoughClassifierServiceInterface
+from src.infrastructure.services.model_registry import observed_inference
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
 
 class CoughClassificationService(CoughClassifierServiceInterface):
     """Service to classify cough audio using a pre-trained sklearn model."""
 
-    def __init__(self, path_model: str = 'domain/weights/hugging_face/cough_classification_model.pkl'):
+    def __init__(self, path_model: Optional[str] = None):
         base_dir = os.path.dirname(os.path.abspath(__file__))
         model_rel_path = '../../domain/weights/hugging_face/cough_classification_model.pkl'
-        self.path_model = os.path.normpath(os.path.join(base_dir, model_rel_path))
+        self.path_model = path_model or os.path.normpath(os.path.join(base_dir, model_rel_path))
+        self.weight_source = f"pickle:{os.path.basename(self.path_model)}"
         self._load_model()
 
     def _load_model(self):
@@ -64,17 +67,12 @@ class CoughClassificationService(CoughClassifierServiceInterface):
         description: Optional[str] = None
     ) -> str:
         try:
-            audio_bytes = await audio.read()
-            y, sr = librosa.load(io.BytesIO(audio_bytes), sr=None)
+            with memory_diagnostics.stage("upload"):
+                audio_bytes = await audio.read()
+            with memory_diagnostics.stage("decode"):
+                y, sr = librosa.load(io.BytesIO(audio_bytes), sr=None)
 
-            features_dict = self.extract_all_features_from_audio(y, sr)
-            features_df = pd.DataFrame([features_dict])[self.feature_names]
-            features_scaled = self.scaler.transform(features_df)
-
-            prediction_idx = self.model.predict(features_scaled)[0]
-            prediction = self.label_encoder.inverse_transform([prediction_idx])[0]
-            probabilities_array = self.model.predict_proba(features_scaled)[0]
-            confidence = max(probabilities_array)
+            prediction, confidence = self.predict_waveform(y, sr)
 
             print(prediction)
             print(confidence)
@@ -83,3 +81,28 @@ class CoughClassificationService(CoughClassifierServiceInterface):
 
         except Exception as e:
             return f"Classification error: {str(e)}"
+
+    @observed_inference
+    def predict_waveform(self, y: np.ndarray, sr: int) -> Tuple[str, float]:
+        """Classify a decoded waveform; returns the predicted class and its probability"""
+        return self._classify_features(self.extract_all_features_from_audio(y, sr))
+
+    @observed_inference
+    def predict_features(self, features_dict: Dict[str, float]) -> Tuple[str, float]:
+        """Classify features already extracted (by CoughFeatureStream); returns the predicted class and its probability"""
+        return self._classify_features(features_dict)
+
+    def _classify_features(self, features_dict: Dict[str, float]) -> Tuple[str, float]:
+        features_df = pd.DataFrame([features_dict])[self.feature_names]
+        features_scaled = self.scaler.transform(features_df)
+
+        prediction_idx = self.model.predict(features_scaled)[0]
+        prediction = self.label_encoder.inverse_transform([prediction_idx])[0]
+        probabilities_array = self.model.predict_proba(features_scaled)[0]
+        return prediction, max(probabilities_array)
+
+    def warm_up(self) -> None:
+        """Classify one second of synthetic noise (startup warm-up of the librosa feature extraction)"""
+        sr = 22050
+        y = np.random.default_rng(0).uniform(-0.1, 0.1, sr).astype(np.float32)
+        self.predict_waveform(y, sr)
@@ -1,10 +1,14 @@
-import io
-from typing import Optional
+from typing import List, Optional, Tuple
 from fastapi import UploadFile
 from PIL import Image
+import numpy as np
 import torch
 from transformers import AutoImageProcessor, AutoModelForImageClassification
 from src.domain.interfaces.vision_classifier_service_interface import VisionClassifierServiceInterface
+from src.infrastructure.services.image_preprocessing import open_image, preprocessor_for, synthetic_image
+from src.infrastructure.services.inference_profile import InferenceProfile
+from src.infrastructure.services.model_registry import observed_inference
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
 
 class HuggingFaceDentalService(VisionClassifierServiceInterface):
     """
@@ -15,16 +19,26 @@ class HuggingFaceDentalService(VisionClassifierServiceInterface):
     or apical infections.
     """
     
-    def __init__(self, model_name: str = "vishnu027/dental_classification_model_010424"):
+    DEFAULT_MODEL = "vishnu027/dental_classification_model_010424"
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        inference_profile: Optional[InferenceProfile] = None
+    ):
         """
         Initialize the dental classification service.
         
         Args:
-            model_name: The name of the Hugging Face model to load.
+            model_name: The name of the Hugging Face model to load. Defaults to DEFAULT_MODEL.
+            inference_profile: How the model runs. Defaults to INFERENCE_DENTAL_PROFILE or INFERENCE_PROFILE.
         """
-        self.model_name = model_name
+        self.model_name = model_name or self.DEFAULT_MODEL
         self.processor = None
+        self.preprocessor = None
         self.model = None
+        self.weight_source = None
+        self.inference_profile = inference_profile or InferenceProfile.for_model("dental")
         self._load_model()
     
     def _load_model(self):
@@ -35,9 +49,21 @@ class HuggingFaceDentalService(VisionClassifierServiceInterface):
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             # Retry with the same default model
-            self.model_name = "vishnu027/dental_classification_model_010424"
+            self.model_name = self.DEFAULT_MODEL
             self.processor = AutoImageProcessor.from_pretrained(self.model_name)
             self.model = AutoModelForImageClassification.from_pretrained(self.model_name)
+        self.weight_source = f"huggingface:{self.model_name}"
+        # Batched uint8 preprocessing, verified against the model's processor (None keeps the processor)
+        self.preprocessor = preprocessor_for(self.processor)
+        # Compiled here, ahead of the first request, when the inference profile is optimized
+        self.model.eval()
+        self.inference_profile.prepare(
+            self.model,
+            self.model_name,
+            lambda batch_size: self.model(pixel_values=self.inference_profile.input(
+                self.pixel_values([synthetic_image()] * batch_size)
+            ))
+        )
     
     async def classify_image(
         self,
@@ -56,21 +82,88 @@ class HuggingFaceDentalService(VisionClassifierServiceInterface):
         """
         try:
             # Load image from request
-            image_data = await image.read()
-            pil_image = Image.open(io.BytesIO(image_data))
+            with memory_diagnostics.stage("upload"):
+                image_data = await image.read()
+                decoded = open_image(image_data)
             
-            # Preprocess input
-            inputs = self.processor(pil_image, return_tensors="pt")
+            label, confidence = self.predict(decoded)
             
-            # Run prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                predicted_class = logits.argmax().item()
-                label = self.model.config.id2label[predicted_class]
-                
-                return f"The image may indicate: **{label}**"
+            return self.format_prediction(label, confidence)
         
         except Exception as e:
             print(f"Error classifying image: {str(e)}")
             return "Error during dental diagnosis (Confidence: 0%)"
+    
+    def format_prediction(self, label: str, confidence: float) -> str:
+        """Format a prediction the way classify_image returns it."""
+        return f"The image may indicate: **{label}**"
+    
+    def pixel_values(self, pil_images: List[Image.Image]) -> torch.Tensor:
+        """
+        Preprocess decoded images into the model input.
+        
+        Args:
+            pil_images: Decoded dental images, or uint8 RGB arrays of raw uploads.
+        
+        Returns:
+            torch.Tensor: Pixel values of shape (N, 3, height, width).
+        """
+        if self.preprocessor is not None:
+            return self.preprocessor(pil_images)
+        return self.processor(pil_images, return_tensors="pt")["pixel_values"]
+    
+    @observed_inference
+    def classify_batch(self, pil_images: List[Image.Image]) -> List[Tuple[str, float]]:
+        """
+        Run the model once on several decoded dental images.
+        
+        Args:
+            pil_images: Decoded dental images.
+        
+        Returns:
+            List[Tuple[str, float]]: Predicted dental condition and its probability for each image.
+        """
+        return self.classify_pixel_values(self.pixel_values(pil_images))
+    
+    def classify_uint8(self, batch: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        Run the model on dental images already resized by self.preprocessor.to_uint8.
+        
+        Args:
+            batch: uint8 array of shape (N, height, width, 3).
+        
+        Returns:
+            List[Tuple[str, float]]: Predicted dental condition and its probability for each image.
+        """
+        return self.classify_pixel_values(self.preprocessor.normalize(batch))
+    
+    def probabilities(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        """Class probabilities (N, num_labels) of preprocessed pixel values of shape (N, 3, height, width)."""
+        with self.inference_profile.context():
+            logits = self.model(pixel_values=self.inference_profile.input(pixel_values)).logits.float()
+            return torch.nn.functional.softmax(logits, dim=-1)
+    
+    def classify_pixel_values(self, pixel_values: torch.Tensor) -> List[Tuple[str, float]]:
+        """Run the model on preprocessed pixel values of shape (N, 3, height, width)."""
+        confidences, class_ids = self.probabilities(pixel_values).max(dim=-1)
+        
+        return [
+            (self.model.config.id2label[class_id], confidence)
+            for class_id, confidence in zip(class_ids.tolist(), confidences.tolist())
+        ]
+    
+    def predict(self, pil_image: Image.Image) -> Tuple[str, float]:
+        """
+        Run the model on an already decoded dental image.
+        
+        Args:
+            pil_image: Decoded dental image, or uint8 RGB array of a raw upload.
+        
+        Returns:
+            Tuple[str, float]: Predicted dental condition and its probability.
+        """
+        return self.classify_batch([pil_image])[0]
+    
+    def warm_up(self) -> None:
+        """Run one synthetic image through the preprocessing and the model (startup warm-up)."""
+        self.classify_batch([synthetic_image()])
@@ -1,25 +1,53 @@
-import io
-from typing import Optional
+import os
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import UploadFile
 from PIL import Image
+import numpy as np
 import torch
 from transformers import AutoImageProcessor, AutoModelForImageClassification
 from src.domain.interfaces.vision_classifier_service_interface import VisionClassifierServiceInterface
+from src.infrastructure.services.image_preprocessing import open_image, preprocessor_for, synthetic_image
+from src.infrastructure.services.inference_profile import InferenceProfile
+from src.infrastructure.services.model_registry import observed_inference
+from src.infrastructure.services.cascade_classifier import CascadeClassifier, model_stage, resolution_stage
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
 
 class HuggingFaceVisionService(VisionClassifierServiceInterface):
-    """Implementation of image classification service using Hugging Face"""
+    """
+    Implementation of image classification service using Hugging Face
     
-    def __init__(self, model_name: str = "Anwarkh1/Skin_Cancer-Image_Classification"):
+    With LESION_CASCADE_MODEL (a smaller model with the same labels) or
+    LESION_CASCADE_RESOLUTION (the same model on a downscaled input) set, images
+    are classified by that cheap stage first and only escalated to the full model
+    when its confidence is below LESION_CASCADE_THRESHOLD.
+    
+    The full model runs with the inference profile INFERENCE_LESION_PROFILE (or
+    INFERENCE_PROFILE), compiled while loading when it is optimized.
+    """
+
+    DEFAULT_MODEL = "Anwarkh1/Skin_Cancer-Image_Classification"
+    
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        inference_profile: Optional[InferenceProfile] = None
+    ):
         """
         Initialize the classification service
         
         Args:
-            model_name: Hugging Face model name to use
+            model_name: Hugging Face model name to use. Defaults to DEFAULT_MODEL
+            inference_profile: How the model runs. Defaults to INFERENCE_LESION_PROFILE or INFERENCE_PROFILE
         """
-        self.model_name = model_name
+        self.model_name = model_name or self.DEFAULT_MODEL
         self.processor = None
+        self.preprocessor = None
         self.model = None
+        self.weight_source = None
+        self.cascade = None
+        self.inference_profile = inference_profile or InferenceProfile.for_model("lesion")
         self._load_model()
+        self._load_cascade()
     
     def _load_model(self):
         """Load the Hugging Face model and processor"""
@@ -29,9 +57,45 @@ class HuggingFaceVisionService(VisionClassifierServiceInterface):
         except Exception as e:
             print(f"Error loading model: {str(e)}")
             # Fallback to a simpler model
-            self.model_name = "Anwarkh1/Skin_Cancer-Image_Classification"
+            self.model_name = self.DEFAULT_MODEL
             self.processor = AutoImageProcessor.from_pretrained(self.model_name)
             self.model = AutoModelForImageClassification.from_pretrained(self.model_name)
+        self.weight_source = f"huggingface:{self.model_name}"
+        # Batched uint8 preprocessing, verified against the model's processor (None keeps the processor)
+        self.preprocessor = preprocessor_for(self.processor)
+        self.model.eval()
+        self.inference_profile.prepare(
+            self.model,
+            self.model_name,
+            lambda batch_size: self._logits(self.inference_profile.input(
+                self.pixel_values([synthetic_image()] * batch_size)
+            ))
+        )
+    
+    def _load_cascade(self):
+        """Build the optional first stage of the cascade; the service runs the full model alone if it cannot be built"""
+        cascade_model = os.getenv("LESION_CASCADE_MODEL")
+        resolution = int(os.getenv("LESION_CASCADE_RESOLUTION") or 0)
+        if not cascade_model and not resolution:
+            return
+        try:
+            if cascade_model:
+                description = f"model:{cascade_model}"
+                first_stage = model_stage(self.processor, self.model, cascade_model)
+            else:
+                description = f"resolution:{resolution}"
+                first_stage = resolution_stage(self.model, resolution)
+            self.cascade = CascadeClassifier(
+                description,
+                first_stage,
+                self._logits,
+                float(os.getenv("LESION_CASCADE_THRESHOLD", "0.9"))
+            )
+            with self.inference_profile.context():
+                self.cascade.first_stage(self.inference_profile.input(self.pixel_values([synthetic_image()])))
+        except Exception as e:
+            print(f"Cascade disabled, running the full model only: {str(e)}")
+            self.cascade = None
     
     async def classify_image(
         self,
@@ -50,30 +114,103 @@ class HuggingFaceVisionService(VisionClassifierServiceInterface):
         """
         try:
             # Read the image
-            image_data = await image.read()
-            pil_image = Image.open(io.BytesIO(image_data))
+            with memory_diagnostics.stage("upload"):
+                image_data = await image.read()
+                decoded = open_image(image_data)
             
-            # Preprocess the image
-            inputs = self.processor(pil_image, return_tensors="pt")
+            predicted_class, confidence = self.predict(decoded)
             
-            # Make prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits = outputs.logits
-                probabilities = torch.nn.functional.softmax(logits, dim=-1)
-                
-                # Get the class with highest probability
-                predicted_class_id = logits.argmax().item()
-                confidence = probabilities[0][predicted_class_id].item()
-                
-                # Get the class name
-                predicted_class = self.model.config.id2label[predicted_class_id]
-                
-                # Format result
-                result = f"{predicted_class} (Confidence: {confidence:.1%})"
-                
-                return result
+            return self.format_prediction(predicted_class, confidence)
                 
         except Exception as e:
             print(f"Error classifying image: {str(e)}")
-            return "Classification error (Confidence: 0%)" 
\ No newline at end of file
+            return "Classification error (Confidence: 0%)"
+    
+    def format_prediction(self, predicted_class: str, confidence: float) -> str:
+        """Format a prediction the way classify_image returns it"""
+        return f"{predicted_class} (Confidence: {confidence:.1%})"
+    
+    def pixel_values(self, pil_images: List[Image.Image]) -> torch.Tensor:
+        """
+        Preprocess decoded images into the model input
+        
+        Args:
+            pil_images: Decoded images, or uint8 RGB arrays of raw uploads
+            
+        Returns:
+            torch.Tensor: Pixel values of shape (N, 3, height, width)
+        """
+        if self.preprocessor is not None:
+            return self.preprocessor(pil_images)
+        return self.processor(pil_images, return_tensors="pt")["pixel_values"]
+    
+    @observed_inference
+    def classify_batch(self, pil_images: List[Image.Image]) -> List[Tuple[str, float]]:
+        """
+        Run the model once on several decoded images
+        
+        Args:
+            pil_images: Decoded images
+            
+        Returns:
+            List[Tuple[str, float]]: Predicted class name and its probability for each image
+        """
+        return self.classify_pixel_values(self.pixel_values(pil_images))
+    
+    def classify_uint8(self, batch: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        Run the model on images already resized by self.preprocessor.to_uint8
+        
+        Args:
+            batch: uint8 array of shape (N, height, width, 3)
+        
+        Returns:
+            List[Tuple[str, float]]: Predicted class name and its probability for each image
+        """
+        return self.classify_pixel_values(self.preprocessor.normalize(batch))
+    
+    def _logits(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        """Float32 logits of the full model (bfloat16 under autocast otherwise)"""
+        return self.model(pixel_values=pixel_values).logits.float()
+    
+    def probabilities(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        """Class probabilities (N, num_labels) of preprocessed pixel values of shape (N, 3, height, width)"""
+        pixel_values = self.inference_profile.input(pixel_values)
+        with self.inference_profile.context():
+            if self.cascade is not None:
+                return self.cascade.probabilities(pixel_values)
+            return torch.nn.functional.softmax(self._logits(pixel_values), dim=-1)
+    
+    def classify_pixel_values(self, pixel_values: torch.Tensor) -> List[Tuple[str, float]]:
+        """Run the model on preprocessed pixel values of shape (N, 3, height, width)"""
+        confidences, class_ids = self.probabilities(pixel_values).max(dim=-1)
+        
+        return [
+            (self.model.config.id2label[class_id], confidence)
+            for class_id, confidence in zip(class_ids.tolist(), confidences.tolist())
+        ]
+    
+    def predict(self, pil_image: Image.Image) -> Tuple[str, float]:
+        """
+        Run the model on an already decoded image
+        
+        Args:
+            pil_image: Decoded image, or uint8 RGB array of a raw upload
+            
+        Returns:
+            Tuple[str, float]: Predicted class name and its probability
+        """
+        return self.classify_batch([pil_image])[0]
+    
+    def cascade_stats(self) -> Optional[Dict[str, Any]]:
+        """Escalation rate and stage latencies of the cascade (None when it is disabled)"""
+        return self.cascade.stats() if self.cascade is not None else None
+    
+    def warm_up(self) -> None:
+        """Run one synthetic image through the preprocessing and the model (startup warm-up)"""
+        self.classify_batch([synthetic_image()])
+        if self.cascade is not None:
+            # The synthetic image may have been answered by the first stage: warm and time the full
+            # model too, and keep warm-up images out of the escalation rate
+            with self.inference_profile.context():
+                self.cascade.calibrate(self.inference_profile.input(self.pixel_values([synthetic_image()])))
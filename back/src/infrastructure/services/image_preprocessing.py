@@ -0,0 +1,352 @@
+import io
+import struct
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+import torch
+import torchvision.transforms as transforms
+import torchvision.transforms.v2.functional as tvF
+from PIL import Image
+
+# PIL resampling filter -> torchvision interpolation, as mapped by the Hugging Face torchvision backend
+_TORCHVISION_INTERPOLATION = {
+    Image.NEAREST: tvF.InterpolationMode.NEAREST_EXACT,
+    Image.BILINEAR: tvF.InterpolationMode.BILINEAR,
+    Image.BICUBIC: tvF.InterpolationMode.BICUBIC,
+    Image.LANCZOS: tvF.InterpolationMode.LANCZOS,
+    Image.BOX: tvF.InterpolationMode.BOX,
+    Image.HAMMING: tvF.InterpolationMode.HAMMING
+}
+
+def _ramp_image() -> Image.Image:
+    """1x256 RGB image holding every uint8 value once in each channel"""
+    return Image.fromarray(np.repeat(np.arange(256, dtype=np.uint8)[None, :, None], 3, axis=2))
+
+def synthetic_image(height: int = 384, width: int = 512, seed: int = 0) -> Image.Image:
+    """Random RGB image, used for warm-up passes through the vision models"""
+    return Image.fromarray(np.random.default_rng(seed).integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+# Raw ingest format of the edge clients, which resize the photo before sending it: a 10-byte
+# header (magic "HRGB", format version, channel count, height and width, big endian) followed
+# by height * width * 3 uint8 RGB values in row-major order. A buffer already at the model's
+# input size skips both the decode and the resize.
+RAW_IMAGE_MAGIC = b"HRGB"
+RAW_IMAGE_VERSION = 1
+RAW_IMAGE_CONTENT_TYPE = "application/x-hampi-rgb"
+_RAW_HEADER = struct.Struct("!4sBBHH")
+
+def is_raw_image(content: bytes) -> bool:
+    """Whether an upload is in the raw ingest format"""
+    return content[:len(RAW_IMAGE_MAGIC)] == RAW_IMAGE_MAGIC
+
+def encode_raw_image(image: Union[Image.Image, np.ndarray]) -> bytes:
+    """
+    Encode an RGB image in the raw ingest format
+
+    Args:
+        image: PIL image in any mode, or uint8 array of shape (height, width, 3)
+
+    Returns:
+        bytes: Header and pixel values
+    """
+    array = np.ascontiguousarray(np.asarray(image.convert("RGB") if isinstance(image, Image.Image) else image, dtype=np.uint8))
+    if array.ndim != 3 or array.shape[2] != 3:
+        raise ValueError(f"Expected an RGB image of shape (height, width, 3), got {array.shape}")
+    height, width, channels = array.shape
+    return _RAW_HEADER.pack(RAW_IMAGE_MAGIC, RAW_IMAGE_VERSION, channels, height, width) + array.tobytes()
+
+def decode_raw_image(content: bytes) -> np.ndarray:
+    """
+    Read an upload in the raw ingest format, without copying the pixel values
+
+    Args:
+        content: Header and pixel values
+
+    Returns:
+        np.ndarray: Read-only uint8 array of shape (height, width, 3)
+
+    Raises:
+        ValueError: If the header is not valid or the size does not match it
+    """
+    if len(content) < _RAW_HEADER.size or not is_raw_image(content):
+        raise ValueError("Not a raw RGB image")
+    _, version, channels, height, width = _RAW_HEADER.unpack_from(content)
+    if version != RAW_IMAGE_VERSION:
+        raise ValueError(f"Unsupported raw image version: {version}")
+    if channels != 3 or not height or not width:
+        raise ValueError(f"Invalid raw image of {height}x{width}x{channels}")
+    expected = _RAW_HEADER.size + height * width * channels
+    if len(content) != expected:
+        raise ValueError(f"Raw image of {height}x{width}x3 must be {expected} bytes, got {len(content)}")
+    return np.frombuffer(content, dtype=np.uint8, offset=_RAW_HEADER.size).reshape(height, width, channels)
+
+def open_image(content: bytes) -> Union[Image.Image, np.ndarray]:
+    """
+    Image of an upload: the uint8 array of a raw buffer (nothing to decode), or the image opened by PIL
+
+    Raises:
+        ValueError: If a raw buffer is not valid
+        PIL.UnidentifiedImageError: If the content is not an image
+    """
+    if is_raw_image(content):
+        return decode_raw_image(content)
+    return Image.open(io.BytesIO(content))
+
+class PreprocessConfig:
+    """
+    Resize, crop and value conversion of a vision model.
+
+    Rescale and normalize act on each pixel value independently, so they are
+    stored as a (3, 256) lookup table computed by running the model's own
+    pipeline on a ramp image; the float arithmetic is therefore the reference one
+    by construction. resize_backend selects the resize implementation the
+    reference uses: "pil" (PIL.Image.resize) or "torchvision" (antialiased
+    tensor resize, as in the Hugging Face fast/torchvision processors).
+    """
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        size: Optional[Tuple[int, int]] = None,
+        shortest_edge: Optional[int] = None,
+        crop_size: Optional[Tuple[int, int]] = None,
+        resample: int = Image.BILINEAR,
+        resize_backend: str = "pil"
+    ):
+        """
+        Args:
+            table: float32 output value of every (channel, uint8 value), shape (3, 256)
+            size: Resize to exactly (height, width)
+            shortest_edge: Resize keeping the aspect ratio so the shortest edge has this length
+            crop_size: Center crop (height, width) applied after the resize
+            resample: PIL resampling filter
+            resize_backend: "pil" or "torchvision"
+        """
+        if (size is None) == (shortest_edge is None):
+            raise ValueError("Exactly one of size and shortest_edge must be set")
+        if resize_backend not in ("pil", "torchvision"):
+            raise ValueError(f"Unknown resize backend: {resize_backend}")
+        self.table = np.asarray(table, dtype=np.float32)
+        self.size = size
+        self.shortest_edge = shortest_edge
+        self.crop_size = crop_size
+        self.resample = int(resample)
+        self.resize_backend = resize_backend
+
+    @classmethod
+    def from_hf_processor(cls, processor) -> "PreprocessConfig":
+        """
+        Build the configuration of a Hugging Face image processor
+
+        Supports fixed-size resizes (ViT, DeiT, BEiT...), shortest-edge resizes with
+        an optional center crop (CLIP, BiT...) and ConvNeXT's crop_pct resize.
+
+        Args:
+            processor: Image processor returned by AutoImageProcessor
+
+        Returns:
+            PreprocessConfig: Equivalent configuration
+
+        Raises:
+            ValueError: If the processor uses steps this module does not implement
+        """
+        for unsupported in ("do_pad", "do_reduce_labels", "do_flip_channel_order"):
+            if getattr(processor, unsupported, False):
+                raise ValueError(f"{type(processor).__name__}.{unsupported} is not supported")
+        if not getattr(processor, "do_resize", False):
+            raise ValueError(f"{type(processor).__name__} does not resize its input")
+
+        bases = {base.__name__ for base in type(processor).__mro__}
+        resize_backend = "torchvision" if bases & {"TorchvisionBackend", "BaseImageProcessorFast"} else "pil"
+        table = processor(
+            _ramp_image(), do_resize=False, do_center_crop=False, return_tensors="pt"
+        )["pixel_values"][0, :, 0, :].float().numpy()
+        options = dict(
+            table=table,
+            resample=int(getattr(processor, "resample", Image.BILINEAR)),
+            resize_backend=resize_backend
+        )
+
+        size = dict(processor.size)
+        crop_size = None
+        if getattr(processor, "do_center_crop", False):
+            crop_size = (processor.crop_size["height"], processor.crop_size["width"])
+
+        crop_pct = getattr(processor, "crop_pct", None)
+        if crop_pct is not None and "shortest_edge" in size:
+            # ConvNeXT: below 384 px resize to shortest_edge / crop_pct and center crop to shortest_edge
+            edge = size["shortest_edge"]
+            if edge < 384:
+                return cls(shortest_edge=int(edge / crop_pct), crop_size=(edge, edge), **options)
+            return cls(size=(edge, edge), **options)
+
+        if "height" in size and "width" in size:
+            return cls(size=(size["height"], size["width"]), crop_size=crop_size, **options)
+        if set(size) == {"shortest_edge"}:
+            return cls(shortest_edge=size["shortest_edge"], crop_size=crop_size, **options)
+        raise ValueError(f"Unsupported size configuration: {size}")
+
+    @classmethod
+    def from_torchvision(
+        cls,
+        size: Tuple[int, int],
+        mean: Sequence[float],
+        std: Sequence[float],
+        resample: int = Image.BILINEAR
+    ) -> "PreprocessConfig":
+        """
+        Configuration equivalent to Compose([Resize(size), ToTensor(), Normalize(mean, std)]) on PIL images
+
+        Args:
+            size: Resize target (height, width)
+            mean: Per-channel normalization mean
+            std: Per-channel normalization standard deviation
+            resample: PIL resampling filter of the Resize
+
+        Returns:
+            PreprocessConfig: Equivalent configuration
+        """
+        table = transforms.Normalize(mean=mean, std=std)(transforms.ToTensor()(_ramp_image()))[:, 0, :].numpy()
+        return cls(table=table, size=size, resample=resample, resize_backend="pil")
+
+class BatchPreprocessor:
+    """
+    Batched image preprocessing shared by the vision services and the batch runners.
+
+    Each decoded image is resized once into a uint8 buffer (with the same resize
+    the reference pipeline runs); the float conversion, rescale and normalization
+    of the whole batch are then a single vectorized table lookup instead of
+    per-image float operations.
+    """
+
+    def __init__(self, config: PreprocessConfig):
+        self.config = config
+
+    @property
+    def output_size(self) -> Optional[Tuple[int, int]]:
+        """(height, width) of every buffer, None when it follows the aspect ratio of the image"""
+        return self.config.crop_size or self.config.size
+
+    def to_uint8(self, image: Union[Image.Image, np.ndarray]) -> np.ndarray:
+        """
+        Convert, resize and crop one decoded image
+
+        Args:
+            image: Decoded image in any mode, or uint8 RGB array of shape (height, width, 3)
+                (a raw upload); an array already at output_size is used as is
+
+        Returns:
+            np.ndarray: uint8 buffer of shape (height, width, 3)
+        """
+        config = self.config
+        if isinstance(image, np.ndarray):
+            if image.shape[:2] == self.output_size:
+                return image
+            image = Image.fromarray(image)
+        image = image.convert("RGB")
+        if config.size is not None:
+            height, width = config.size
+        else:
+            short, long = sorted(image.size)
+            new_short, new_long = config.shortest_edge, int(config.shortest_edge * long / short)
+            width, height = (new_short, new_long) if image.width <= image.height else (new_long, new_short)
+        if config.resize_backend == "torchvision":
+            tensor = tvF.resize(
+                tvF.pil_to_tensor(image), [height, width],
+                interpolation=_TORCHVISION_INTERPOLATION[config.resample], antialias=True
+            )
+            array = tensor.permute(1, 2, 0).numpy()
+        else:
+            if (width, height) != image.size:
+                image = image.resize((width, height), resample=config.resample)
+            array = np.array(image, dtype=np.uint8)
+
+        if config.crop_size is not None:
+            crop_height, crop_width = config.crop_size
+            if crop_height > height or crop_width > width:
+                raise ValueError(f"Center crop {config.crop_size} is larger than the resized image {(height, width)}")
+            top = (height - crop_height) // 2
+            left = (width - crop_width) // 2
+            array = array[top:top + crop_height, left:left + crop_width]
+        return array
+
+    def normalize(self, batch: np.ndarray) -> torch.Tensor:
+        """
+        Rescale and normalize a batch of uint8 buffers
+
+        Args:
+            batch: uint8 array of shape (N, height, width, 3)
+
+        Returns:
+            torch.Tensor: float32 tensor of shape (N, 3, height, width)
+        """
+        channels_first = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+        values = np.empty(channels_first.shape, dtype=np.float32)
+        for channel in range(3):
+            np.take(self.config.table[channel], channels_first[:, channel], out=values[:, channel])
+        return torch.from_numpy(values)
+
+    def __call__(self, images: Sequence[Union[Image.Image, np.ndarray]]) -> torch.Tensor:
+        """
+        Preprocess a batch of decoded images
+
+        Args:
+            images: Decoded images, any size and mode, or uint8 RGB arrays
+
+        Returns:
+            torch.Tensor: Model input of shape (N, 3, height, width)
+        """
+        return self.normalize(np.stack([self.to_uint8(image) for image in images]))
+
+def verify_against_processor(preprocessor: BatchPreprocessor, processor, images: Optional[Sequence[Image.Image]] = None) -> float:
+    """
+    Largest absolute difference between the batched preprocessing and a Hugging Face processor
+
+    Args:
+        preprocessor: Batched preprocessor to check
+        processor: Reference Hugging Face image processor
+        images: Images to compare on. Defaults to synthetic images of several sizes and modes
+
+    Returns:
+        float: Maximum absolute difference over every pixel (0.0 when identical)
+    """
+    if images is None:
+        rng = np.random.default_rng(0)
+        images = [
+            Image.fromarray(rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)),
+            Image.fromarray(rng.integers(0, 256, (317, 241, 3), dtype=np.uint8)),
+            Image.fromarray(rng.integers(0, 256, (96, 64), dtype=np.uint8)).convert("RGB")
+        ]
+    expected = processor([image.convert("RGB") for image in images], return_tensors="pt")["pixel_values"]
+    actual = preprocessor(images)
+    if actual.shape != expected.shape:
+        return float("inf")
+    return (actual - expected.float()).abs().max().item()
+
+def preprocessor_for(processor, tolerance: float = 1e-5) -> Optional[BatchPreprocessor]:
+    """
+    Batched preprocessor equivalent to a Hugging Face processor, if one can be built and verified
+
+    Args:
+        processor: Hugging Face image processor of the model
+        tolerance: Largest accepted absolute difference with the processor output
+
+    Returns:
+        Optional[BatchPreprocessor]: The preprocessor, or None when the model must keep using its processor
+    """
+    try:
+        preprocessor = BatchPreprocessor(PreprocessConfig.from_hf_processor(processor))
+        difference = verify_against_processor(preprocessor, processor)
+    except Exception as e:
+        print(f"Batched preprocessing not available for {type(processor).__name__}: {str(e)}")
+        return None
+    if difference > tolerance:
+        print(f"Batched preprocessing differs from {type(processor).__name__} by {difference:.2e}, using the processor")
+        return None
+    return preprocessor
+
+# Same steps as the transforms.Compose([Resize((224, 224)), ToTensor(), Normalize(...)]) of DeepSTROKE
+RETFOUND_PREPROCESS = BatchPreprocessor(PreprocessConfig.from_torchvision(
+    size=(224, 224),
+    mean=[0.485, 0.456, 0.406],
+    std=[0.229, 0.224, 0.225]
+))
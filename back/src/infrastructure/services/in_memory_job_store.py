@@ -0,0 +1,42 @@
+import asyncio
+import copy
+from typing import Any, Dict, Optional
+from src.domain.interfaces.job_store_interface import JobStoreInterface
+
+class InMemoryJobStore(JobStoreInterface):
+    """Job store that keeps job records in the memory of the API process"""
+    
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+    
+    async def create(self, job: Dict[str, Any]) -> None:
+        async with self._lock:
+            self._jobs[job["job_id"]] = copy.deepcopy(job)
+    
+    async def update(self, job_id: str, **fields: Any) -> None:
+        async with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(copy.deepcopy(fields))
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+    
+    async def delete_finished_before(self, timestamp: float) -> int:
+        async with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get("finished_at") and job["finished_at"] < timestamp
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+    
+    async def heartbeat(self) -> None:
+        # Jobs live and die with this process: nothing to mark
+        pass
+    
+    async def fail_abandoned(self, timestamp: float) -> int:
+        return 0
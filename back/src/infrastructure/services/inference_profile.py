@@ -0,0 +1,155 @@
+import contextlib
+import os
+import time
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+
+PROFILES = ("default", "optimized")
+
+def bf16_supported(device: str = "cpu") -> bool:
+    """Whether the device runs bfloat16 natively (AVX512-BF16 or AMX on CPUs), so autocast is a speedup and not an emulation"""
+    if device.startswith("cuda"):
+        return torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def fuse_conv_bn(sequential: nn.Sequential) -> nn.Sequential:
+    """
+    Fold each BatchNorm2d that directly follows a Conv2d into the convolution's weights
+
+    Only valid in eval mode, where BatchNorm applies its running statistics as a fixed
+    affine transform. The BatchNorm is replaced by nn.Identity, keeping the indices (and
+    so the module names) of the other layers.
+
+    Args:
+        sequential: Eval-mode Sequential such as RETFoundModel.features
+
+    Returns:
+        nn.Sequential: New Sequential with the fused convolutions; the original is left untouched
+    """
+    layers = list(sequential)
+    for i in range(len(layers) - 1):
+        conv, bn = layers[i], layers[i + 1]
+        if isinstance(conv, nn.Conv2d) and isinstance(bn, nn.BatchNorm2d):
+            layers[i] = fuse_conv_bn_eval(conv, bn)
+            layers[i + 1] = nn.Identity()
+    return nn.Sequential(*layers)
+
+class InferenceProfile:
+    """
+    How a model runs its eager PyTorch inference.
+
+    The default profile runs the models as loaded, under torch.no_grad. The optimized
+    profile keeps the same engine and weights but:
+
+    - runs under torch.inference_mode, which also skips version counters and view tracking;
+    - stores convolution weights and inputs channels-last (NHWC), the layout oneDNN's
+      convolutions use natively, saving a reorder per convolution;
+    - compiles the forward with torch.compile while the model loads, so the first
+      request does not pay for the compilation (batch sizes 1 and 2 are run so the
+      batch dimension is compiled as dynamic);
+    - optionally runs under bfloat16 autocast (INFERENCE_BF16=auto uses it only on
+      devices with native bfloat16 support).
+
+    Conv-BN folding is model specific (see fuse_conv_bn). Outputs may be bfloat16 under
+    autocast: callers convert logits and features to float32.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        bf16: Optional[str] = None,
+        compile: Optional[bool] = None,
+        device: str = "cpu"
+    ):
+        """
+        Args:
+            name: default or optimized. Defaults to INFERENCE_PROFILE (default)
+            bf16: auto, true or false, only used by the optimized profile. Defaults to INFERENCE_BF16 (auto)
+            compile: Compile the forward, only used by the optimized profile. Defaults to INFERENCE_COMPILE (true)
+            device: Device the model runs on, selecting the autocast device type
+        """
+        self.name = name or os.getenv("INFERENCE_PROFILE", "default")
+        if self.name not in PROFILES:
+            raise ValueError(f"Unknown inference profile: {self.name}. Expected one of {', '.join(PROFILES)}")
+        self.optimized = self.name == "optimized"
+        self.device_type = "cuda" if str(device).startswith("cuda") else "cpu"
+
+        bf16 = (bf16 or os.getenv("INFERENCE_BF16", "auto")).lower()
+        if bf16 not in ("auto", "true", "false"):
+            raise ValueError(f"Unknown INFERENCE_BF16: {bf16}. Expected auto, true or false")
+        self.bf16 = self.optimized and (bf16 == "true" or (bf16 == "auto" and bf16_supported(self.device_type)))
+
+        if compile is None:
+            compile = os.getenv("INFERENCE_COMPILE", "true").lower() == "true"
+        self.compile = self.optimized and compile
+        self.compiled: List[str] = []
+        self.compile_seconds = 0.0
+
+    @classmethod
+    def for_model(cls, model: str, device: str = "cpu") -> "InferenceProfile":
+        """Profile of a model: INFERENCE_<MODEL>_PROFILE (LESION, DENTAL, DEEPSTROKE), or INFERENCE_PROFILE"""
+        return cls(os.getenv(f"INFERENCE_{model.upper()}_PROFILE") or None, device=device)
+
+    def context(self) -> ContextManager:
+        """Context every inference of the model runs in"""
+        if not self.optimized:
+            return torch.no_grad()
+        stack = contextlib.ExitStack()
+        stack.enter_context(torch.inference_mode())
+        if self.bf16:
+            stack.enter_context(torch.autocast(self.device_type, dtype=torch.bfloat16))
+        return stack
+
+    def input(self, images: torch.Tensor) -> torch.Tensor:
+        """Images (N, 3, height, width) in the memory layout of the model"""
+        if self.optimized and images.dim() == 4:
+            return images.contiguous(memory_format=torch.channels_last)
+        return images
+
+    def prepare(self, module: nn.Module, name: str, example: Optional[Callable[[int], Any]] = None) -> nn.Module:
+        """
+        Apply the layout and compilation of the profile to an eval-mode module, in place
+
+        Args:
+            module: Module to prepare
+            name: Name reported in describe()
+            example: Runs the module on a batch of the given size; the compilation happens
+                on these calls, and any compilation error falls back to the eager forward
+
+        Returns:
+            nn.Module: The same module
+        """
+        if not self.optimized:
+            return module
+        module.to(memory_format=torch.channels_last)
+        if not self.compile or example is None:
+            return module
+        # Compiling the bound forward keeps the module itself (its attributes, config and state_dict keys)
+        module.forward = torch.compile(module.forward)
+        start = time.perf_counter()
+        try:
+            with self.context():
+                for batch_size in (1, 2):
+                    example(batch_size)
+        except Exception as e:
+            print(f"Compilation of {name} failed, running it eagerly: {str(e)}")
+            del module.forward
+            return module
+        self.compile_seconds += time.perf_counter() - start
+        self.compiled.append(name)
+        return module
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "profile": self.name,
+            "inference_mode": self.optimized,
+            "channels_last": self.optimized,
+            "bf16_autocast": self.bf16,
+            "compiled": self.compiled,
+            "compile_seconds": round(self.compile_seconds, 2)
+        }
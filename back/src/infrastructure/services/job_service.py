@@ -0,0 +1,229 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+import requests
+from src.domain.exceptions.callback_url_error import CallbackUrlError
+from src.domain.exceptions.job_queue_full_error import JobQueueFullError
+from src.domain.interfaces.job_store_interface import JobStoreInterface
+
+JobRunner = Callable[[], Awaitable[Any]]
+
+def _host_allowed(host: str, allowed_hosts: Sequence[str]) -> bool:
+    """Exact host names, or "*.example.org" for its subdomains"""
+    for pattern in allowed_hosts:
+        if pattern.startswith("*.") and host.endswith(pattern[1:]):
+            return True
+        if host == pattern:
+            return True
+    return False
+
+def check_callback_url(url: str, allowed_hosts: Sequence[str]) -> None:
+    """
+    Check that a callback URL may receive job results
+
+    The host must be in allowed_hosts and every address it resolves to must be public,
+    so results are never sent to loopback, private or link-local addresses (SSRF).
+
+    Raises:
+        CallbackUrlError: If the URL is not allowed
+    """
+    if not allowed_hosts:
+        raise CallbackUrlError("Job callbacks are disabled (JOB_CALLBACK_ALLOWED_HOSTS is not set)")
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise CallbackUrlError("callback_url must be an http or https URL")
+    if not _host_allowed(host, allowed_hosts):
+        raise CallbackUrlError(f"Callback host {host} is not allowed")
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, ValueError):
+        raise CallbackUrlError(f"Callback host {host} cannot be resolved")
+    for *_, sockaddr in infos:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global:
+            raise CallbackUrlError(f"Callback host {host} resolves to a non-public address")
+
+class JobService:
+    """
+    Runs evaluations as background jobs on a bounded pool of workers.
+
+    Jobs are accepted into a bounded queue and executed by a fixed number of
+    asyncio workers, so the HTTP request that submits a job returns right away.
+    Job state is kept in a pluggable JobStoreInterface and, when a callback URL
+    is given, the finished job is POSTed to it. Callback hosts must be listed in
+    JOB_CALLBACK_ALLOWED_HOSTS and resolve to public addresses, checked on submission
+    and again before the POST (redirects are not followed).
+
+    Every JOB_HEARTBEAT_SECONDS the service marks its own unfinished jobs as alive and
+    fails the unfinished jobs of API processes that stopped heartbeating (restarted or
+    crashed), so no job stays queued or running forever.
+    """
+
+    def __init__(
+        self,
+        store: JobStoreInterface,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        retention_seconds: Optional[float] = None,
+        callback_timeout: float = 10.0,
+        callback_allowed_hosts: Optional[Sequence[str]] = None,
+        heartbeat_seconds: Optional[float] = None
+    ):
+        """
+        Initialize the job service
+
+        Args:
+            store: Storage for job state
+            workers: Number of concurrent workers (JOB_WORKERS, default 4)
+            max_pending: Maximum number of queued jobs (JOB_QUEUE_SIZE, default 100)
+            retention_seconds: Time finished jobs are kept (JOB_RETENTION_SECONDS, default 3600)
+            callback_timeout: Timeout in seconds of the callback request
+            callback_allowed_hosts: Hosts callbacks may be sent to (JOB_CALLBACK_ALLOWED_HOSTS, default none: callbacks disabled)
+            heartbeat_seconds: Interval of the job heartbeats (JOB_HEARTBEAT_SECONDS, default 30); jobs without one for three intervals are failed
+        """
+        self.store = store
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.max_pending = max_pending or int(os.getenv("JOB_QUEUE_SIZE", "100"))
+        self.retention_seconds = retention_seconds or float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+        self.callback_timeout = callback_timeout
+        if callback_allowed_hosts is None:
+            callback_allowed_hosts = os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",")
+        self.callback_allowed_hosts = [host.strip().lower() for host in callback_allowed_hosts if host.strip()]
+        self.heartbeat_seconds = heartbeat_seconds or float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._maintenance_task: Optional[asyncio.Task] = None
+        self._http = requests.Session()
+
+    def _ensure_workers(self) -> None:
+        """Start the worker tasks on the running event loop the first time they are needed"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+        if not self._worker_tasks:
+            self._worker_tasks = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers)
+            ]
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintain())
+
+    def start(self) -> None:
+        """Start the workers and the heartbeat at startup, failing the jobs a previous process left unfinished"""
+        self._ensure_workers()
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await self.store.heartbeat()
+                abandoned = await self.store.fail_abandoned(time.time() - 3 * self.heartbeat_seconds)
+                if abandoned:
+                    print(f"Marked {abandoned} abandoned jobs as failed")
+            except Exception as e:
+                print(f"Error in job heartbeat: {str(e)}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    async def submit(self, kind: str, runner: JobRunner, callback_url: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a new job
+
+        Args:
+            kind: Evaluation type
+            runner: Coroutine factory that performs the evaluation and returns its result
+            callback_url: Optional URL notified when the job finishes
+
+        Returns:
+            Dict[str, Any]: Job record in queued state
+
+        Raises:
+            JobQueueFullError: If the queue already holds max_pending jobs
+            CallbackUrlError: If the callback URL is not allowed
+        """
+        self._ensure_workers()
+        if self._queue.full():
+            raise JobQueueFullError(self.max_pending)
+        if callback_url:
+            await asyncio.to_thread(check_callback_url, callback_url, self.callback_allowed_hosts)
+
+        await self.store.delete_finished_before(time.time() - self.retention_seconds)
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "callback_url": callback_url,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        await self.store.create(job)
+        try:
+            self._queue.put_nowait((job["job_id"], runner))
+        except asyncio.QueueFull:
+            await self.store.update(
+                job["job_id"], status="failed", error="Job queue is full", finished_at=time.time()
+            )
+            raise JobQueueFullError(self.max_pending)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the current state of a job
+
+        Args:
+            job_id: Job identifier
+
+        Returns:
+            Optional[Dict[str, Any]]: Job record, or None if it does not exist
+        """
+        return await self.store.get(job_id)
+
+    def pending_jobs(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, runner = await self._queue.get()
+            try:
+                await self._run(job_id, runner)
+            except Exception as e:
+                print(f"Error running job {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str, runner: JobRunner) -> None:
+        await self.store.update(job_id, status="running", started_at=time.time())
+        try:
+            result = await runner()
+            if hasattr(result, "model_dump"):
+                result = result.model_dump()
+            await self.store.update(job_id, status="succeeded", result=result, finished_at=time.time())
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            await self.store.update(job_id, status="failed", error=str(error), finished_at=time.time())
+
+        job = await self.store.get(job_id)
+        if job and job.get("callback_url"):
+            await self._notify(job)
+
+    async def _notify(self, job: Dict[str, Any]) -> None:
+        """POST the finished job to its callback URL"""
+        try:
+            # Checked again: the host may resolve to another address than on submission
+            await asyncio.to_thread(check_callback_url, job["callback_url"], self.callback_allowed_hosts)
+            response = await asyncio.to_thread(
+                self._http.post, job["callback_url"], json=job, timeout=self.callback_timeout, allow_redirects=False
+            )
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error notifying callback for job {job['job_id']}: {str(e)}")
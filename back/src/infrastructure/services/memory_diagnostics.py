@@ -0,0 +1,329 @@
+import contextvars
+import ctypes
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# ASGI scope of the request being served, inherited by its tasks and worker threads
+current_request: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("current_request", default=None)
+
+def _route_name(scope: Optional[dict]) -> str:
+    if scope is None:
+        return "(background)"
+    # The router stores the matched route in the scope: group by template, not by concrete path
+    route = scope.get("route")
+    return f"{scope['method']} {route.path if hasattr(route, 'path') else '(unmatched)'}"
+
+def rss_bytes() -> int:
+    """Resident set size of the process (one read of /proc/self/statm on Linux)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return peak_rss_bytes()
+
+def peak_rss_bytes() -> int:
+    """Largest resident set size the process has reached"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+def _traced() -> Optional[int]:
+    return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+class _Counter:
+    """Memory counters of a route or of a stage of a route"""
+
+    def __init__(self):
+        self.calls = 0
+        self.rss_growth_bytes = 0
+        self.max_rss_delta_bytes = 0
+        self.peak_rss_bytes = 0
+        self.allocated_bytes = 0
+        self.max_allocated_bytes = 0
+        self.traced_calls = 0
+
+    def add(self, rss_before: int, rss_after: int, traced_before: Optional[int], traced_after: Optional[int]) -> None:
+        delta = rss_after - rss_before
+        self.calls += 1
+        self.rss_growth_bytes += max(delta, 0)
+        self.max_rss_delta_bytes = max(self.max_rss_delta_bytes, delta)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss_after)
+        if traced_before is not None and traced_after is not None:
+            allocated = traced_after - traced_before
+            self.traced_calls += 1
+            self.allocated_bytes += allocated
+            self.max_allocated_bytes = max(self.max_allocated_bytes, allocated)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "peak_rss_mb": round(self.peak_rss_bytes / 2**20, 1),
+            "rss_growth_mb": round(self.rss_growth_bytes / 2**20, 1),
+            "max_rss_delta_mb": round(self.max_rss_delta_bytes / 2**20, 1),
+            # Python allocations still alive after the call, only while tracemalloc is tracing
+            "traced_calls": self.traced_calls,
+            "retained_allocations_mb": round(self.allocated_bytes / 2**20, 2),
+            "max_retained_allocations_mb": round(self.max_allocated_bytes / 2**20, 2)
+        }
+
+class MemoryDiagnostics:
+    """
+    Memory attribution of the API process.
+
+    Every request records the RSS of the process before and after it under its route
+    template, and instrumented stages (upload reads, model inference, advice) record
+    theirs under the route that ran them, so growth can be pinned to a route and a
+    stage. With concurrent requests the deltas overlap: they point at the suspects,
+    tracemalloc snapshots and their diffs (started on demand, since tracing slows every
+    Python allocation) confirm them. Tensors are counted on demand by walking the heap.
+    """
+
+    def __init__(self, max_snapshots: Optional[int] = None):
+        """
+        Args:
+            max_snapshots: tracemalloc snapshots kept for diffs. Defaults to MEMORY_DIAGNOSTICS_MAX_SNAPSHOTS (5)
+        """
+        self.enabled = os.getenv("MEMORY_DIAGNOSTICS_ENABLED", "true").lower() != "false"
+        self.max_snapshots = max_snapshots or int(os.getenv("MEMORY_DIAGNOSTICS_MAX_SNAPSHOTS", "5"))
+        self._lock = threading.Lock()
+        self._routes: Dict[str, _Counter] = {}
+        self._stages: Dict[Tuple[str, str], _Counter] = {}
+        self._snapshots: "OrderedDict[int, Tuple[float, tracemalloc.Snapshot]]" = OrderedDict()
+        self._next_snapshot = 1
+        self.started_at = time.time()
+        frames = int(os.getenv("MEMORY_DIAGNOSTICS_TRACEMALLOC_FRAMES") or 0)
+        if frames:
+            # Started with the process, so the allocations of the model loads are traced too
+            self.start_tracing(frames)
+
+    def record_request(self, route: str, rss_before: int, traced_before: Optional[int]) -> None:
+        rss_after, traced_after = rss_bytes(), _traced()
+        with self._lock:
+            self._routes.setdefault(route, _Counter()).add(rss_before, rss_after, traced_before, traced_after)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Measure a stage of the current request
+
+        Args:
+            name: Stage name (upload, inference:<method>, advice...)
+        """
+        if not self.enabled:
+            yield
+            return
+        rss_before, traced_before = rss_bytes(), _traced()
+        try:
+            yield
+        finally:
+            rss_after, traced_after = rss_bytes(), _traced()
+            key = (_route_name(current_request.get()), name)
+            with self._lock:
+                self._stages.setdefault(key, _Counter()).add(rss_before, rss_after, traced_before, traced_after)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._stages.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Process memory, per-route and per-stage counters and tracing state"""
+        with self._lock:
+            routes = {route: counter.to_dict() for route, counter in self._routes.items()}
+            stages: Dict[str, Dict[str, Any]] = {}
+            for (route, name), counter in self._stages.items():
+                stages.setdefault(route, {})[name] = counter.to_dict()
+            snapshots = [{"id": snapshot_id, "taken_at": taken_at} for snapshot_id, (taken_at, _) in self._snapshots.items()]
+        tracing = None
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            tracing = {
+                "frames": tracemalloc.get_traceback_limit(),
+                "traced_mb": round(current / 2**20, 1),
+                "traced_peak_mb": round(peak / 2**20, 1),
+                "overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 2**20, 1)
+            }
+        return {
+            "enabled": self.enabled,
+            "since": self.started_at,
+            "rss_mb": round(rss_bytes() / 2**20, 1),
+            "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+            "gc_objects": len(gc.get_objects()),
+            "tracemalloc": tracing,
+            "snapshots": snapshots,
+            "routes": routes,
+            "stages": stages
+        }
+
+    def start_tracing(self, frames: int = 10) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop_tracing(self) -> None:
+        """Stop tracemalloc and drop its snapshots (their traces are only meaningful while tracing)"""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def take_snapshot(self) -> int:
+        """
+        Take a tracemalloc snapshot, keeping the last max_snapshots
+
+        Returns:
+            int: Snapshot identifier
+
+        Raises:
+            RuntimeError: If tracemalloc is not tracing
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing; start it first")
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>")
+        ))
+        with self._lock:
+            snapshot_id = self._next_snapshot
+            self._next_snapshot += 1
+            self._snapshots[snapshot_id] = (time.time(), snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def _snapshot(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        with self._lock:
+            if snapshot_id not in self._snapshots:
+                raise KeyError(snapshot_id)
+            return self._snapshots[snapshot_id][1]
+
+    def top(self, snapshot_id: int, limit: int = 25, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """
+        Largest allocation sites of a snapshot
+
+        Args:
+            snapshot_id: Snapshot identifier
+            limit: Number of sites
+            group_by: lineno, filename or traceback
+
+        Raises:
+            KeyError: If the snapshot does not exist (or was discarded)
+        """
+        return [
+            {"size_kb": round(stat.size / 1024, 1), "count": stat.count, "traceback": stat.traceback.format()}
+            for stat in self._snapshot(snapshot_id).statistics(group_by)[:limit]
+        ]
+
+    def diff(self, from_id: int, to_id: int, limit: int = 25, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """
+        Allocation sites that grew the most between two snapshots
+
+        Raises:
+            KeyError: If a snapshot does not exist (or was discarded)
+        """
+        stats = self._snapshot(to_id).compare_to(self._snapshot(from_id), group_by)
+        return [
+            {
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "size_kb": round(stat.size / 1024, 1),
+                "count_diff": stat.count_diff,
+                "traceback": stat.traceback.format()
+            }
+            for stat in stats[:limit]
+        ]
+
+    def tensor_stats(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Live torch tensors of the process, grouped by device, dtype and shape
+
+        Walks every object tracked by the garbage collector: meant for on-demand
+        diagnostics, not for a hot path.
+        """
+        import torch
+        groups: Dict[Tuple[str, str, Tuple[int, ...]], List[int]] = {}
+        parameter_bytes = 0
+        with warnings.catch_warnings():
+            # isinstance() on some lazily imported module objects warns about deprecations
+            warnings.simplefilter("ignore")
+            for obj in gc.get_objects():
+                try:
+                    if not isinstance(obj, torch.Tensor) or obj.is_meta:
+                        continue
+                    size = obj.element_size() * obj.nelement()
+                except Exception:
+                    continue
+                if isinstance(obj, torch.nn.Parameter):
+                    parameter_bytes += size
+                group = groups.setdefault((str(obj.device), str(obj.dtype).replace("torch.", ""), tuple(obj.shape)), [0, 0])
+                group[0] += 1
+                group[1] += size
+        largest = sorted(groups.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        stats: Dict[str, Any] = {
+            "tensors": sum(count for count, _ in groups.values()),
+            "tensor_mb": round(sum(size for _, size in groups.values()) / 2**20, 1),
+            "parameter_mb": round(parameter_bytes / 2**20, 1),
+            "intra_op_threads": torch.get_num_threads(),
+            "largest": [
+                {"device": device, "dtype": dtype, "shape": list(shape), "count": count, "mb": round(size / 2**20, 2)}
+                for (device, dtype, shape), (count, size) in largest
+            ]
+        }
+        if torch.cuda.is_available():
+            stats["cuda"] = {
+                "allocated_mb": round(torch.cuda.memory_allocated() / 2**20, 1),
+                "reserved_mb": round(torch.cuda.memory_reserved() / 2**20, 1),
+                "max_allocated_mb": round(torch.cuda.max_memory_allocated() / 2**20, 1),
+                "allocations": torch.cuda.memory_stats().get("allocation.all.allocated", 0)
+            }
+        return stats
+
+    def trim(self) -> Dict[str, Any]:
+        """
+        Collect garbage and return freed heap pages to the OS (glibc malloc_trim)
+
+        An RSS that drops here was fragmentation or cached free memory, not a leak.
+        """
+        before = rss_bytes()
+        collected = gc.collect()
+        trimmed = False
+        try:
+            trimmed = bool(ctypes.CDLL("libc.so.6").malloc_trim(0))
+        except (OSError, AttributeError):
+            pass
+        return {
+            "collected_objects": collected,
+            "malloc_trim": trimmed,
+            "rss_before_mb": round(before / 2**20, 1),
+            "rss_after_mb": round(rss_bytes() / 2**20, 1)
+        }
+
+# Shared by the request middleware and the instrumented stages of the services
+memory_diagnostics = MemoryDiagnostics()
+
+class MemoryDiagnosticsMiddleware:
+    """Records the RSS change of every HTTP request under its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not memory_diagnostics.enabled:
+            await self.app(scope, receive, send)
+            return
+        rss_before, traced_before = rss_bytes(), _traced()
+        token = current_request.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
+            memory_diagnostics.record_request(_route_name(scope), rss_before, traced_before)
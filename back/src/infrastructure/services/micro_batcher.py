@@ -0,0 +1,97 @@
+import asyncio
+import os
+from typing import Any, List, Optional, Tuple
+from PIL import Image
+
+class MicroBatcher:
+    """
+    Groups concurrent image classifications into batched model calls.
+
+    Callers submit one decoded image at a time; a worker task collects the images
+    waiting (up to max_batch_size, or whatever arrived within max_wait_ms of the
+    first one) and runs them through service.classify_batch in one forward pass,
+    off the event loop. While a batch runs new images keep queueing, so the batch
+    size grows with the load. Images leased from different model versions are
+    never mixed in the same call.
+    """
+
+    def __init__(self, name: str, max_batch_size: Optional[int] = None, max_wait_ms: Optional[float] = None):
+        """
+        Initialize the batcher
+
+        Args:
+            name: Model name, used in the environment variables (MICRO_BATCH_<NAME>_MAX_SIZE, MICRO_BATCH_<NAME>_MAX_WAIT_MS)
+            max_batch_size: Largest batch run at once
+            max_wait_ms: Longest time the first image of a batch waits for others
+        """
+        prefix = f"MICRO_BATCH_{name.upper()}"
+        self.name = name
+        self.max_batch_size = max_batch_size or int(os.getenv(f"{prefix}_MAX_SIZE", "16"))
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else float(os.getenv(f"{prefix}_MAX_WAIT_MS", "10"))) / 1000
+        self.batches = 0
+        self.images = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def classify(self, service: Any, pil_image: Image.Image) -> Tuple[str, float]:
+        """
+        Classify one image as part of the next batch
+
+        Args:
+            service: Model service (active version leased by the caller) with a classify_batch method
+            pil_image: Decoded RGB image, or uint8 RGB array of a raw upload
+
+        Returns:
+            Tuple[str, float]: Predicted class name and its probability
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((service, pil_image, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Callers that already gave up (client disconnected) are skipped
+            pending = [item for item in pending if not item[2].done()]
+            for service in {id(item[0]): item[0] for item in pending}.values():
+                group = [item for item in pending if item[0] is service]
+                await self._run_batch(service, group)
+
+    async def _run_batch(self, service: Any, group: List[tuple]) -> None:
+        try:
+            results = await asyncio.to_thread(service.classify_batch, [image for _, image, _ in group])
+        except Exception as e:
+            for _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.images += len(group)
+        for (_, _, future), result in zip(group, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "images": self.images,
+            "avg_batch_size": round(self.images / self.batches, 2) if self.batches else None,
+            "queued": self._queue.qsize() if self._queue else 0
+        }
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+from src.infrastructure.services.admission_controller import AdmissionController
+from src.infrastructure.services.model_registry import ModelRegistry
+
+class ModelState:
+    """Load and warm-up state of one model"""
+
+    PENDING = "pending"
+    LOADING = "loading"
+    WARMING = "warming"
+    READY = "ready"
+    DEGRADED = "degraded"  # serving, but with random or fallback weights
+    FAILED = "failed"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = self.PENDING
+        self.weight_source: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.warm_latency_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "weight_source": self.weight_source,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "warm_latency_seconds": self.warm_latency_seconds,
+            "error": self.error
+        }
+
+class ModelLifecycle:
+    """
+    Startup loading and warm-up of the local models.
+
+    Every model service is created at startup instead of on its first request, then
+    MODEL_WARMUP_PASSES synthetic inputs are run through it (service.warm_up()) so
+    lazy allocations, thread pools and JIT caches are in place before real traffic.
+    Models are prepared one after the other in a background thread: the process
+    answers liveness probes immediately and reports ready once every model is warm.
+    A model whose weights could not be loaded (weight_source "random") is degraded
+    and keeps the instance not ready unless READINESS_ALLOW_DEGRADED is enabled.
+    Once a new version has been swapped in through the registry, its weight source
+    and timings replace the ones recorded at startup.
+    """
+
+    def __init__(
+        self,
+        loaders: Dict[str, Callable[[], Any]],
+        admission_controller: Optional[AdmissionController] = None,
+        model_registry: Optional[ModelRegistry] = None
+    ):
+        """
+        Initialize the lifecycle
+
+        Args:
+            loaders: Model name -> callable returning its (loaded) service; names match the admission gates
+            admission_controller: Source of the queue depth reported per model
+            model_registry: Registry serving the models, whose active version is reported after a hot swap
+        """
+        self.loaders = loaders
+        self.admission_controller = admission_controller
+        self.model_registry = model_registry
+        self.warmup_passes = int(os.getenv("MODEL_WARMUP_PASSES", "2"))
+        self.allow_degraded = os.getenv("READINESS_ALLOW_DEGRADED", "false").lower() in ("1", "true", "yes")
+        self.models: Dict[str, ModelState] = {name: ModelState(name) for name in loaders}
+        self.started_at = time.time()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Load and warm up every model in the background (called once at application startup)"""
+        if self._task is None:
+            self._task = asyncio.create_task(asyncio.to_thread(self._prepare_all))
+
+    def _prepare_all(self) -> None:
+        for name in self.loaders:
+            self._prepare(name)
+
+    def _prepare(self, name: str) -> None:
+        state = self.models[name]
+        try:
+            state.status = ModelState.LOADING
+            start = time.perf_counter()
+            service = self.loaders[name]()
+            state.load_seconds = round(time.perf_counter() - start, 3)
+            state.weight_source = getattr(service, "weight_source", None)
+
+            state.status = ModelState.WARMING
+            for index in range(self.warmup_passes):
+                start = time.perf_counter()
+                service.warm_up()
+                elapsed = round(time.perf_counter() - start, 4)
+                # The first pass pays the cold start, the last one shows the steady-state latency
+                if index == 0:
+                    state.warmup_seconds = elapsed
+                state.warm_latency_seconds = elapsed
+
+            state.status = self._status(state.weight_source)
+        except Exception as e:
+            print(f"Error preparing model {name}: {str(e)}")
+            state.status = ModelState.FAILED
+            state.error = str(e)
+
+    def model_state(self, name: str) -> Dict[str, Any]:
+        """
+        State of one model, including its admission queue
+
+        Args:
+            name: Model name
+
+        Returns:
+            dict: Load status, weight source, timings, in-flight requests and queue depth
+        """
+        state = self.models[name].to_dict()
+        active = self.model_registry.active(name) if self.model_registry is not None else None
+        if active is not None:
+            state["version"] = active.version
+            # Versions deployed through the registry are loaded and warmed up by it, not at startup
+            if active.warmup_seconds is not None:
+                state.update(
+                    status=self._status(active.weight_source),
+                    weight_source=active.weight_source,
+                    load_seconds=active.load_seconds,
+                    warmup_seconds=active.warmup_seconds,
+                    warm_latency_seconds=None,
+                    error=None
+                )
+        gate = self.admission_controller.gates.get(name) if self.admission_controller else None
+        if gate is not None:
+            state["in_flight"] = gate.in_flight
+            state["queue_depth"] = gate.queued
+        return state
+
+    @staticmethod
+    def _status(weight_source: Optional[str]) -> str:
+        return ModelState.DEGRADED if weight_source == "random" else ModelState.READY
+
+    def is_model_ready(self, name: str) -> bool:
+        status = self.model_state(name)["status"]
+        return status == ModelState.READY or (status == ModelState.DEGRADED and self.allow_degraded)
+
+    def is_ready(self) -> bool:
+        """True once every model is loaded and warm"""
+        return all(self.is_model_ready(name) for name in self.models)
+
+    def uptime_seconds(self) -> float:
+        return round(time.time() - self.started_at, 1)
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.is_ready() else "not_ready",
+            "uptime_seconds": self.uptime_seconds(),
+            "queue_depth": self.admission_controller.queue_depth() if self.admission_controller else 0,
+            "models": {name: self.model_state(name) for name in self.models}
+        }
@@ -0,0 +1,420 @@
+import asyncio
+import functools
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
+
+def observed_inference(method):
+    """
+    Marks the core inference method of a model service.
+
+    When the registry sets service.inference_observer (only on the active version
+    while a shadow candidate is deployed) the observer receives the method name, its
+    arguments, its result and its latency after every call. Either way the
+    memory of the call is recorded as the inference stage of the current request.
+    """
+    stage = f"inference:{method.__name__}"
+
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        observer = getattr(self, "inference_observer", None)
+        with memory_diagnostics.stage(stage):
+            if observer is None:
+                return method(self, *args)
+            start = time.perf_counter()
+            result = method(self, *args)
+        observer(method.__name__, args, result, time.perf_counter() - start)
+        return result
+    return wrapper
+
+def _outputs(result: Any) -> List[Any]:
+    """Comparable outputs of an inference result: class labels or probabilities"""
+    if hasattr(result, "tolist"):
+        result = result.tolist()
+    if isinstance(result, tuple) and result and isinstance(result[0], str):
+        return [result[0]]
+    if isinstance(result, list):
+        return [item[0] if isinstance(item, tuple) else item for item in result]
+    return [result]
+
+class ModelVersion:
+    """One loaded (or loading) version of a model"""
+
+    LOADING = "loading"
+    ACTIVE = "active"
+    SHADOW = "shadow"
+    DRAINING = "draining"  # replaced, finishing the requests that still hold it
+    RETIRED = "retired"
+    FAILED = "failed"
+
+    def __init__(self, model: str, version: str, source: Optional[str]):
+        self.model = model
+        self.version = version
+        self.source = source
+        self.service: Any = None
+        self.status = self.LOADING
+        self.weight_source: Optional[str] = None
+        self.leases = 0
+        self.created_at = time.time()
+        self.activated_at: Optional[float] = None
+        self.retired_at: Optional[float] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        worker = getattr(self.service, "worker", None)
+        profile = getattr(self.service, "inference_profile", None)
+        return {
+            "version": self.version,
+            "source": self.source,
+            "status": self.status,
+            "weight_source": self.weight_source,
+            "leases": self.leases,
+            "created_at": self.created_at,
+            "activated_at": self.activated_at,
+            "retired_at": self.retired_at,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "inference_profile": profile.describe() if profile is not None else None,
+            "error": self.error,
+            "worker": worker.stats() if worker is not None else None
+        }
+
+class ShadowDeployment:
+    """Candidate version receiving a sampled copy of the active version's inferences"""
+
+    def __init__(self, candidate: ModelVersion, sample_rate: float):
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.mirrored = 0
+        self.skipped = 0  # sampled but dropped because the shadow queue was full
+        self.errors = 0
+        self.compared = 0
+        self.agreements = 0
+        self.numeric_compared = 0
+        self.abs_difference = 0.0
+        self.primary_seconds = 0.0
+        self.shadow_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, primary: Any, shadow: Any, primary_seconds: float, shadow_seconds: float) -> None:
+        with self._lock:
+            self.mirrored += 1
+            self.primary_seconds += primary_seconds
+            self.shadow_seconds += shadow_seconds
+            for expected, actual in zip(_outputs(primary), _outputs(shadow)):
+                if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+                    self.numeric_compared += 1
+                    self.abs_difference += abs(expected - actual)
+                else:
+                    self.compared += 1
+                    self.agreements += int(expected == actual)
+
+    def record_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self.candidate.version,
+                "sample_rate": self.sample_rate,
+                "mirrored": self.mirrored,
+                "skipped": self.skipped,
+                "errors": self.errors,
+                "agreement_rate": round(self.agreements / self.compared, 4) if self.compared else None,
+                "mean_abs_difference": round(self.abs_difference / self.numeric_compared, 6) if self.numeric_compared else None,
+                "primary_avg_ms": round(1000 * self.primary_seconds / self.mirrored, 2) if self.mirrored else None,
+                "shadow_avg_ms": round(1000 * self.shadow_seconds / self.mirrored, 2) if self.mirrored else None
+            }
+
+class ModelRegistry:
+    """
+    Versioned registry of the local models with zero-downtime swaps.
+
+    Each model (lesion, dental, cough, deepstroke) has one active version. Requests
+    take a lease on it for their duration. A new version is loaded and warmed up in a
+    background thread and then swapped in atomically; the replaced version keeps
+    serving the requests that already hold it and is released when its last lease
+    ends. A candidate can also run in shadow mode: a sampled fraction of the active
+    version's inferences is replayed on it in the background (never on the request
+    path) to compare latency and outputs before promoting it.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[..., Any]]):
+        """
+        Initialize the registry
+
+        Args:
+            factories: Model name -> service class; called without arguments for the default
+                       weights and with the new source (model name or weights path) for a new version
+        """
+        self.factories = factories
+        self.warmup_passes = int(os.getenv("MODEL_WARMUP_PASSES", "2"))
+        self.shadow_max_pending = int(os.getenv("SHADOW_MAX_PENDING", "8"))
+        self._active: Dict[str, ModelVersion] = {}
+        self._versions: Dict[str, List[ModelVersion]] = {name: [] for name in factories}
+        self._shadows: Dict[str, ShadowDeployment] = {}
+        self._lock = threading.RLock()
+        self._load_locks = {name: threading.Lock() for name in factories}
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_pending = 0
+        self._tasks: set = set()
+
+    def _next_version(self, name: str) -> str:
+        return f"v{len(self._versions[name]) + 1}"
+
+    def _active_version(self, name: str) -> ModelVersion:
+        """Active version of a model; the first call loads the default weights"""
+        active = self._active.get(name)
+        if active is not None:
+            return active
+        with self._load_locks[name]:
+            if name not in self._active:
+                version = ModelVersion(name, self._next_version(name), None)
+                start = time.perf_counter()
+                version.service = self.factories[name]()
+                version.load_seconds = round(time.perf_counter() - start, 3)
+                version.weight_source = getattr(version.service, "weight_source", None)
+                with self._lock:
+                    self._versions[name].append(version)
+                    version.status = ModelVersion.ACTIVE
+                    version.activated_at = time.time()
+                    self._active[name] = version
+            return self._active[name]
+
+    def active(self, name: str) -> Optional[ModelVersion]:
+        """Active version of a model if one is loaded (never triggers a load)"""
+        return self._active.get(name)
+
+    def loaded(self, name: str) -> Any:
+        """Service of the active version if it is already loaded (never triggers a load)"""
+        active = self._active.get(name)
+        return active.service if active is not None else None
+
+    def current(self, name: str) -> Any:
+        """Service of the active version (not leased; for callers that only hold it during one call)"""
+        return self._active_version(name).service
+
+    @asynccontextmanager
+    async def lease(self, name: str):
+        """
+        Hold the active version of a model for the duration of the block
+
+        Args:
+            name: Model name
+
+        Yields:
+            The service of the active version; it stays loaded until the block ends even if a new version is swapped in
+        """
+        # Taken under the lock the swap holds, so the version cannot be retired between reading and leasing it
+        with self._lock:
+            version = self._active.get(name)
+            if version is not None:
+                version.leases += 1
+        if version is None:
+            await asyncio.to_thread(self._active_version, name)
+            with self._lock:
+                version = self._active[name]
+                version.leases += 1
+        try:
+            yield version.service
+        finally:
+            with self._lock:
+                version.leases -= 1
+                if version.status == ModelVersion.DRAINING and version.leases == 0:
+                    self._retire(version)
+
+    def deploy(self, name: str, source: Optional[str], version: Optional[str] = None, mode: str = "active", sample_rate: float = 0.1) -> Dict[str, Any]:
+        """
+        Load a new version in the background
+
+        Args:
+            name: Model name
+            source: Hugging Face model name, or path of the weights file, of the new version (None for the default)
+            version: Version label (defaults to v<n>)
+            mode: "active" to swap traffic to it once warm, "shadow" to mirror sampled traffic to it
+            sample_rate: Fraction of inferences mirrored in shadow mode
+
+        Returns:
+            dict: The new version, still loading
+
+        Raises:
+            KeyError: If the model is unknown
+            ValueError: If the mode, sample rate or version label is not valid
+        """
+        if name not in self.factories:
+            raise KeyError(name)
+        if mode not in ("active", "shadow"):
+            raise ValueError(f"Unknown mode: {mode}")
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError("sample_rate must be in (0, 1]")
+        with self._lock:
+            label = version or self._next_version(name)
+            if any(existing.version == label for existing in self._versions[name]):
+                raise ValueError(f"Version {label} of {name} already exists")
+            new_version = ModelVersion(name, label, source)
+            self._versions[name].append(new_version)
+
+        task = asyncio.create_task(asyncio.to_thread(self._prepare, new_version, mode, sample_rate))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return new_version.to_dict()
+
+    def _prepare(self, version: ModelVersion, mode: str, sample_rate: float) -> None:
+        factory = self.factories[version.model]
+        try:
+            start = time.perf_counter()
+            version.service = factory(version.source) if version.source else factory()
+            version.load_seconds = round(time.perf_counter() - start, 3)
+            version.weight_source = getattr(version.service, "weight_source", None)
+            if version.weight_source == "random":
+                raise RuntimeError(f"Weights could not be loaded from {version.source}")
+            # The Hugging Face services fall back to their default model when a name cannot be loaded
+            loaded_name = getattr(version.service, "model_name", None)
+            if version.source and loaded_name is not None and loaded_name != version.source:
+                raise RuntimeError(f"Model {version.source} could not be loaded ({loaded_name} was loaded instead)")
+
+            start = time.perf_counter()
+            for _ in range(self.warmup_passes):
+                version.service.warm_up()
+            version.warmup_seconds = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            print(f"Error loading {version.model} version {version.version}: {str(e)}")
+            self._release(version)
+            version.status = ModelVersion.FAILED
+            version.error = str(e)
+            return
+
+        if mode == "active":
+            self._activate(version)
+        else:
+            self._start_shadow(version, sample_rate)
+
+    def _activate(self, version: ModelVersion) -> None:
+        """Atomically route new requests to a version; the previous one drains"""
+        with self._lock:
+            previous = self._active.get(version.model)
+            shadow = self._shadows.get(version.model)
+            if shadow is not None and shadow.candidate is version:
+                del self._shadows[version.model]
+            version.status = ModelVersion.ACTIVE
+            version.activated_at = time.time()
+            self._active[version.model] = version
+            if previous is not None and previous is not version:
+                previous.service.inference_observer = None
+                previous.status = ModelVersion.DRAINING
+                if previous.leases == 0:
+                    self._retire(previous)
+            # A shadow still running keeps comparing against the new active version
+            if version.model in self._shadows:
+                version.service.inference_observer = self._observer(version.model)
+
+    def _release(self, version: ModelVersion) -> None:
+        # Dropping the last reference lets the weights be freed; a worker process is stopped
+        close = getattr(version.service, "close", None)
+        if close is not None:
+            close()
+        version.service = None
+
+    def _retire(self, version: ModelVersion) -> None:
+        self._release(version)
+        version.status = ModelVersion.RETIRED
+        version.retired_at = time.time()
+
+    def _start_shadow(self, candidate: ModelVersion, sample_rate: float) -> None:
+        with self._lock:
+            previous = self._shadows.get(candidate.model)
+            if previous is not None:
+                self._retire(previous.candidate)
+            candidate.status = ModelVersion.SHADOW
+            self._shadows[candidate.model] = ShadowDeployment(candidate, sample_rate)
+        self._active_version(candidate.model).service.inference_observer = self._observer(candidate.model)
+
+    def _observer(self, name: str) -> Callable:
+        def observe(method: str, args: Tuple, result: Any, elapsed: float) -> None:
+            shadow = self._shadows.get(name)
+            if shadow is None or random.random() >= shadow.sample_rate:
+                return
+            with self._lock:
+                if self._shadow_pending >= self.shadow_max_pending:
+                    shadow.skipped += 1
+                    return
+                self._shadow_pending += 1
+            self._shadow_executor.submit(self._mirror, shadow, method, args, result, elapsed)
+        return observe
+
+    def _mirror(self, shadow: ShadowDeployment, method: str, args: Tuple, primary: Any, primary_seconds: float) -> None:
+        try:
+            service = shadow.candidate.service
+            if service is None:
+                return
+            start = time.perf_counter()
+            result = getattr(service, method)(*args)
+            shadow.record(primary, result, primary_seconds, time.perf_counter() - start)
+        except Exception as e:
+            print(f"Shadow inference of {shadow.candidate.model} {shadow.candidate.version} failed: {str(e)}")
+            shadow.record_error()
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    def promote_shadow(self, name: str) -> Dict[str, Any]:
+        """
+        Make the shadow candidate of a model the active version (it is already warm)
+
+        Raises:
+            KeyError: If the model has no shadow candidate
+        """
+        with self._lock:
+            shadow = self._shadows[name]
+            self._activate(shadow.candidate)
+            return shadow.candidate.to_dict()
+
+    def stop_shadow(self, name: str) -> Dict[str, Any]:
+        """
+        Stop mirroring traffic to the shadow candidate of a model and release it
+
+        Raises:
+            KeyError: If the model has no shadow candidate
+        """
+        with self._lock:
+            shadow = self._shadows.pop(name)
+            active = self._active.get(name)
+            if active is not None and active.service is not None:
+                active.service.inference_observer = None
+            self._retire(shadow.candidate)
+            return shadow.to_dict()
+
+    def model_stats(self, name: str) -> Dict[str, Any]:
+        """
+        Versions of a model
+
+        Raises:
+            KeyError: If the model is unknown
+        """
+        with self._lock:
+            active = self._active.get(name)
+            shadow = self._shadows.get(name)
+            return {
+                "active_version": active.version if active else None,
+                "versions": [version.to_dict() for version in self._versions[name]],
+                "shadow": shadow.to_dict() if shadow else None
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: self.model_stats(name) for name in self.factories}
+
+    def close(self) -> None:
+        """Release every loaded version, stopping its worker process if it has one (application shutdown)"""
+        with self._lock:
+            for versions in self._versions.values():
+                for version in versions:
+                    if version.service is not None:
+                        self._release(version)
@@ -0,0 +1,160 @@
+import json
+import socket
+import struct
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from PIL import Image
+from src.infrastructure.services.image_preprocessing import BatchPreprocessor, PreprocessConfig
+
+# Wire format of the gateway <-> model server calls (MODEL_SERVING_MODE=remote).
+#
+# Every message is one frame: a 12-byte prefix (header length, 4 bytes, and body length,
+# 8 bytes, big endian), a UTF-8 JSON header and a binary body. Arrays, byte strings and
+# images travel raw in the body, at aligned offsets described in the header, so large
+# inputs are neither pickled nor base64-encoded; scalars, strings, lists and dicts stay in
+# the JSON header. Nothing received is unpickled, so a peer cannot run code in the other.
+
+_PREFIX = struct.Struct("!IQ")
+_ALIGNMENT = 8
+MAX_HEADER_BYTES = 16 << 20
+
+class RemoteCallError(Exception):
+    """Raised on the caller when the remote method raised; the connection stays usable"""
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def encode(value: Any, buffers: List[memoryview], offset: int = 0) -> Tuple[Any, int]:
+    """
+    Describe a value for the header, appending its binary parts to the body
+
+    Args:
+        value: None, bool, int, float, str, list, tuple, dict with str keys, numpy array,
+            torch tensor, bytes, PIL image or BatchPreprocessor
+        buffers: Body parts, padding included, in order
+        offset: Body length so far
+
+    Returns:
+        Tuple[Any, int]: JSON-serializable description and the new body length
+
+    Raises:
+        TypeError: If the value cannot be sent
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value, offset
+    if isinstance(value, np.generic):
+        return value.item(), offset
+    if hasattr(value, "detach"):
+        value = value.detach().cpu().numpy()
+    if isinstance(value, Image.Image):
+        spec, offset = encode(np.asarray(value.convert("RGB")), buffers, offset)
+        return {"image": spec["array"]}, offset
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        data = memoryview(value).cast("B")
+        spec = {"array": [offset, list(value.shape), value.dtype.str]}
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = memoryview(value).cast("B")
+        spec = {"bytes": [offset, data.nbytes]}
+    elif isinstance(value, (list, tuple)):
+        items = []
+        for item in value:
+            item_spec, offset = encode(item, buffers, offset)
+            items.append(item_spec)
+        return {"list": items}, offset
+    elif isinstance(value, dict):
+        items = {}
+        for key, item in value.items():
+            items[str(key)], offset = encode(item, buffers, offset)
+        return {"dict": items}, offset
+    elif isinstance(value, BatchPreprocessor):
+        config = value.config
+        table, offset = encode(config.table, buffers, offset)
+        return {"preprocessor": {
+            "table": table,
+            "size": config.size,
+            "shortest_edge": config.shortest_edge,
+            "crop_size": config.crop_size,
+            "resample": config.resample,
+            "resize_backend": config.resize_backend
+        }}, offset
+    else:
+        raise TypeError(f"Cannot send a {type(value).__name__} to a model server")
+    buffers.append(data)
+    padding = _aligned(data.nbytes) - data.nbytes
+    if padding:
+        buffers.append(memoryview(bytes(padding)))
+    return spec, offset + data.nbytes + padding
+
+def decode(spec: Any, body: memoryview) -> Any:
+    """
+    Rebuild a value described by encode
+
+    Arrays are writable views on the body (no copy); byte strings are copied out of it.
+    Tuples come back as lists.
+    """
+    if not isinstance(spec, dict):
+        return spec
+    kind, payload = next(iter(spec.items()))
+    if kind == "array":
+        offset, shape, dtype = payload
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape, dtype=np.int64))
+        return np.frombuffer(body, dtype=dtype, count=count, offset=offset).reshape(shape)
+    if kind == "image":
+        return Image.fromarray(decode({"array": payload}, body))
+    if kind == "bytes":
+        offset, length = payload
+        return bytes(body[offset:offset + length])
+    if kind == "list":
+        return [decode(item, body) for item in payload]
+    if kind == "dict":
+        return {key: decode(item, body) for key, item in payload.items()}
+    if kind == "preprocessor":
+        return BatchPreprocessor(PreprocessConfig(
+            table=decode(payload["table"], body),
+            size=tuple(payload["size"]) if payload["size"] else None,
+            shortest_edge=payload["shortest_edge"],
+            crop_size=tuple(payload["crop_size"]) if payload["crop_size"] else None,
+            resample=payload["resample"],
+            resize_backend=payload["resize_backend"]
+        ))
+    raise ValueError(f"Unknown value kind in a model server frame: {kind}")
+
+def send_frame(sock: socket.socket, header: Dict[str, Any], buffers: List[memoryview] = ()) -> None:
+    """Write one frame: prefix, JSON header, then the body parts"""
+    header_bytes = json.dumps(header, separators=(",", ":")).encode()
+    body_length = sum(buffer.nbytes for buffer in buffers)
+    sock.sendall(_PREFIX.pack(len(header_bytes), body_length) + header_bytes)
+    for buffer in buffers:
+        sock.sendall(buffer)
+
+def _recv_into(sock: socket.socket, view: memoryview) -> None:
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionResetError("connection closed by the peer")
+        received += count
+
+def recv_frame(sock: socket.socket, max_body_bytes: int) -> Tuple[Dict[str, Any], memoryview]:
+    """
+    Read one frame
+
+    Returns:
+        Tuple[Dict[str, Any], memoryview]: Header and writable body
+
+    Raises:
+        ConnectionResetError: If the peer closed the connection
+        ValueError: If the frame is larger than allowed
+    """
+    prefix = bytearray(_PREFIX.size)
+    _recv_into(sock, memoryview(prefix))
+    header_length, body_length = _PREFIX.unpack(prefix)
+    if header_length > MAX_HEADER_BYTES or body_length > max_body_bytes:
+        raise ValueError(f"Frame of {header_length + body_length} bytes exceeds the limit")
+    header_bytes = bytearray(header_length)
+    _recv_into(sock, memoryview(header_bytes))
+    body = bytearray(body_length)
+    _recv_into(sock, memoryview(body))
+    return json.loads(header_bytes), memoryview(body)
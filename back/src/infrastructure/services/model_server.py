@@ -0,0 +1,223 @@
+import hmac
+import importlib
+import ipaddress
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+from src.infrastructure.services.model_rpc import decode, encode, recv_frame, send_frame
+
+# Models a model server can host: service class, methods callable by the gateway and
+# attributes sent to it once (with weight_source), mirroring the worker processes
+SERVED_MODELS: Dict[str, Tuple[str, Tuple[str, ...], Tuple[str, ...]]] = {
+    "lesion": (
+        "src.infrastructure.services.huggingface_vision_service:HuggingFaceVisionService",
+        ("classify_batch", "classify_uint8", "warm_up", "cascade_stats"),
+        ("model_name", "preprocessor")
+    ),
+    "dental": (
+        "src.infrastructure.services.huggingface_dental_service:HuggingFaceDentalService",
+        ("classify_batch", "classify_uint8", "warm_up"),
+        ("model_name", "preprocessor")
+    ),
+    "cough": (
+        "src.infrastructure.services.huggingface_cough_classification:CoughClassificationService",
+        ("predict_waveform", "predict_features", "warm_up"),
+        ("path_model",)
+    ),
+    "deepstroke": (
+        "src.infrastructure.services.deepstroke_service:DeepStrokeService",
+        ("probabilities_from_bytes", "warm_up"),
+        ("_model_version",)
+    )
+}
+
+class _Handler(socketserver.BaseRequestHandler):
+    """One persistent gateway connection: calls are answered in order until it closes"""
+
+    def handle(self) -> None:
+        server: "ModelServer" = self.server.model_server
+        sock: socket.socket = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        while True:
+            try:
+                header, body = recv_frame(sock, server.max_body_bytes)
+            except (ConnectionError, OSError, ValueError):
+                return
+            reply, buffers = server.handle(header, body)
+            try:
+                send_frame(sock, reply, buffers)
+            except (ConnectionError, OSError):
+                return
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def _is_loopback(host: str) -> bool:
+    """Whether every address host resolves to is a loopback address"""
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split("%")[0]).is_loopback for address in addresses)
+
+class ModelServer:
+    """
+    A model service served to gateways over the network (MODEL_SERVING_MODE=remote).
+
+    The service is the same one the API loads in process; it is loaded and warmed up
+    before the server listens, so an endpoint that answers its health check is ready.
+    Each gateway connection has its own thread; at most MODEL_SERVER_CONCURRENCY calls
+    run the model at once and the others wait, counted in the load reported to the
+    gateways with every reply, which route each call to the least-loaded endpoint. On
+    shutdown the server reports itself as draining, so the gateways stop sending calls,
+    and finishes the calls already received.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        source: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 9100,
+        concurrency: Optional[int] = None,
+        token: Optional[str] = None
+    ):
+        """
+        Args:
+            model: Model to serve (lesion, dental, cough or deepstroke)
+            source: Argument of the service class (model name or weights path); None for its defaults
+            host: Address to listen on (loopback by default)
+            port: Port to listen on
+            concurrency: Calls running the model at once. Defaults to MODEL_SERVER_CONCURRENCY (1)
+            token: Secret expected from the gateways. Defaults to MODEL_RPC_TOKEN (no check when empty)
+
+        Raises:
+            ValueError: If the model is unknown, or the server would listen beyond loopback without a token
+        """
+        if model not in SERVED_MODELS:
+            raise ValueError(f"Unknown model: {model}. Expected one of {', '.join(SERVED_MODELS)}")
+        self.model = model
+        self.source = source
+        self.service_path, self.methods, self.exports = SERVED_MODELS[model]
+        self.host = host
+        self.port = port
+        self.concurrency = concurrency or int(os.getenv("MODEL_SERVER_CONCURRENCY", "1"))
+        self.token = token if token is not None else os.getenv("MODEL_RPC_TOKEN", "")
+        if not self.token and not _is_loopback(host):
+            # Anyone who can reach the port could run inference and read the endpoint info
+            raise ValueError(f"Refusing to listen on {host} without MODEL_RPC_TOKEN; set a token or listen on 127.0.0.1")
+        self.max_body_bytes = int(os.getenv("MODEL_SERVER_MAX_BODY_MB", "256")) << 20
+        self.service: Any = None
+        self.draining = False
+        self.load = 0
+        self.calls = 0
+        self.errors = 0
+        self.started_at = time.time()
+        self._slots = threading.Semaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._server: Optional[_ThreadingServer] = None
+
+    def load_service(self, warmup_passes: Optional[int] = None) -> None:
+        """Create the service and run MODEL_WARMUP_PASSES synthetic inferences through it"""
+        module_name, _, class_name = self.service_path.partition(":")
+        service_class = getattr(importlib.import_module(module_name), class_name)
+        self.service = service_class(self.source) if self.source else service_class()
+        passes = warmup_passes if warmup_passes is not None else int(os.getenv("MODEL_WARMUP_PASSES", "2"))
+        for _ in range(passes):
+            self.service.warm_up()
+
+    def info(self) -> Dict[str, Any]:
+        """Identity of the endpoint, sent once to each gateway"""
+        return {
+            "model": self.model,
+            "service": self.service_path,
+            "source": self.source,
+            "weight_source": getattr(self.service, "weight_source", None),
+            **{name: getattr(self.service, name, None) for name in self.exports}
+        }
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "draining" if self.draining else "ok",
+            "model": self.model,
+            "source": self.source,
+            "load": self.load,
+            "concurrency": self.concurrency,
+            "calls": self.calls,
+            "errors": self.errors,
+            "uptime_seconds": round(time.time() - self.started_at, 1)
+        }
+
+    def handle(self, header: Dict[str, Any], body: memoryview) -> Tuple[Dict[str, Any], list]:
+        """Answer one request frame; the reply carries the load left on the server"""
+        buffers: list = []
+        request_id = header.get("id")
+        method = header.get("method")
+        if self.token and not hmac.compare_digest(str(header.get("token", "")), self.token):
+            return {"id": request_id, "status": "error", "error": "invalid token", "load": self.load}, buffers
+        try:
+            if method == "_health":
+                result, _ = encode(self.health(), buffers)
+            elif method == "_info":
+                result, _ = encode(self.info(), buffers)
+            elif method in self.methods:
+                result, _ = encode(self._run(method, decode(header.get("args"), body)), buffers)
+            else:
+                raise AttributeError(f"{method} is not served by the {self.model} model server")
+            reply = {"id": request_id, "status": "ok", "result": result}
+        except Exception as e:
+            buffers = []
+            reply = {"id": request_id, "status": "error", "error": f"{type(e).__name__}: {str(e)}"}
+        reply["load"] = self.load
+        return reply, buffers
+
+    def _run(self, method: str, args: Sequence[Any]) -> Any:
+        with self._lock:
+            self.load += 1
+            self.calls += 1
+        try:
+            with self._slots:
+                return getattr(self.service, method)(*args)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.load -= 1
+                self._idle.notify_all()
+
+    def listen(self) -> None:
+        """Bind the listening socket (raises OSError if the port is taken)"""
+        self._server = _ThreadingServer((self.host, self.port), _Handler)
+        self._server.model_server = self
+        self.port = self._server.server_address[1]
+        print(f"Model server {self.model} listening on {self.host}:{self.port}")
+
+    def serve_forever(self) -> None:
+        """Answer the gateways until shutdown() is called"""
+        if self._server is None:
+            self.listen()
+        self._server.serve_forever()
+
+    def shutdown(self, drain_seconds: Optional[float] = None) -> None:
+        """
+        Stop accepting work: report draining for drain_seconds (MODEL_SERVER_DRAIN_SECONDS,
+        default 10) so the gateways see it on their next health check, wait for the calls
+        in progress, then close the listener
+        """
+        self.draining = True
+        drain_seconds = drain_seconds if drain_seconds is not None else float(os.getenv("MODEL_SERVER_DRAIN_SECONDS", "10"))
+        deadline = time.monotonic() + drain_seconds
+        time.sleep(max(0.0, min(drain_seconds, float(os.getenv("MODEL_REMOTE_HEALTH_INTERVAL_SECONDS", "5")))))
+        with self._idle:
+            while self.load and time.monotonic() < deadline:
+                self._idle.wait(deadline - time.monotonic())
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
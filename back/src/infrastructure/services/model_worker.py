@@ -0,0 +1,317 @@
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from src.domain.exceptions.model_worker_error import ModelWorkerError
+
+# Arrays are placed at offsets aligned to a cache line inside the shared buffer
+_ALIGNMENT = 64
+
+def _aligned(size: int) -> int:
+    return (size + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def _pack(value: Any, arrays: List[Tuple[int, Any]], offset: int) -> Tuple[Any, int]:
+    """
+    Describe an argument for the worker, moving its arrays and byte strings to the shared buffer
+
+    Returns:
+        Tuple[Any, int]: Picklable description of the argument and the next free offset
+    """
+    if isinstance(value, np.ndarray):
+        value = np.ascontiguousarray(value)
+        arrays.append((offset, value))
+        return ("array", offset, value.shape, value.dtype.str), offset + _aligned(value.nbytes)
+    if isinstance(value, (bytes, bytearray)):
+        arrays.append((offset, np.frombuffer(value, dtype=np.uint8)))
+        return ("bytes", offset, len(value)), offset + _aligned(len(value))
+    if isinstance(value, (list, tuple)):
+        items = []
+        for item in value:
+            packed, offset = _pack(item, arrays, offset)
+            items.append(packed)
+        return ("list", items), offset
+    return ("value", value), offset
+
+def _unpack(spec: Tuple, buffer: Optional[shared_memory.SharedMemory]) -> Any:
+    kind = spec[0]
+    if kind == "array":
+        _, offset, shape, dtype = spec
+        # A view on the shared buffer: the worker reads the input without copying it
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer.buf, offset=offset)
+    if kind == "bytes":
+        _, offset, length = spec
+        return bytes(buffer.buf[offset:offset + length])
+    if kind == "list":
+        return [_unpack(item, buffer) for item in spec[1]]
+    return spec[1]
+
+def _serve(service_path: str, source: Optional[str], threads: int, exports: Sequence[str], connection: Connection) -> None:
+    """Entry point of a worker process: load the service, then run the calls received on the pipe"""
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        # numpy/scipy BLAS pools (librosa, scikit-learn) get the same thread budget
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+
+        module_name, _, class_name = service_path.partition(":")
+        service_class = getattr(importlib.import_module(module_name), class_name)
+        service = service_class(source) if source else service_class()
+        info = {name: getattr(service, name, None) for name in ("weight_source", *exports)}
+        connection.send(("ready", info))
+    except Exception as e:
+        connection.send(("error", f"{type(e).__name__}: {str(e)}"))
+        return
+
+    buffer = None
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        method, buffer_name, specs = message
+        try:
+            if buffer_name is not None and (buffer is None or buffer.name != buffer_name):
+                if buffer is not None:
+                    try:
+                        buffer.close()
+                    except BufferError:
+                        pass  # still referenced by a previous input; released with it
+                buffer = shared_memory.SharedMemory(name=buffer_name)
+            result = getattr(service, method)(*[_unpack(spec, buffer) for spec in specs])
+            if hasattr(result, "detach"):
+                # Tensors are returned as numpy arrays, pickled in one piece instead of shared by file descriptor
+                result = result.detach().cpu().numpy()
+            reply = ("ok", result)
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {str(e)}")
+        connection.send(reply)
+
+class ModelWorker:
+    """
+    One model service running in its own process.
+
+    The service is created in a spawned process with its own torch/BLAS thread
+    budget, so its inference neither holds the API process's GIL nor shares its
+    memory: a spike or a crash stays inside the worker. Array and byte-string
+    arguments are written to a shared memory buffer owned by the API process and
+    read in place by the worker (only their shape and offset travel through the
+    pipe); other arguments and the (small) results are pickled. Calls are run one
+    at a time. A call that does not answer within MODEL_WORKER_CALL_TIMEOUT_SECONDS
+    kills the worker. A monitor thread restarts the worker as soon as it exits;
+    while the replacement loads, calls fail fast with ModelWorkerError.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        service_path: str,
+        source: Optional[str] = None,
+        exports: Sequence[str] = (),
+        threads: Optional[int] = None
+    ):
+        """
+        Start the worker and wait until its model is loaded
+
+        Args:
+            name: Model name, used in the environment variables (MODEL_WORKER_<NAME>_THREADS)
+            service_path: "module:Class" of the service created in the worker
+            source: Argument of the service class (model name or weights path); None for its defaults
+            exports: Service attributes copied back once loaded (available in info, with weight_source)
+            threads: Intra-op threads of the worker. Defaults to MODEL_WORKER_<NAME>_THREADS or a quarter of the CPUs
+
+        Raises:
+            ModelWorkerError: If the service cannot be loaded in the worker
+        """
+        self.name = name
+        self.service_path = service_path
+        self.source = source
+        self.exports = tuple(exports)
+        self.threads = threads or int(os.getenv(f"MODEL_WORKER_{name.upper()}_THREADS") or 0) or max(1, (os.cpu_count() or 1) // 4)
+        self.start_timeout = float(os.getenv("MODEL_WORKER_START_TIMEOUT_SECONDS", "300"))
+        self.call_timeout = float(os.getenv("MODEL_WORKER_CALL_TIMEOUT_SECONDS", "120"))
+        self.info: Dict[str, Any] = {}
+        self.calls = 0
+        self.crashes = 0
+        self.restarts = 0
+        self.last_exit_code: Optional[int] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._buffer: Optional[shared_memory.SharedMemory] = None
+        self._process = None
+        self._connection: Optional[Connection] = None
+        self._exit_reason = "exited"
+        self._closed = False
+        with self._lock:
+            self._start()
+        self._monitor = threading.Thread(target=self._watch, name=f"model-worker-{name}-monitor", daemon=True)
+        self._monitor.start()
+
+    def _start(self) -> None:
+        self._process, self._connection, self.info = self._launch()
+
+    def _launch(self) -> Tuple[Any, Connection, Dict[str, Any]]:
+        """Start a worker process and wait until its service is loaded (without the lock)"""
+        connection, child_connection = self._context.Pipe()
+        process = self._context.Process(
+            target=_serve,
+            args=(self.service_path, self.source, self.threads, self.exports, child_connection),
+            name=f"model-worker-{self.name}",
+            daemon=True
+        )
+        process.start()
+        # Only the worker keeps its end open, so its exit is seen as EOF on ours
+        child_connection.close()
+        try:
+            if not connection.poll(self.start_timeout):
+                raise ModelWorkerError(self.name, f"not loaded after {self.start_timeout:.0f}s")
+            status, payload = connection.recv()
+        except EOFError:
+            process.join(5)
+            raise ModelWorkerError(self.name, f"exited while loading (exit code {process.exitcode})")
+        except ModelWorkerError:
+            process.kill()
+            process.join(5)
+            raise
+        if status != "ready":
+            process.join(5)
+            raise ModelWorkerError(self.name, payload)
+        return process, connection, payload
+
+    def _kill(self, reason: str) -> None:
+        """Kill a hung or crashed worker; the monitor replaces it (called with the lock held)"""
+        self._exit_reason = reason
+        self._process.kill()
+
+    def _restart(self, process) -> None:
+        """
+        Replace a worker process that exited or was killed. The replacement is loaded
+        without the lock (up to MODEL_WORKER_START_TIMEOUT_SECONDS), so calls made in
+        the meantime fail fast with ModelWorkerError instead of waiting for it.
+        """
+        with self._lock:
+            if self._connection is not None:
+                process.join(5)
+                self.crashes += 1
+                self.last_exit_code = process.exitcode
+                print(f"Model worker {self.name} (pid {process.pid}) {self._exit_reason}, exit code {process.exitcode}; restarting")
+                self._exit_reason = "exited"
+                self._connection.close()
+                self._connection = None
+        process, connection, info = self._launch()
+        with self._lock:
+            if self._closed:
+                process.kill()
+                process.join(5)
+                connection.close()
+                return
+            self._process, self._connection, self.info = process, connection, info
+            self.restarts += 1
+
+    def _watch(self) -> None:
+        delay = 1.0
+        while not self._closed:
+            process = self._process
+            wait([process.sentinel])
+            if self._closed:
+                return
+            try:
+                self._restart(process)
+                delay = 1.0
+            except Exception as e:
+                print(f"Error restarting model worker {self.name}: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    def _write(self, arrays: List[Tuple[int, np.ndarray]], size: int) -> Optional[str]:
+        """Copy the arrays of a call into the shared buffer, growing it when needed"""
+        if not arrays:
+            return None
+        if self._buffer is None or self._buffer.size < size:
+            previous = self._buffer
+            self._buffer = shared_memory.SharedMemory(create=True, size=max(size, 2 * previous.size if previous else 1 << 20))
+            if previous is not None:
+                # The worker still maps the old buffer until its next call; unlinking only removes the name
+                previous.close()
+                previous.unlink()
+        for offset, array in arrays:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=self._buffer.buf, offset=offset)[...] = array
+        return self._buffer.name
+
+    def call(self, method: str, *args: Any) -> Any:
+        """
+        Run a method of the service in the worker
+
+        Args:
+            method: Name of the service method
+            *args: Its arguments; numpy arrays and bytes (also inside lists) go through shared memory
+
+        Returns:
+            The method result (tensors come back as numpy arrays)
+
+        Raises:
+            ModelWorkerError: If the worker crashed, timed out or the method raised
+        """
+        arrays: List[Tuple[int, np.ndarray]] = []
+        specs, size = _pack(list(args), arrays, 0)
+        with self._lock:
+            if self._closed:
+                raise ModelWorkerError(self.name, "closed")
+            if self._connection is None or not self._process.is_alive():
+                raise ModelWorkerError(self.name, "restarting")
+            buffer_name = self._write(arrays, size)
+            self.calls += 1
+            try:
+                self._connection.send((method, buffer_name, specs[1]))
+                if not self._connection.poll(self.call_timeout):
+                    self._kill(f"did not answer {method} within {self.call_timeout:.0f}s")
+                    raise ModelWorkerError(self.name, f"{method} timed out")
+                status, payload = self._connection.recv()
+            except (EOFError, BrokenPipeError, ConnectionResetError):
+                self._kill(f"crashed during {method}")
+                raise ModelWorkerError(self.name, f"crashed during {method}")
+        if status != "ok":
+            raise ModelWorkerError(self.name, payload)
+        return payload
+
+    def close(self) -> None:
+        """Stop the worker and release the shared buffer"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._connection is not None:
+                try:
+                    self._connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            self._process.join(5)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join(5)
+            if self._connection is not None:
+                self._connection.close()
+            if self._buffer is not None:
+                self._buffer.close()
+                self._buffer.unlink()
+                self._buffer = None
+
+    def stats(self) -> Dict[str, Any]:
+        process = self._process
+        return {
+            "pid": process.pid if process else None,
+            "alive": bool(process and process.is_alive()),
+            "threads": self.threads,
+            "calls": self.calls,
+            "crashes": self.crashes,
+            "restarts": self.restarts,
+            "last_exit_code": self.last_exit_code,
+            "shared_buffer_bytes": self._buffer.size if self._buffer else 0
+        }
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from src.infrastructure.services import geohash
+
+class PlacesClinicService:
+    """
+    Nearby clinic search over the Google Places API with a spatial result cache.
+
+    Lookups are cached per (geohash cell, radius). A cell is fetched once with a
+    radius widened by the distance from the cell center to its corner, so the cached
+    result covers a search of the requested radius from any point in the cell; the
+    caller's exact circle is then filtered locally. Entries of neighbor cells are
+    reused when they cover the query circle, concurrent lookups of the same cell
+    share a single Places request and all requests go through one pooled session.
+
+    Places returns at most 20 results per request, so in very dense areas the widened
+    search can rank a few farther places ahead of close ones.
+    """
+
+    PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        timeout: float = 10.0
+    ):
+        """
+        Initialize the clinic search service
+
+        Args:
+            api_key: Google API key. If not provided, looks for GOOGLE_API_KEY
+            ttl_seconds: Lifetime of a cached cell (CLINICS_CACHE_TTL_SECONDS, default 3600)
+            max_entries: Maximum cached cells, least recently used are evicted (CLINICS_CACHE_MAX_ENTRIES, default 5000)
+            timeout: Timeout in seconds of a Places request
+        """
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.ttl_seconds = ttl_seconds or float(os.getenv("CLINICS_CACHE_TTL_SECONDS", "3600"))
+        self.max_entries = max_entries or int(os.getenv("CLINICS_CACHE_MAX_ENTRIES", "5000"))
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        # (cell, radius) -> (expires_at, center_lat, center_lon, fetch_radius, places)
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, float, float, float, List[Dict]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, int], Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "neighbor_hits": 0, "misses": 0, "coalesced": 0}
+
+    def search(self, lat: float, lon: float, radius: int) -> List[Dict]:
+        """
+        Find hospitals and clinics around a point
+
+        Args:
+            lat: Latitude in degrees
+            lon: Longitude in degrees
+            radius: Search radius in meters
+
+        Returns:
+            List[Dict]: Places with nombre, direccion and ubicacion ({"lat", "lng"})
+        """
+        cell = geohash.encode(lat, lon, geohash.precision_for_radius(radius))
+        key = (cell, radius)
+
+        places = self._lookup(key, lat, lon, radius)
+        if places is None:
+            places = self._fetch_coalesced(key)
+
+        return [
+            place for place in places
+            if geohash.haversine_m(lat, lon, place["ubicacion"]["lat"], place["ubicacion"]["lng"]) <= radius
+        ]
+
+    def _lookup(self, key: Tuple[str, int], lat: float, lon: float, radius: int) -> Optional[List[Dict]]:
+        """Return cached places of the cell, or of a neighbor cell whose search covers the query circle"""
+        cell, _ = key
+        now = time.time()
+        with self._lock:
+            for candidate in [cell] + geohash.neighbors(cell):
+                entry = self._cache.get((candidate, radius))
+                if entry is None:
+                    continue
+                expires_at, center_lat, center_lon, fetch_radius, places = entry
+                if expires_at <= now:
+                    del self._cache[(candidate, radius)]
+                    continue
+                if geohash.haversine_m(lat, lon, center_lat, center_lon) + radius <= fetch_radius:
+                    self._cache.move_to_end((candidate, radius))
+                    self.stats["hits" if candidate == cell else "neighbor_hits"] += 1
+                    return places
+        return None
+
+    def _fetch_coalesced(self, key: Tuple[str, int]) -> List[Dict]:
+        """Fetch a cell from Places, sharing the request with concurrent lookups of the same cell"""
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            places = self._fetch_cell(key)
+            future.set_result(places)
+            return places
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def _fetch_cell(self, key: Tuple[str, int]) -> List[Dict]:
+        cell, radius = key
+        center_lat, center_lon = geohash.center(cell)
+        min_lat, min_lon, max_lat, _ = geohash.bounds(cell)
+        # The corner closer to the equator is the farthest one from the center
+        fetch_radius = radius + max(
+            geohash.haversine_m(center_lat, center_lon, min_lat, min_lon),
+            geohash.haversine_m(center_lat, center_lon, max_lat, min_lon)
+        )
+
+        params = {
+            "location": f"{center_lat},{center_lon}",
+            "radius": int(fetch_radius) + 1,
+            "type": "hospital",
+            "key": self.api_key
+        }
+        response = self.session.get(self.PLACES_URL, params=params, timeout=self.timeout)
+        data = response.json()
+
+        places = []
+        for lugar in data.get("results", []):
+            places.append({
+                "nombre": lugar["name"],
+                "direccion": lugar.get("vicinity"),
+                "ubicacion": lugar["geometry"]["location"]
+            })
+
+        # Only successful answers are cached; quota or key errors are retried on the next call
+        if data.get("status") in ("OK", "ZERO_RESULTS"):
+            with self._lock:
+                self._cache[key] = (time.time() + self.ttl_seconds, center_lat, center_lon, fetch_radius, places)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return places
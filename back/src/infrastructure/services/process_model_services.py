@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import torch
+from PIL import Image
+from src.infrastructure.services.huggingface_vision_service import HuggingFaceVisionService
+from src.infrastructure.services.huggingface_dental_service import HuggingFaceDentalService
+from src.infrastructure.services.huggingface_cough_classification import CoughClassificationService
+from src.infrastructure.services.deepstroke_service import DeepStrokeService
+from src.infrastructure.services.model_registry import observed_inference
+from src.infrastructure.services.model_worker import ModelWorker
+from src.infrastructure.services.remote_model_client import RemoteModelClient
+
+# Services served from worker processes (MODEL_SERVING_MODE=process). Each one subclasses the
+# in-process service, so request handling and formatting are unchanged; only the inference
+# method (and the warm-up) is forwarded to the ModelWorker that holds the real model.
+# The Remote* variants (MODEL_SERVING_MODE=remote) forward it instead to model servers on
+# other nodes through a RemoteModelClient, which has the same interface.
+
+class _WorkerVisionService:
+    """Image classifier whose model runs in a worker; images are resized here and sent as uint8 buffers"""
+
+    worker_name: str
+    service_class: type
+    worker_class: type = ModelWorker
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.worker = self.worker_class(
+            self.worker_name,
+            f"{self.service_class.__module__}:{self.service_class.__name__}",
+            model_name,
+            exports=("model_name", "preprocessor")
+        )
+        self.model_name = self.worker.info["model_name"]
+        self.weight_source = self.worker.info["weight_source"]
+        # Same verified preprocessing as the worker; None when the model needs its Hugging Face processor
+        self.preprocessor = self.worker.info["preprocessor"]
+        self.processor = None
+        self.model = None
+        self.cascade = None
+
+    @observed_inference
+    def classify_batch(self, pil_images: List[Image.Image]) -> List[Tuple[str, float]]:
+        if self.preprocessor is None:
+            return self.worker.call("classify_batch", [
+                image if isinstance(image, np.ndarray) else image.convert("RGB") for image in pil_images
+            ])
+        return self.worker.call("classify_uint8", np.stack([self.preprocessor.to_uint8(image) for image in pil_images]))
+
+    def warm_up(self) -> None:
+        self.worker.call("warm_up")
+
+    def close(self) -> None:
+        self.worker.close()
+
+class ProcessVisionService(_WorkerVisionService, HuggingFaceVisionService):
+    """Lesion classifier served from a worker process"""
+
+    worker_name = "lesion"
+    service_class = HuggingFaceVisionService
+
+    def cascade_stats(self) -> Optional[Dict[str, Any]]:
+        # Only the lesion classifier has a cascade: the dental services have no cascade_stats at all
+        return self.worker.call("cascade_stats")
+
+class ProcessDentalService(_WorkerVisionService, HuggingFaceDentalService):
+    """Dental classifier served from a worker process"""
+
+    worker_name = "dental"
+    service_class = HuggingFaceDentalService
+
+class ProcessCoughService(CoughClassificationService):
+    """Cough classifier whose feature extraction and scikit-learn model run in a worker; the waveform is shared"""
+
+    worker_class: type = ModelWorker
+
+    def __init__(self, path_model: Optional[str] = None):
+        self.worker = self.worker_class(
+            "cough",
+            f"{CoughClassificationService.__module__}:{CoughClassificationService.__name__}",
+            path_model,
+            exports=("path_model",)
+        )
+        self.path_model = self.worker.info["path_model"]
+        self.weight_source = self.worker.info["weight_source"]
+
+    @observed_inference
+    def predict_waveform(self, y: np.ndarray, sr: int) -> Tuple[str, float]:
+        return self.worker.call("predict_waveform", y, sr)
+
+    @observed_inference
+    def predict_features(self, features_dict: Dict[str, float]) -> Tuple[str, float]:
+        return self.worker.call("predict_features", features_dict)
+
+    def close(self) -> None:
+        self.worker.close()
+
+class ProcessDeepStrokeService(DeepStrokeService):
+    """DeepSTROKE con RETFound en un proceso propio; las imágenes sin decodificar se comparten por memoria compartida"""
+
+    worker_class: type = ModelWorker
+
+    def __new__(cls, weights_path: Optional[str] = None):
+        # Sin la instancia única de DeepStrokeService: cada versión tiene su propio proceso
+        return object.__new__(cls)
+
+    def __init__(self, weights_path: Optional[str] = None):
+        self.worker = self.worker_class(
+            "deepstroke",
+            f"{DeepStrokeService.__module__}:{DeepStrokeService.__name__}",
+            weights_path,
+            exports=("_model_version",)
+        )
+        self._weight_source = self.worker.info["weight_source"]
+        self._model_version = self.worker.info["_model_version"]
+
+    def warm_up(self) -> None:
+        self.worker.call("warm_up")
+
+    @observed_inference
+    def probabilities_from_bytes(self, ojos1: List[bytes], ojos2: List[bytes]) -> torch.Tensor:
+        # La decodificación, la caché de vectores y RETFound se ejecutan en el proceso del modelo
+        return torch.from_numpy(self.worker.call("probabilities_from_bytes", list(ojos1), list(ojos2)))
+
+    def close(self) -> None:
+        self.worker.close()
+
+class RemoteVisionService(ProcessVisionService):
+    """Lesion classifier served by model servers on other nodes"""
+
+    worker_class = RemoteModelClient
+
+class RemoteDentalService(ProcessDentalService):
+    """Dental classifier served by model servers on other nodes"""
+
+    worker_class = RemoteModelClient
+
+class RemoteCoughService(ProcessCoughService):
+    """Cough classifier served by model servers on other nodes"""
+
+    worker_class = RemoteModelClient
+
+class RemoteDeepStrokeService(ProcessDeepStrokeService):
+    """DeepSTROKE con RETFound servido por servidores de modelos de otros nodos"""
+
+    worker_class = RemoteModelClient
@@ -0,0 +1,321 @@
+import inspect
+import math
+import string
+from typing import Dict, Iterable, Optional
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens of a text
+
+    Uses the usual ~4 characters per token ratio of Gemini tokenizers, which is
+    accurate enough for budgeting without a network round trip to count_tokens.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        int: Estimated number of tokens
+    """
+    return math.ceil(len(text) / 4)
+
+def _clean(text: str) -> str:
+    """Strip the indentation and blank edges of a triple-quoted prompt (tokens the model does not need)"""
+    return "\n".join(line.strip() for line in inspect.cleandoc(text).splitlines())
+
+class RenderedPrompt:
+    """Prompt ready to be sent to a DialogSystemServiceInterface"""
+
+    def __init__(self, name: str, system_prompt: str, user_prompt: str, max_output_tokens: Optional[int], thinking_tokens: int = 0):
+        self.name = name
+        self.system_prompt = system_prompt
+        self.user_prompt = user_prompt
+        self.max_output_tokens = max_output_tokens
+        self.thinking_tokens = thinking_tokens
+
+    @property
+    def output_token_limit(self) -> Optional[int]:
+        """
+        Output tokens to request from the model: the answer cap plus the route's thinking headroom.
+        gemini-2.5-flash counts its thinking against the output limit and the SDK cannot cap the
+        thinking itself, so the answer length is only approximately bounded by max_output_tokens
+        """
+        if self.max_output_tokens is None:
+            return None
+        return self.max_output_tokens + self.thinking_tokens
+
+    @property
+    def input_tokens(self) -> int:
+        """Estimated input tokens of the system instruction plus the user text"""
+        return count_tokens(self.system_prompt) + count_tokens(self.user_prompt)
+
+class PromptTemplate:
+    """
+    Precompiled prompt of a route.
+
+    The system prompt is static and sent as the model's system instruction; the
+    user template is validated once at registration and only its placeholders
+    change per call. Free-text fields listed in truncatable are shortened when the
+    rendered user text exceeds max_input_tokens. thinking_tokens is the headroom the
+    model may spend thinking before the answer, sized to each route's prompt.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        system_prompt: str,
+        user_template: str,
+        max_output_tokens: Optional[int] = None,
+        max_input_tokens: Optional[int] = None,
+        truncatable: Iterable[str] = (),
+        thinking_tokens: int = 0
+    ):
+        self.name = name
+        self.system_prompt = _clean(system_prompt)
+        self.user_template = _clean(user_template)
+        self.max_output_tokens = max_output_tokens
+        self.max_input_tokens = max_input_tokens
+        self.thinking_tokens = thinking_tokens
+        self.truncatable = tuple(truncatable)
+        self.fields = {
+            field for _, field, _, _ in string.Formatter().parse(self.user_template) if field
+        }
+        unknown = set(self.truncatable) - self.fields
+        if unknown:
+            raise ValueError(f"Prompt '{name}' cannot truncate unknown fields: {sorted(unknown)}")
+        self.system_tokens = count_tokens(self.system_prompt)
+
+    def render(self, **values) -> RenderedPrompt:
+        """
+        Fill in the user template
+
+        Args:
+            values: Value of every placeholder of the template
+
+        Returns:
+            RenderedPrompt: System instruction, user text, output cap and thinking headroom
+
+        Raises:
+            KeyError: If a placeholder has no value
+        """
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing values for: {sorted(missing)}")
+        values = {key: str(value) for key, value in values.items()}
+        user_prompt = self.user_template.format(**values)
+
+        if self.max_input_tokens is not None:
+            excess = count_tokens(user_prompt) - self.max_input_tokens
+            for field in self.truncatable:
+                if excess <= 0:
+                    break
+                keep = max(0, len(values[field]) - excess * 4)
+                values[field] = values[field][:keep].rstrip() + "…"
+                user_prompt = self.user_template.format(**values)
+                excess = count_tokens(user_prompt) - self.max_input_tokens
+
+        return RenderedPrompt(self.name, self.system_prompt, user_prompt, self.max_output_tokens, self.thinking_tokens)
+
+class PromptRegistry:
+    """Central registry of the prompts used by the evaluation routes"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> None:
+        self._templates[template.name] = template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def render(self, name: str, **values) -> RenderedPrompt:
+        """
+        Render a registered prompt
+
+        Args:
+            name: Prompt name (lesion, dental, cough, dermis, skin, deepstroke)
+            values: Placeholder values
+
+        Returns:
+            RenderedPrompt: Prompt ready to be sent
+        """
+        return self._templates[name].render(**values)
+
+    def names(self):
+        return list(self._templates)
+
+prompt_registry = PromptRegistry()
+
+prompt_registry.register(PromptTemplate(
+    name="lesion",
+    system_prompt="""You are an expert dermatologist. Based on the classification of a dermatological lesion,
+        provide professional, clear and useful medical advice. Include recommendations on:
+        - Whether specialist consultation is necessary
+        - Possible treatments
+        - Warning signs to watch for
+        - Preventive measures
+
+        Respond professionally but understandably for the patient.""",
+    user_template="""Lesion classification: {classification}
+
+        Additional patient description: {description}
+
+        Please provide medical advice based on this information.""",
+    max_output_tokens=768,
+    thinking_tokens=1024,
+    max_input_tokens=400,
+    truncatable=("description",)
+))
+
+prompt_registry.register(PromptTemplate(
+    name="dental",
+    system_prompt="""Eres un dentista experto. Basado en una clasificación preliminar de una posible condición dental u oral,
+        brinda consejos profesionales, claros y útiles. Tu objetivo es orientar al paciente, pero siempre dejando en claro que este análisis es solo una guía inicial y no reemplaza una consulta médica.
+
+        Incluye en tu respuesta:
+        - Una recomendación clara de acudir al dentista u odontólogo, explicando por qué es importante una revisión presencial
+        - Posibles tratamientos que un profesional podría sugerir (como conducto, extracción, restauración), sin recetar medicamentos ni sugerir automedicación
+        - Síntomas comunes relacionados con la condición que podrían empeorar si no se atienden
+        - Consejos de prevención e higiene bucal para mantener una buena salud dental
+
+        Usa un tono amigable y sencillo, para que cualquier persona pueda entenderlo fácilmente. Limita tu respuesta a solo dos párrafos. Aclara que esta información es solo orientativa y no reemplaza el diagnóstico profesional.""",
+    user_template="""Clasificación preliminar de la condición dental: {classification}
+
+        Descripción adicional del paciente: {description}
+
+        Por favor, brinda una orientación dental basada en esta información, recordando que no es un diagnóstico médico definitivo.""",
+    max_output_tokens=768,
+    thinking_tokens=1024,
+    max_input_tokens=400,
+    truncatable=("description",)
+))
+
+prompt_registry.register(PromptTemplate(
+    name="cough",
+    system_prompt="""Eres un asistente médico experto en el análisis de sonidos de tos. Tu función es ofrecer orientación médica clara, útil y profesional
+        basada en la clasificación de una muestra de tos. Solo puedes responder sobre los siguientes tres casos: COVID-19, tos normal o tos con síntomas (sintomática).
+        No debes mencionar ni diagnosticar otras enfermedades o condiciones.
+
+        Debes abordar exclusivamente lo siguiente:
+        - Si la tos está posiblemente asociada a COVID-19, si presenta síntomas generales (sintomática), o si se trata de una tos normal
+        - Si es recomendable acudir a una consulta médica
+        - Posibles causas o condiciones relacionadas con uno de los tres tipos de tos permitidos
+        - Recomendaciones para observar la evolución, monitorear síntomas o buscar atención
+        - Un recordatorio claro de que esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones
+
+        Responde con empatía, sencillez y precisión. Nunca inventes o especules fuera de los tres casos definidos.""",
+    user_template="""Clasificación de la tos: {classification}
+
+        Descripción adicional del paciente: {description}
+
+        Por favor, proporciona una orientación médica basada en esta información.""",
+    max_output_tokens=768,
+    thinking_tokens=1024,
+    max_input_tokens=400,
+    truncatable=("description",)
+))
+
+prompt_registry.register(PromptTemplate(
+    name="dermis",
+    system_prompt=(
+        "Eres un dermatólogo experto. Siempre responde en español. "
+        "Solo puedes responder preguntas relacionadas con condiciones dermatológicas, piel, uñas o cabello. "
+        "Si la pregunta o el contexto no está relacionado con temas dermatológicos, rechaza la consulta educadamente diciendo: "
+        "'Lo siento, solo puedo responder preguntas relacionadas con dermatología, piel, uñas o cabello.'\n"
+        "Si recibes un diagnóstico, explica de manera clara y profesional en qué consiste la enfermedad o condición detectada, "
+        "cuáles son sus implicaciones, y qué puede hacer el paciente para aliviar, tratar o curar la enfermedad. "
+        "Incluye recomendaciones sobre:\n"
+        "- Si es necesario consultar a un especialista\n"
+        "- Posibles tratamientos\n"
+        "- Síntomas o señales de alerta que requieren atención urgente\n"
+        "- Medidas preventivas y consejos de cuidado de la piel\n"
+        "Sé profesional pero fácil de entender para un paciente no especialista."
+    ),
+    user_template="""Dermatological condition classification: {classification}
+
+        Additional patient description: {description}
+
+        Please provide medical advice based on this information.""",
+    max_output_tokens=1024,
+    thinking_tokens=1024,
+    max_input_tokens=400,
+    truncatable=("description",)
+))
+
+prompt_registry.register(PromptTemplate(
+    name="skin",
+    system_prompt=(
+        "Eres un dermatólogo experto. Siempre responde en español. "
+        "Recibes el resultado de dos clasificadores automáticos sobre la misma foto de piel: "
+        "uno de lesiones cutáneas (con su nivel de confianza) y otro de condiciones dermatológicas. "
+        "Integra ambos resultados en una sola orientación; si no coinciden, explícalo y prioriza la posibilidad más grave. "
+        "Incluye recomendaciones sobre:\n"
+        "- Si es necesario consultar a un especialista\n"
+        "- Posibles tratamientos\n"
+        "- Síntomas o señales de alerta que requieren atención urgente\n"
+        "- Medidas preventivas y consejos de cuidado de la piel\n"
+        "Sé profesional pero fácil de entender para un paciente no especialista. "
+        "Aclara que esta evaluación se basa en inteligencia artificial y no reemplaza un diagnóstico médico."
+    ),
+    user_template="""Skin classification: {classification}
+
+        Additional patient description: {description}
+
+        Please provide medical advice based on this information.""",
+    max_output_tokens=1024,
+    # Two classifier results to reconcile: more room to think than the single-model advice
+    thinking_tokens=1536,
+    max_input_tokens=450,
+    truncatable=("description",)
+))
+
+prompt_registry.register(PromptTemplate(
+    name="deepstroke",
+    system_prompt="""Eres el Dr. Carlos, un neurólogo especialista en prevención de accidentes cerebrovasculares (ACV) con 15 años de experiencia.
+        Tu función es ofrecer orientación médica clara, útil y profesional basada en el análisis de riesgo de ACV.
+
+        IMPORTANTE: Solo puedes responder sobre prevención de ACV y factores de riesgo cardiovascular.
+        No debes mencionar ni diagnosticar otras enfermedades o condiciones médicas.
+
+        Debes abordar exclusivamente lo siguiente:
+        - Evaluación del nivel de riesgo de ACV (BAJO, MODERADO, ALTO, MUY ALTO)
+        - Factores de riesgo específicos del paciente que pueden mejorarse
+        - Recomendaciones prácticas para reducir el riesgo de ACV
+        - Si es recomendable acudir a una consulta médica especializada
+        - Frecuencia de controles médicos recomendada
+        - Un recordatorio claro de que esto no es un diagnóstico médico, sino una evaluación basada en inteligencia artificial para apoyar la toma de decisiones
+
+        Responde con empatía, sencillez y precisión. Máximo 120 palabras. Sé directo y práctico.""",
+    user_template="""Paciente: {edad} años, {genero}
+
+        Factores de riesgo:
+        - Fumador: {fumador}
+        - Hipertensión: {hipertension}
+        - Diabetes: {diabetes}
+        - Presión arterial: {pas} mmHg
+        - HDL colesterol: {hdl_c} mmol/L
+        - Colesterol total: {colesterol} mmol/L
+        - IMC: {imc} kg/m²
+
+        Resultado del análisis:
+        - Nivel de riesgo: {nivel_riesgo}
+        - Probabilidad de ACV: {probabilidad}
+
+        Dr. Carlos, ¿qué recomendaciones específicas tienes para este paciente?""",
+    max_output_tokens=512,
+    thinking_tokens=768
+))
+
+prompt_registry.register(PromptTemplate(
+    name="chat_summary",
+    system_prompt="""You compress conversations between a user and an assistant so they can continue without the full transcript.
+        Keep every fact, question, decision and open point the assistant needs to answer the next messages.
+        Write in the language of the conversation, in plain text, as briefly as possible.""",
+    user_template="""Summary of the conversation before these messages: {summary}
+
+        Messages:
+        {transcript}
+
+        Write the updated summary of the whole conversation.""",
+    max_output_tokens=512,
+    thinking_tokens=512
+))
@@ -0,0 +1,313 @@
+import itertools
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from src.domain.exceptions.model_worker_error import ModelWorkerError
+from src.infrastructure.services.model_rpc import RemoteCallError, decode, encode, recv_frame, send_frame
+
+class _Endpoint:
+    """One model server address, with its idle persistent connections and last known load"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.healthy = False
+        self.draining = False
+        self.info: Optional[Dict[str, Any]] = None
+        # Calls of this gateway in progress, and the load the server reported in its last reply
+        self.in_flight = 0
+        self.load = 0
+        self.calls = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.idle: Deque[socket.socket] = deque()
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def close_idle(self) -> None:
+        while self.idle:
+            try:
+                self.idle.pop().close()
+            except OSError:
+                pass
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "address": self.address,
+            "healthy": self.healthy,
+            "draining": self.draining,
+            "source": self.info.get("source") if self.info else None,
+            "in_flight": self.in_flight,
+            "load": self.load,
+            "calls": self.calls,
+            "failures": self.failures,
+            "idle_connections": len(self.idle),
+            "last_error": self.last_error
+        }
+
+class RemoteModelClient:
+    """
+    Calls to a model served by model servers on other nodes (MODEL_SERVING_MODE=remote).
+
+    Same interface as ModelWorker (call, info, stats, close), so the services served
+    from worker processes are served from the network by swapping the class. The
+    endpoints are MODEL_REMOTE_<NAME>_URLS (host:port list); every host is resolved to
+    all its addresses, again on each health check, so model servers scaled behind one
+    DNS name (for example a headless Kubernetes service) are picked up and dropped as
+    they come and go. Only endpoints serving the same model and source (weights) as this
+    client are used, so versions of the model registry map to their own servers.
+
+    Each call goes over a persistent connection (kept idle per endpoint, up to
+    MODEL_REMOTE_POOL_SIZE) to the healthy endpoint with the least load, estimated as
+    this gateway's calls in progress plus the load the server reported in its last reply
+    or health check. An endpoint that refuses or drops a connection is marked unhealthy
+    and the call is retried once on another one (inference calls are idempotent); a call
+    that times out is not retried. A health thread probes every endpoint each
+    MODEL_REMOTE_HEALTH_INTERVAL_SECONDS and brings recovered ones back.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        service_path: str,
+        source: Optional[str] = None,
+        exports: Sequence[str] = (),
+        threads: Optional[int] = None
+    ):
+        """
+        Resolve and probe the endpoints, waiting until one serving the model is healthy
+
+        Args:
+            name: Model name, used in the environment variables (MODEL_REMOTE_<NAME>_URLS)
+            service_path: "module:Class" the model servers must be serving
+            source: Model name or weights path the servers must have loaded; None for the defaults
+            exports: Service attributes expected in info (with weight_source)
+            threads: Unused, the thread budget belongs to the model server
+
+        Raises:
+            ModelWorkerError: If no endpoint is configured or none is healthy in time
+        """
+        self.name = name
+        self.service_path = service_path
+        self.source = source
+        self.exports = tuple(exports)
+        self.urls = [url.strip() for url in os.getenv(f"MODEL_REMOTE_{name.upper()}_URLS", "").split(",") if url.strip()]
+        if not self.urls:
+            raise ModelWorkerError(name, f"MODEL_REMOTE_{name.upper()}_URLS is not set")
+        self.token = os.getenv("MODEL_RPC_TOKEN", "")
+        self.pool_size = int(os.getenv("MODEL_REMOTE_POOL_SIZE", "8"))
+        self.health_interval = float(os.getenv("MODEL_REMOTE_HEALTH_INTERVAL_SECONDS", "5"))
+        self.connect_timeout = float(os.getenv("MODEL_REMOTE_CONNECT_TIMEOUT_SECONDS", "2"))
+        self.call_timeout = float(os.getenv("MODEL_WORKER_CALL_TIMEOUT_SECONDS", "120"))
+        self.max_body_bytes = int(os.getenv("MODEL_SERVER_MAX_BODY_MB", "256")) << 20
+        self.start_timeout = float(os.getenv("MODEL_WORKER_START_TIMEOUT_SECONDS", "300"))
+        self.info: Dict[str, Any] = {}
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._endpoints: Dict[Tuple[str, int], _Endpoint] = {}
+        self._closed = threading.Event()
+
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            self._check()
+            if self.info:
+                break
+            if time.monotonic() >= deadline:
+                errors = "; ".join(f"{e.address}: {e.last_error}" for e in self._endpoints.values()) or "no address resolved"
+                raise ModelWorkerError(name, f"no healthy model server after {self.start_timeout:.0f}s ({errors})")
+            time.sleep(min(self.health_interval, 1.0))
+        self._monitor = threading.Thread(target=self._watch, name=f"remote-model-{name}-health", daemon=True)
+        self._monitor.start()
+
+    def _resolve(self) -> List[Tuple[str, int]]:
+        addresses = []
+        for url in self.urls:
+            host, _, port = url.rpartition(":")
+            try:
+                for *_, sockaddr in socket.getaddrinfo(host, int(port), type=socket.SOCK_STREAM):
+                    address = (sockaddr[0], sockaddr[1])
+                    if address not in addresses:
+                        addresses.append(address)
+            except (socket.gaierror, ValueError) as e:
+                print(f"Error resolving model server {url} for {self.name}: {str(e)}")
+        return addresses
+
+    def _check(self) -> None:
+        """Refresh the endpoints from DNS and probe each one"""
+        addresses = self._resolve()
+        with self._lock:
+            for address in addresses:
+                if address not in self._endpoints:
+                    self._endpoints[address] = _Endpoint(*address)
+            for address in [a for a in self._endpoints if a not in addresses]:
+                self._endpoints.pop(address).close_idle()
+            endpoints = list(self._endpoints.values())
+        for endpoint in endpoints:
+            try:
+                if endpoint.info is None:
+                    info = self._request(endpoint, "_info", [], self.connect_timeout)
+                    if info.get("service") != self.service_path or info.get("source") != self.source:
+                        raise RemoteCallError(f"serves {info.get('service')} with {info.get('source')}")
+                    endpoint.info = info
+                health = self._request(endpoint, "_health", [], self.connect_timeout)
+                endpoint.draining = health["status"] != "ok"
+                endpoint.healthy = not endpoint.draining
+                endpoint.last_error = None
+            except (OSError, ValueError, RemoteCallError) as e:
+                if endpoint.healthy:
+                    print(f"Model server {endpoint.address} of {self.name} unhealthy: {str(e)}")
+                endpoint.healthy = False
+                endpoint.last_error = str(e)
+                endpoint.close_idle()
+            if endpoint.healthy and not self.info:
+                self.info = {key: endpoint.info.get(key) for key in ("weight_source", *self.exports)}
+
+    def _watch(self) -> None:
+        while not self._closed.wait(self.health_interval):
+            try:
+                self._check()
+            except Exception as e:
+                print(f"Error checking model servers of {self.name}: {str(e)}")
+
+    def _connect(self, endpoint: _Endpoint, reuse: bool) -> Tuple[socket.socket, bool]:
+        """Idle connection of the endpoint, or a new one; also tells whether it was reused"""
+        if reuse:
+            try:
+                return endpoint.idle.popleft(), True
+            except IndexError:
+                pass
+        sock = socket.create_connection((endpoint.host, endpoint.port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        return sock, False
+
+    def _request(self, endpoint: _Endpoint, method: str, args: List[Any], timeout: float, reuse: bool = True) -> Any:
+        """
+        One call over a pooled connection to an endpoint
+
+        Raises:
+            OSError: If the connection failed or timed out (the connection is discarded)
+            RemoteCallError: If the remote method raised
+        """
+        buffers: list = []
+        spec, _ = encode(args, buffers)
+        header = {"id": next(self._ids), "method": method, "args": spec}
+        if self.token:
+            header["token"] = self.token
+        sock, reused = self._connect(endpoint, reuse)
+        try:
+            sock.settimeout(timeout)
+            send_frame(sock, header, buffers)
+            reply, body = recv_frame(sock, self.max_body_bytes)
+        except ConnectionError:
+            sock.close()
+            if not reused:
+                raise
+            # An idle connection closed by the server (restarted or timed out): the others are stale too
+            endpoint.close_idle()
+            return self._request(endpoint, method, args, timeout, reuse=False)
+        except BaseException:
+            sock.close()
+            raise
+        if reply.get("id") != header["id"]:
+            sock.close()
+            raise ConnectionResetError(f"reply {reply.get('id')} to request {header['id']}")
+        endpoint.load = reply.get("load", 0)
+        if len(endpoint.idle) < self.pool_size:
+            endpoint.idle.append(sock)
+        else:
+            sock.close()
+        if reply["status"] != "ok":
+            raise RemoteCallError(reply.get("error"))
+        return decode(reply["result"], body)
+
+    def _pick(self, exclude: Sequence[_Endpoint]) -> Optional[_Endpoint]:
+        """Healthy endpoint with the least estimated load (ties broken at random), reserving a call on it"""
+        with self._lock:
+            candidates = [
+                endpoint for endpoint in self._endpoints.values()
+                if endpoint.healthy and endpoint not in exclude
+            ]
+            if not candidates:
+                return None
+            random.shuffle(candidates)
+            endpoint = min(candidates, key=lambda e: e.in_flight + e.load)
+            endpoint.in_flight += 1
+            endpoint.calls += 1
+            return endpoint
+
+    def call(self, method: str, *args: Any) -> Any:
+        """
+        Run a method of the service on the least-loaded healthy model server
+
+        Args:
+            method: Name of the service method
+            *args: Its arguments; numpy arrays, bytes and images travel raw
+
+        Returns:
+            The method result (tensors come back as numpy arrays, tuples as lists)
+
+        Raises:
+            ModelWorkerError: If no endpoint is healthy, the call timed out or the method raised
+        """
+        if self._closed.is_set():
+            raise ModelWorkerError(self.name, "closed")
+        tried: List[_Endpoint] = []
+        self.calls += 1
+        while True:
+            endpoint = self._pick(tried)
+            if endpoint is None:
+                self.failures += 1
+                raise ModelWorkerError(self.name, f"no healthy model server for {method}")
+            tried.append(endpoint)
+            try:
+                return self._request(endpoint, method, list(args), self.call_timeout)
+            except RemoteCallError as e:
+                self.failures += 1
+                raise ModelWorkerError(self.name, f"{method} failed on {endpoint.address}: {str(e)}")
+            except socket.timeout:
+                endpoint.healthy = False
+                endpoint.failures += 1
+                self.failures += 1
+                raise ModelWorkerError(self.name, f"{method} timed out on {endpoint.address}")
+            except (OSError, ValueError) as e:
+                endpoint.healthy = False
+                endpoint.failures += 1
+                endpoint.last_error = str(e)
+                endpoint.close_idle()
+                print(f"Model server {endpoint.address} of {self.name} failed during {method}: {str(e)}")
+                if len(tried) >= 2:
+                    self.failures += 1
+                    raise ModelWorkerError(self.name, f"{method} failed on {endpoint.address}: {str(e)}")
+                self.retries += 1
+            finally:
+                with self._lock:
+                    endpoint.in_flight -= 1
+
+    def close(self) -> None:
+        """Stop the health checks and close the idle connections"""
+        self._closed.set()
+        with self._lock:
+            for endpoint in self._endpoints.values():
+                endpoint.close_idle()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = [endpoint.to_dict() for endpoint in self._endpoints.values()]
+        return {
+            "mode": "remote",
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "healthy_endpoints": sum(endpoint["healthy"] for endpoint in endpoints),
+            "endpoints": endpoints
+        }
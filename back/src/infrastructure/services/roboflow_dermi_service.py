@@ -1,34 +1,148 @@
-from inference_sdk import InferenceHTTPClient
-from PIL import Image
+import asyncio
+import base64
 import os
-import requests
+import time
+import math
+import httpx
+import numpy as np
+from PIL import Image
 from io import BytesIO
+from src.infrastructure.services.circuit_breaker import CircuitBreaker
+from src.domain.exceptions.dermis_unavailable_error import DermisUnavailableError
+
+class _NonRetryableError(Exception):
+    """Remote error that a retry would not fix (bad request, invalid API key...)"""
 
 class RoboflowDermisService:
     """
     Service for interacting with the Roboflow inference API for dermatological images.
+
+    Requests go through a pooled async HTTP client with a per-call deadline. When the
+    first attempt is slow a hedged duplicate is sent and the first answer wins. A circuit
+    breaker tracks failing or slow calls and, while it is open, classifications fail fast
+    with DermisUnavailableError. No local model shares the Roboflow label set, so there
+    is no fallback: callers report the dermatological result as unavailable.
     """
     def __init__(self):
         """
         Initializes the RoboflowDermisService with API credentials and model information.
         """
-        self.client = InferenceHTTPClient(
-            api_url="https://serverless.roboflow.com",
-            api_key=os.getenv("ROBOFLOW_API_KEY")
-        )
+        self.api_url = os.getenv("ROBOFLOW_API_URL", "https://serverless.roboflow.com")
+        self.api_key = os.getenv("ROBOFLOW_API_KEY")
         self.project_id = "skin-scanner-2.2"
         self.model_version = 2
+        self.timeout = float(os.getenv("ROBOFLOW_TIMEOUT_SECONDS", "4"))
+        self.hedge_delay = float(os.getenv("ROBOFLOW_HEDGE_DELAY_SECONDS", "1"))
+        self.max_attempts = int(os.getenv("ROBOFLOW_MAX_ATTEMPTS", "3"))
+        self.client = httpx.AsyncClient(
+            base_url=self.api_url,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("ROBOFLOW_BREAKER_FAILURES", "5")),
+            recovery_timeout=float(os.getenv("ROBOFLOW_BREAKER_RECOVERY_SECONDS", "30")),
+            slow_call_threshold=float(os.getenv("ROBOFLOW_SLOW_CALL_SECONDS", "2.5"))
+        )
 
     async def classify_image(self, image_input):
         """
         Classifies a dermatological image using the Roboflow API.
-        :param image_input: Path or URL to the image to classify
+        :param image_input: Path, URL, file-like object, already decoded PIL image or uint8 RGB array (raw upload) to classify
         :return: Classification result as a dictionary
+        :raises DermisUnavailableError: If the circuit is open or the Roboflow call failed
         """
+        pil_image = await self._load_image(image_input)
+        payload = await asyncio.to_thread(self._encode, pil_image)
+
+        if not self.circuit_breaker.allow_request():
+            raise DermisUnavailableError("circuit open", math.ceil(self.circuit_breaker.retry_after()) or 1)
+        try:
+            return await self._infer_remote(payload)
+        except Exception as e:
+            print(f"Error in Roboflow inference: {str(e)}")
+            raise DermisUnavailableError(
+                "Roboflow call failed",
+                math.ceil(self.circuit_breaker.retry_after()) or 1
+            ) from e
+
+    async def _load_image(self, image_input) -> Image.Image:
+        if isinstance(image_input, Image.Image):
+            return image_input
+        if isinstance(image_input, np.ndarray):
+            return Image.fromarray(image_input)
         if isinstance(image_input, str) and image_input.startswith("http"):
-            response = requests.get(image_input)
-            pil_image = Image.open(BytesIO(response.content))
-        else:
-            pil_image = Image.open(image_input)
-        results = self.client.infer(pil_image, model_id=f"{self.project_id}/{self.model_version}")
+            response = await self.client.get(image_input)
+            response.raise_for_status()
+            return Image.open(BytesIO(response.content))
+        return await asyncio.to_thread(Image.open, image_input)
+
+    @staticmethod
+    def _encode(pil_image: Image.Image) -> bytes:
+        """Encodes the image as base64 JPEG, the body format of the Roboflow hosted API."""
+        buffer = BytesIO()
+        pil_image.convert("RGB").save(buffer, format="JPEG", quality=90)
+        return base64.b64encode(buffer.getvalue())
+
+    async def _infer_remote(self, payload: bytes) -> dict:
+        start = time.monotonic()
+        try:
+            results = await asyncio.wait_for(self._hedged_post(payload), timeout=self.timeout)
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled (the client went away): there is no outcome to record, but a
+            # half-open trial must be given back or the circuit would never close again
+            self.circuit_breaker.release_trial()
+            raise
+        self.circuit_breaker.record_success(time.monotonic() - start)
         return results
+
+    async def _hedged_post(self, payload: bytes) -> dict:
+        """
+        Sends the request, adding a duplicate each time hedge_delay passes without an answer
+        or an attempt fails, up to max_attempts. The first successful answer wins.
+        """
+        pending = set()
+        attempts = 0
+        last_error = None
+        try:
+            while True:
+                if attempts < self.max_attempts:
+                    pending.add(asyncio.create_task(self._post(payload)))
+                    attempts += 1
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_delay if attempts < self.max_attempts else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    if isinstance(last_error, _NonRetryableError):
+                        raise last_error
+                if not pending and attempts >= self.max_attempts:
+                    raise last_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _post(self, payload: bytes) -> dict:
+        response = await self.client.post(
+            f"/{self.project_id}/{self.model_version}",
+            params={"api_key": self.api_key},
+            content=payload,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        if 400 <= response.status_code < 500 and response.status_code != 429:
+            raise _NonRetryableError(f"Roboflow returned {response.status_code}: {response.text}")
+        response.raise_for_status()
+        return response.json()
+
+    async def aclose(self):
+        """
+        Closes the pooled HTTP connections.
+        """
+        await self.client.aclose()
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Dict, Optional
+from PIL import Image
+from src.infrastructure.services.image_preprocessing import open_image
+from src.infrastructure.services.model_registry import ModelRegistry
+from src.infrastructure.services.roboflow_dermi_service import RoboflowDermisService
+from src.infrastructure.services.memory_diagnostics import memory_diagnostics
+
+class SkinEvaluationService:
+    """
+    Service that runs the Hugging Face lesion classifier and the Roboflow
+    dermatological classifier on the same photo.
+
+    The image is decoded once and both models run concurrently, so the
+    combined classification costs about as much as the slower of the two.
+    """
+
+    def __init__(self, model_registry: ModelRegistry, roboflow_service: RoboflowDermisService):
+        """
+        Initializes the service with both classifiers.
+        :param model_registry: Registry serving the active Hugging Face lesion classifier
+        :param roboflow_service: Roboflow dermatological classification service
+        """
+        self.model_registry = model_registry
+        self.roboflow_service = roboflow_service
+
+    async def classify(self, image_bytes: bytes) -> Dict:
+        """
+        Classifies a skin photo with both models.
+        :param image_bytes: Encoded image (JPEG, PNG...) or raw RGB buffer
+        :return: Dictionary with lesion_classification and dermis_classes; a model that
+                 failed is reported as None so the other result can still be used
+        """
+        with memory_diagnostics.stage("decode"):
+            image = open_image(image_bytes)
+            if isinstance(image, Image.Image):
+                image = image.convert("RGB")
+
+        async with self.model_registry.lease("lesion") as vision_service:
+            lesion_result, dermis_result = await asyncio.gather(
+                asyncio.to_thread(vision_service.predict, image),
+                self.roboflow_service.classify_image(image),
+                return_exceptions=True
+            )
+
+        if isinstance(lesion_result, Exception):
+            print(f"Error classifying lesion: {str(lesion_result)}")
+            lesion_classification = None
+        else:
+            label, confidence = lesion_result
+            lesion_classification = f"{label} (Confidence: {confidence:.1%})"
+
+        if isinstance(dermis_result, Exception):
+            print(f"Error classifying dermatological condition: {str(dermis_result)}")
+            dermis_classes = None
+        else:
+            dermis_classes = dermis_result.get("predicted_classes", [])
+
+        if lesion_classification is None and dermis_classes is None:
+            raise RuntimeError("Both skin classifiers failed")
+
+        return {
+            "lesion_classification": lesion_classification,
+            "dermis_classes": dermis_classes,
+            "classification": self.merge(lesion_classification, dermis_classes)
+        }
+
+    @staticmethod
+    def merge(lesion_classification: Optional[str], dermis_classes: Optional[list]) -> str:
+        """
+        Builds a single classification text from both model outputs.
+        :param lesion_classification: Hugging Face classification, or None if it failed
+        :param dermis_classes: Roboflow predicted classes, or None if it failed
+        :return: Merged classification
+        """
+        parts = []
+        if lesion_classification is not None:
+            parts.append(f"Lesion: {lesion_classification}")
+        if dermis_classes is not None:
+            conditions = ", ".join(dermis_classes) if dermis_classes else "none detected"
+            parts.append(f"Dermatological conditions: {conditions}")
+        return ". ".join(parts)
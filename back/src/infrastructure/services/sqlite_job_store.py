@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+from src.domain.interfaces.job_store_interface import JobStoreInterface
+
+_COLUMNS = (
+    "job_id", "kind", "status", "result", "error", "callback_url",
+    "created_at", "started_at", "finished_at"
+)
+
+class SQLiteJobStore(JobStoreInterface):
+    """
+    Job store backed by a SQLite database file.
+    
+    Job state survives restarts and can be polled from any API process
+    sharing the same database file. Each unfinished job records the process
+    running it (owner) and that process's last heartbeat, so the jobs of a
+    process that stopped can be failed without touching those of live ones.
+    """
+    
+    def __init__(self, db_path: str = "jobs.db"):
+        """
+        Initialize the SQLite job store
+        
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    callback_url TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    self._connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    
+    def _execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock, self._connection:
+            return self._connection.execute(query, params)
+    
+    def _fetch_one(self, query: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._connection.execute(query, params).fetchone()
+    
+    def _create(self, job: Dict[str, Any]) -> None:
+        values = dict.fromkeys(_COLUMNS)
+        values.update({key: value for key, value in job.items() if key in values})
+        values["result"] = json.dumps(values["result"]) if values["result"] is not None else None
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        self._execute(
+            f"INSERT INTO jobs ({', '.join(_COLUMNS)}, owner, heartbeat_at) VALUES ({placeholders}, ?, ?)",
+            (*(values[column] for column in _COLUMNS), self.owner, time.time())
+        )
+    
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        fields = {key: value for key, value in fields.items() if key in _COLUMNS and key != "job_id"}
+        if not fields:
+            return
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        self._execute(
+            f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+            (*fields.values(), job_id)
+        )
+    
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._fetch_one(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,))
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+    
+    def _delete_finished_before(self, timestamp: float) -> int:
+        cursor = self._execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (timestamp,)
+        )
+        return cursor.rowcount
+    
+    def _heartbeat(self) -> None:
+        self._execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+            (time.time(), self.owner)
+        )
+    
+    def _fail_abandoned(self, timestamp: float) -> int:
+        cursor = self._execute(
+            """
+            UPDATE jobs SET status = 'failed', error = 'Interrupted: the API process running the job stopped', finished_at = ?
+            WHERE status IN ('queued', 'running') AND owner IS NOT ?
+              AND COALESCE(heartbeat_at, created_at) < ?
+            """,
+            (time.time(), self.owner, timestamp)
+        )
+        return cursor.rowcount
+    
+    async def create(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._create, job)
+    
+    async def update(self, job_id: str, **fields: Any) -> None:
+        await asyncio.to_thread(self._update, job_id, fields)
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+    
+    async def delete_finished_before(self, timestamp: float) -> int:
+        return await asyncio.to_thread(self._delete_finished_before, timestamp)
+    
+    async def heartbeat(self) -> None:
+        await asyncio.to_thread(self._heartbeat)
+    
+    async def fail_abandoned(self, timestamp: float) -> int:
+        return await asyncio.to_thread(self._fail_abandoned, timestamp)
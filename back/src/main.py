@@ -1,11 +1,14 @@
+import asyncio
 import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env
 load_dotenv()
 
-from fastapi import FastAPI, UploadFile, File, Form
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from typing import Optional
 
 # Import routes
@@ -17,12 +20,35 @@ from src.api.routes.deepstroke_routes import router as deepstroke_router
 from src.api.routes.google_routes import router as google_router
 
 from src.api.routes.dermis_routes import router as dermis_router
+from src.api.routes.job_routes import router as job_router
+from src.api.routes.skin_routes import router as skin_router
+from src.api.routes.admission_routes import router as admission_router
+from src.api.routes.health_routes import router as health_router
+from src.api.routes.model_routes import router as model_router
+from src.api.routes.history_routes import router as history_router
+from src.api.routes.diagnostics_routes import router as diagnostics_router
+from src.api.deadline import ArrivalTimeMiddleware
+from src.infrastructure.services.memory_diagnostics import MemoryDiagnosticsMiddleware
+from src.infrastructure.container import Container
+from src.domain.exceptions.dialog_service_error import DialogServiceError
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up the models in the background while the server starts answering"""
+    Container.model_lifecycle().start()
+    # Job workers and heartbeat; fails the jobs left unfinished by a stopped process
+    Container.job_service().start()
+    yield
+    # Write the evaluation results still queued before the process exits, without blocking the event loop
+    await asyncio.to_thread(Container.evaluation_history_store().flush)
+    Container.model_registry().close()
+
 app = FastAPI(
     title="Convolucionados API",
     description="API for AI services with Gemini and image classification",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -33,6 +59,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Start of the latency budget of every request (advice deadline of the evaluation routes)
+app.add_middleware(ArrivalTimeMiddleware)
+# RSS change of every request by route (/diagnostics/memory)
+app.add_middleware(MemoryDiagnosticsMiddleware)
+
+@app.exception_handler(DialogServiceError)
+async def dialog_service_error_handler(request: Request, exc: DialogServiceError):
+    """Return LLM failures as structured errors instead of a generic 500"""
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(status_code=exc.status_code, content={"error": exc.to_dict()}, headers=headers)
 
 # Include routes
 app.include_router(chat_router)
@@ -43,6 +79,13 @@ app.include_router(deepstroke_router)
 
 app.include_router(dermis_router)
 app.include_router(google_router)
+app.include_router(job_router)
+app.include_router(skin_router)
+app.include_router(admission_router)
+app.include_router(health_router)
+app.include_router(model_router)
+app.include_router(history_router)
+app.include_router(diagnostics_router)
 
 @app.get("/")
 async def root():
@@ -52,10 +95,22 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "chat": "/chat/generate",
+            "chat_sessions": "/chat/sessions",
+            "chat_session_messages": "/chat/sessions/{session_id}/messages",
             "lesion_evaluation": "/lesion/evaluate",
+            "lesion_evaluation_batch": "/lesion/evaluate-batch",
+            "skin_evaluation": "/skin/evaluate",
             "cough_classification": "/cough/classify",
             "dental_diagnosis": "/dental/classify",
+            "dental_evaluation_batch": "/dental/evaluate-batch",
             "deepstroke_prediction": "/deepstroke/predict",
+            "deepstroke_score_batch": "/deepstroke/score-batch",
+            "evaluation_jobs": "/jobs/{lesion|dental|cough|dermis|deepstroke}",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "patient_history": "/history/{patient_id}",
+            "patient_latest_evaluations": "/history/{patient_id}/latest",
+            "memory_diagnostics": "/diagnostics/memory",
             "upload_image": "/upload-image"
         }
     }
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from transformers import ViTConfig, ViTForImageClassification, ViTImageProcessor
+
+@pytest.fixture(scope="session")
+def tiny_vit_path(tmp_path_factory) -> str:
+    """A small randomly initialized ViT classifier saved locally, so the tests run offline"""
+    torch.manual_seed(0)
+    labels = ["benign", "malignant", "other"]
+    config = ViTConfig(
+        image_size=224,
+        patch_size=32,
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        num_labels=len(labels),
+        id2label=dict(enumerate(labels)),
+        label2id={label: i for i, label in enumerate(labels)}
+    )
+    path = tmp_path_factory.mktemp("tiny_vit")
+    ViTForImageClassification(config).save_pretrained(path)
+    ViTImageProcessor(size={"height": 224, "width": 224}).save_pretrained(path)
+    return str(path)
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    return [Image.fromarray(rng.integers(0, 256, (300, 260, 3), dtype=np.uint8)) for _ in range(4)]
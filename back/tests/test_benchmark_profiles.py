@@ -0,0 +1,47 @@
+import json
+import pytest
+from src.cli import benchmark_profiles
+
+def _benchmark(tmp_path, models, *options) -> list:
+    output = tmp_path / "benchmark.json"
+    benchmark_profiles.main([
+        "--models", *models,
+        *options,
+        "--count", "6",
+        "--batch-sizes", "4",
+        "--iterations", "1",
+        "--warmup", "0",
+        "--bf16", "false",
+        "--json", str(output)
+    ])
+    return json.loads(output.read_text())
+
+def _assert_parity(results: list) -> None:
+    for result in results:
+        parity = result["parity"]
+        assert parity["passed"], f"{result['model']}: {parity}"
+        assert parity["max_abs_diff"] <= 1e-4
+        assert parity["top1_agreement"] == 1.0
+
+def test_optimized_profile_matches_default(tiny_vit_path, tmp_path, monkeypatch):
+    # Without a RETFound checkpoint both DeepSTROKE profiles must still run the same (random) network
+    monkeypatch.setenv("FUNDUS_EMBEDDINGS_PATH", "")
+    results = _benchmark(
+        tmp_path,
+        ["lesion", "dental", "deepstroke"],
+        "--lesion-model", tiny_vit_path,
+        "--dental-model", tiny_vit_path,
+        "--retfound-weights", str(tmp_path / "missing.pth"),
+        "--no-compile"
+    )
+
+    assert sorted(result["model"] for result in results) == ["deepstroke", "dental", "lesion"]
+    _assert_parity(results)
+
+def test_compiled_profile_matches_default(tiny_vit_path, tmp_path):
+    # Production compiles the optimized profile by default (INFERENCE_COMPILE=true)
+    results = _benchmark(tmp_path, ["lesion"], "--lesion-model", tiny_vit_path)
+
+    if not results[0]["profiles"]["optimized"]["compiled"]:
+        pytest.skip("torch.compile is not available here; the optimized profile ran eagerly")
+    _assert_parity(results)
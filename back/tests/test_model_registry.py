@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from src.infrastructure.services.huggingface_vision_service import HuggingFaceVisionService
+from src.infrastructure.services.model_lifecycle import ModelLifecycle
+from src.infrastructure.services.model_registry import ModelRegistry, ModelVersion
+
+@pytest.fixture
+def registry(tiny_vit_path, monkeypatch):
+    # The default weights (and the fallback of a model that cannot be loaded) are the local tiny model
+    monkeypatch.setattr(HuggingFaceVisionService, "DEFAULT_MODEL", tiny_vit_path)
+    monkeypatch.setenv("MODEL_WARMUP_PASSES", "1")
+    registry = ModelRegistry({"lesion": HuggingFaceVisionService})
+    registry.current("lesion")
+    yield registry
+    registry.close()
+
+def _deploy(registry: ModelRegistry, source: str) -> dict:
+    async def deploy():
+        registry.deploy("lesion", source)
+        while registry.model_stats("lesion")["versions"][-1]["status"] == ModelVersion.LOADING:
+            await asyncio.sleep(0.05)
+    asyncio.run(deploy())
+    return registry.model_stats("lesion")
+
+def test_deploy_of_a_model_that_cannot_be_loaded_fails(registry):
+    stats = _deploy(registry, "typo/model")
+
+    assert stats["active_version"] == "v1"
+    assert [version["status"] for version in stats["versions"]] == [ModelVersion.ACTIVE, ModelVersion.FAILED]
+    assert "typo/model" in stats["versions"][1]["error"]
+    assert registry.current("lesion") is not None
+
+def test_readiness_reports_the_swapped_in_version(registry, tiny_vit_path):
+    lifecycle = ModelLifecycle({"lesion": lambda: registry.current("lesion")}, model_registry=registry)
+    lifecycle._prepare("lesion")
+    assert lifecycle.model_state("lesion")["version"] == "v1"
+
+    stats = _deploy(registry, tiny_vit_path)
+
+    assert stats["active_version"] == "v2"
+    state = lifecycle.model_state("lesion")
+    assert state["version"] == "v2"
+    assert state["weight_source"] == f"huggingface:{tiny_vit_path}"
+    assert state["warmup_seconds"] == stats["versions"][1]["warmup_seconds"]
+    assert lifecycle.is_model_ready("lesion")
@@ -0,0 +1,41 @@
+import time
+import pytest
+from src.domain.exceptions.model_worker_error import ModelWorkerError
+from src.infrastructure.services.huggingface_vision_service import HuggingFaceVisionService
+from src.infrastructure.services.process_model_services import ProcessVisionService
+
+@pytest.fixture
+def process_service(tiny_vit_path):
+    service = ProcessVisionService(tiny_vit_path)
+    yield service
+    service.close()
+
+def _wait_for_restart(worker, restarts: int, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while worker.stats()["restarts"] < restarts:
+        assert time.monotonic() < deadline, "worker was not restarted"
+        time.sleep(0.1)
+
+def test_process_inference_matches_in_process(tiny_vit_path, process_service, images):
+    expected = HuggingFaceVisionService(tiny_vit_path).classify_batch(images)
+    result = process_service.classify_batch(images)
+
+    assert [label for label, _ in result] == [label for label, _ in expected]
+    assert [confidence for _, confidence in result] == pytest.approx(
+        [confidence for _, confidence in expected], abs=1e-6
+    )
+
+def test_calls_fail_fast_while_the_worker_restarts(process_service, images):
+    expected = process_service.classify_batch(images)
+    worker = process_service.worker
+    worker._process.kill()
+    worker._process.join(5)
+
+    start = time.monotonic()
+    with pytest.raises(ModelWorkerError):
+        process_service.classify_batch(images)
+    assert time.monotonic() - start < 1.0
+
+    _wait_for_restart(worker, 1)
+    assert process_service.classify_batch(images) == expected
+    assert worker.stats()["crashes"] == 1